@@ -0,0 +1,95 @@
+"""
+Import-time benchmark of the CLI
+
+Measures how long ``import video_pipeline.cli`` and ``video-pipeline --help``
+take in a fresh interpreter and checks that heavy dependencies are not
+imported at startup. Exits with code 1 if the budget is exceeded.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 150] [--runs 10]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+# Пакеты, которые не должны загружаться при старте CLI
+HEAVY_MODULES = ["yaml", "tqdm", "jsonschema", "numpy", "cv2", "video_pipeline.core.pipeline",
+                 "video_pipeline.modules.crop", "video_pipeline.modules.chromakey"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run_python(code, *flags):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable, *flags, "-c", code], env=env,
+                          capture_output=True, text=True, check=True)
+
+def measure_import(module, runs):
+    """
+    Cumulative import time of a module (microseconds) from ``-X importtime``.
+    """
+    samples = []
+    pattern = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*" + re.escape(module) + r"$")
+    for _ in range(runs):
+        result = _run_python(f"import {module}", "-X", "importtime")
+        for line in result.stderr.splitlines():
+            match = pattern.search(line)
+            if match:
+                samples.append(int(match.group(1)))
+    return samples
+
+def measure_help(runs):
+    """
+    Wall time of ``video-pipeline --help`` including interpreter startup (seconds).
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run_python("import sys; sys.argv = ['video-pipeline', '--help']\n"
+                    "from video_pipeline.cli import main\n"
+                    "try:\n    main()\nexcept SystemExit:\n    pass")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def loaded_heavy_modules():
+    """
+    Heavy modules that are imported by ``import video_pipeline.cli``.
+    """
+    result = _run_python("import sys, video_pipeline.cli, video_pipeline.modules\n"
+                         f"print('\\n'.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return [line for line in result.stdout.splitlines() if line]
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI import-time benchmark")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Maximum median import time of video_pipeline.cli in milliseconds")
+    parser.add_argument("--runs", type=int, default=10, help="Number of measurements")
+    args = parser.parse_args()
+
+    imports = measure_import("video_pipeline.cli", args.runs)
+    help_times = measure_help(args.runs)
+    heavy = loaded_heavy_modules()
+
+    import_ms = statistics.median(imports) / 1000 if imports else float("nan")
+    help_ms = statistics.median(help_times) * 1000
+
+    print(f"import video_pipeline.cli:  median {import_ms:.1f} ms ({args.runs} runs)")
+    print(f"video-pipeline --help:      median {help_ms:.1f} ms (including interpreter startup)")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if not imports or import_ms > args.budget_ms:
+        print(f"FAIL: import time exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ source venv/bin/activate
 
 # Пути к директориям
 SOURCE_DIR="workspace/velosiped/velosipeds"
+# Части короче 40 секунд не создаются: в конфигурации utility.cut задан
+# min_duration: 40, план частей сохраняется в JSON-манифест рядом с частями
 CONFIG_FILE="configs/config_cut_velosiped.yaml"
 OUTPUT_DIR="workspace/velosiped/velo_parts"
 
@@ -30,18 +32,4 @@ for video in "$SOURCE_DIR"/*.mp4; do
 done
 
 
-# Удаляем видео, если они короче 40 секунд
-for video in "$OUTPUT_DIR"/*.mp4; do
-    if [ -f "$video" ]; then
-        # Получаем длительность видео в секундах
-        duration=$(ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "$video")
-        
-        # Проверяем длительность
-        if (( $(echo "$duration < 40" | bc -l) )); then
-            echo "Удаляем $video с длительностью $duration секунд..."
-            rm "$video"
-        fi
-    fi
-done
-
 echo "All videos processed!" 
\ No newline at end of file
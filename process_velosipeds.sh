@@ -14,7 +14,13 @@ CONFIG_FOOTAGES_DIR="workspace/velosiped/footages_config"
 # Создаем директории, если они не существуют
 mkdir -p "$OUTPUT_DIR"
 
-# Определяем конфиги для каждого футажа
+# Определяем конфиги для каждого футажа. Пути к файлам в конфигах заданы
+# переменными: футаж - ${footage} (например, overlay: "${footage}"), вход и
+# выход передаются через -i/-o, поэтому файлы не копируются.
+# Конфиги в старом формате (футаж по фиксированному пути working_footage.mp4)
+# тоже работают: для них футаж копируется, как раньше. Для перехода замените
+# в конфиге путь workspace/velosiped/working_footage.mp4 на "${footage}"
+LEGACY_FOOTAGE="workspace/velosiped/working_footage.mp4"
 declare -A configs
 configs["испания 1"]="$CONFIG_FOOTAGES_DIR/config_create_velosipedes_1.yaml"
 configs["испания 2"]="$CONFIG_FOOTAGES_DIR/config_create_velosipedes_2.yaml"
@@ -51,25 +57,20 @@ for ((i=0; i<${#inputs[@]}; i++)); do
     
     echo "Обработка $input_name с футажем $footage_name"
     
-    # Копируем входное видео под именем из конфига
-    cp "$input" "workspace/velosiped/input.mp4"
-    
-    # Копируем футаж под именем из конфига
-    cp "$footage" "workspace/velosiped/working_footage.mp4"
+    config="${configs[$footage_name]}"
+    if ! grep -qF '${footage}' "$config"; then
+        # Конфиг еще не переведен на переменные: футаж копируется под именем из конфига
+        cp "$footage" "$LEGACY_FOOTAGE"
+    fi
     
     # Запускаем обработку видео с соответствующим конфигом
-    video-pipeline process -c "${configs[$footage_name]}"
-    
-    # Переименовываем выходной файл
-    if [ -f "workspace/velosiped/output.mp4" ]; then
-        mv "workspace/velosiped/output.mp4" "$OUTPUT_DIR/output_${input_name}_${footage_name}.mp4"
-    else
+    if ! video-pipeline process -c "$config" \
+        -i "$input" \
+        -o "$OUTPUT_DIR/output_${input_name}_${footage_name}.mp4" \
+        -D footage="$footage"; then
         echo "Ошибка: выходной файл не создан для $input_name с футажем $footage_name"
     fi
-    
-    # Удаляем временные файлы
-    rm -f "workspace/velosiped/input.mp4"
-    rm -f "workspace/velosiped/working_footage.mp4"
+    rm -f "$LEGACY_FOOTAGE"
 done
 
 echo "Обработка завершена!" 
\ No newline at end of file
@@ -28,16 +28,24 @@ get_dominant_color() {
     echo "$color"
 }
 
+# Экранирование поля CSV
+csv_field() {
+    local value="${1//\"/\"\"}"
+    printf '"%s"' "$value"
+}
+
 # Пути к директориям
 FOOTAGES_DIR="workspace/velosiped/footages"
 INPUT_DIR="workspace/velosiped/velo_parts"
 OUTPUT_DIR="workspace/velosiped/output"
-CONFIG_FOOTAGES_DIR="workspace/velosiped/footages_config"
-TEMP_CONFIG_DIR="$CONFIG_FOOTAGES_DIR/temp"
+# Шаблон конфигурации: футаж и цвет фона подставляются из манифеста, длительность
+# футажа шаблон получает сам (${probe(footage).duration}), поэтому конфиги для
+# каждого задания не создаются и видео не копируются
+CONFIG_TEMPLATE="configs/config_velosiped_auto.yaml"
+MANIFEST="workspace/velosiped/manifest.csv"
 
 # Создаем директории
 mkdir -p "$OUTPUT_DIR"
-mkdir -p "$TEMP_CONFIG_DIR"
 
 # Получаем списки файлов
 footages=($FOOTAGES_DIR/*)
@@ -54,7 +62,18 @@ if [ ${#inputs[@]} -eq 0 ]; then
     exit 1
 fi
 
-# Обрабатываем входные видео
+# Цвет фона каждого футажа определяется один раз
+declare -A colors
+for footage in "${footages[@]}"; do
+    footage_name=$(basename "$footage")
+    
+    # Определяем цвет фона для футажа по координате (40, 40)
+    colors[$footage]=$(get_dominant_color "$footage")
+    echo "Цвет фона футажа $footage_name: ${colors[$footage]}"
+done
+
+# Составляем манифест заданий
+echo "input,output,footage,color" > "$MANIFEST"
 for ((i=0; i<${#inputs[@]}; i++)); do
     input="${inputs[$i]}"
     footage_index=$((i % ${#footages[@]}))
@@ -65,82 +84,15 @@ for ((i=0; i<${#inputs[@]}; i++)); do
     footage_name=$(basename "$footage")
     footage_name="${footage_name%.*}"
     
-    echo "Обработка $input_name с футажем $footage_name"
-    
-
-    # Определяем длительность футажа
-    duration=$(ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "$footage" | awk -F. '{print $1"."substr($2,1,1)}')
-    echo "Длительность футажа: $duration секунд"
-
-    # Определяем цвет фона для футажа по координате (40, 40)
-    echo "Определяем цвет фона по координате (40, 40)..."
-    background_color=$(get_dominant_color "$footage")
-    echo "Определен цвет фона: $background_color"
-    
-    # Создаем временный конфигурационный файл
-    temp_config="$TEMP_CONFIG_DIR/config_${input_name}_${footage_name}.yaml"
-    cat > "$temp_config" << EOF
-input: "workspace/velosiped/input.mp4"
-output: "workspace/velosiped/output.mp4"
-
-modules:
-  - name: utility.prepare_for_yt
-  - name: delete_audio
-  - name: cut_video
-    params:
-      start: 0
-      duration: "$duration"
-      accurate: true
-  - name: resize
-    params:
-      width: 1920
-      height: 1080
-  - name: crop
-    params:
-      width: 540
-      height: 960
-      position: "center"
-  - name: resize
-    params:
-      width: 1080
-      height: 1920
-  - name: chromakey 
-    params:
-      color: "$background_color"
-      similarity: 0.02
-      blend: 0.4
-      overlay: "workspace/velosiped/working_footage.mp4"
-      position: "center"
-      width: 1080
-      height: 1920
-      mute_overlay: false
-      audio_codec: "copy"
-  - name: utility.prepare_for_yt
-EOF
-    
-    # Копируем файлы
-    cp "$input" "workspace/velosiped/input.mp4"
-    cp "$footage" "workspace/velosiped/working_footage.mp4"
-    
-    # Запускаем обработку
-    echo "Запускаем обработку с автоматически определенным цветом фона..."
-    video-pipeline process -c "$temp_config"
-    
-    # Перемещаем результат
-    if [ -f "workspace/velosiped/output.mp4" ]; then
-        mv "workspace/velosiped/output.mp4" "$OUTPUT_DIR/output_${input_name}_${footage_name}.mp4"
-        echo "Успешно создан файл: output_${input_name}_${footage_name}.mp4"
-    else
-        echo "Ошибка: выходной файл не создан для $input_name с футажем $footage_name"
-    fi
-    
-    # Очищаем временные файлы
-    rm -f "workspace/velosiped/input.mp4"
-    rm -f "workspace/velosiped/working_footage.mp4"
-    rm -f "$temp_config"
+    echo "$(csv_field "$input"),$(csv_field "$OUTPUT_DIR/output_${input_name}_${footage_name}.mp4"),$(csv_field "$footage"),${colors[$footage]}" >> "$MANIFEST"
 done
 
-# Очищаем временную директорию
-rm -rf "$TEMP_CONFIG_DIR"
+# Запускаем обработку всех заданий
+echo "Запускаем обработку с автоматически определенным цветом фона..."
+video-pipeline batch --manifest "$MANIFEST" -c "$CONFIG_TEMPLATE" -o "$OUTPUT_DIR"
+status=$?
+
+rm -f "$MANIFEST"
 
-echo "Обработка завершена!" 
\ No newline at end of file
+echo "Обработка завершена!"
+exit $status
@@ -9,7 +9,22 @@ OUTPUT_DIR="$WORKSPACE_DIR/OUTPUT"
 TEMP_DIR="$WORKSPACE_DIR/TEMP"
 
 # Создаем папку для выходных файлов если её нет
-mkdir -p $ROBLOX_DIR $ASMR_DIR $OUTPUT_DIR $TEMP_DIR
+mkdir -p $ROBLOX_DIR $ASMR_DIR $OUTPUT_DIR
+
+# Локальный configs/config.yaml, если он есть, используется вместо шаблона
+# configs/config_asmr_roblox.yaml. В шаблоне пути к видео заданы переменными
+# ${asmr} и ${roblox}, поэтому файлы передаются через -D без копирования.
+# Конфиги в старом формате (видео по фиксированным путям TEMP/1.mp4 и
+# TEMP/2.mp4) тоже работают: для них видео копируются, как раньше. Для
+# перехода замените в конфиге эти пути на "${asmr}" и "${roblox}"
+CONFIG_FILE="configs/config.yaml"
+if [ ! -f "$CONFIG_FILE" ]; then
+    CONFIG_FILE="configs/config_asmr_roblox.yaml"
+fi
+LEGACY_CONFIG=false
+if ! grep -qF '${asmr}' "$CONFIG_FILE"; then
+    LEGACY_CONFIG=true
+fi
 
 # Счетчик для выходных файлов
 counter=1
@@ -50,22 +65,23 @@ for (( i=0; i<num_pairs; i++ )); do
     if [ -f "$asmr_file" ] && [ -f "$roblox_file" ]; then
         echo "ASMR: $(basename "$asmr_file")"
         echo "Roblox: $(basename "$roblox_file")"
-        mkdir -p $TEMP_DIR
-        # Копируем файлы с нужными именами
-        cp "$asmr_file" "$TEMP_DIR/1.mp4"
-        cp "$roblox_file" "$TEMP_DIR/2.mp4"
-        
-        # Запускаем основной pipeline
-        video-pipeline process -c configs/config.yaml
         
-        # Перемещаем финальный результат в папку out
-        mv output.mp4 "$OUTPUT_DIR/$counter.mp4"
-        echo "Создан файл: $OUTPUT_DIR/$counter.mp4"
-        ((counter++))
+        if [ "$LEGACY_CONFIG" = true ]; then
+            # Конфиг еще не переведен на переменные: копируем файлы с нужными именами
+            mkdir -p "$TEMP_DIR"
+            cp "$asmr_file" "$TEMP_DIR/1.mp4"
+            cp "$roblox_file" "$TEMP_DIR/2.mp4"
+        fi
         
-        # Удаляем временные файлы
+        # Запускаем основной pipeline
+        if video-pipeline process -c "$CONFIG_FILE" \
+            -D asmr="$asmr_file" \
+            -D roblox="$roblox_file" \
+            -o "$OUTPUT_DIR/$counter.mp4"; then
+            echo "Создан файл: $OUTPUT_DIR/$counter.mp4"
+            ((counter++))
+        fi
         rm -f -r "$TEMP_DIR"
     fi
 done
-rm -f -r "$TEMP_DIR"
 echo -e "\nОбработка завершена. Создано $((counter-1)) видео." 
\ No newline at end of file
@@ -6,10 +6,10 @@ import sys
 import argparse
 import logging
 
-from video_pipeline.core.pipeline import Pipeline
+# Тяжелые зависимости (yaml, tqdm, модули конвейера) импортируются внутри
+# команд, чтобы не замедлять запуск CLI
 from video_pipeline.utils.logger import setup_logger
 from video_pipeline.utils.ffmpeg import check_ffmpeg_installed
-from video_pipeline.config.generate_examples import generate_example_config
 
 def parse_args():
     """
@@ -39,6 +39,12 @@ def parse_args():
         "-o", "--output",
         help="Path to output video (overrides value from configuration)"
     )
+    process_parser.add_argument(
+        "-D", "--define",
+        action="append",
+        metavar="NAME=VALUE",
+        help="Value of a ${NAME} variable in the configuration (can be repeated)"
+    )
     process_parser.add_argument(
         "-l", "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
@@ -50,6 +56,423 @@ def parse_args():
         help="Path to log file (if not specified, logs are output to console only)"
     )
     process_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Maximum number of stages executed in parallel (graph configurations only)"
+    )
+    process_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the last completed stage"
+    )
+    process_parser.add_argument(
+        "--work-dir",
+        help="Directory for run journals and intermediate files (default: .video_pipeline next to the output)"
+    )
+    process_parser.add_argument(
+        "--deadline",
+        help="Time budget, e.g. 30m or 2h; the x264 preset is chosen to finish on time"
+    )
+    process_parser.add_argument(
+        "--target-speed",
+        help="Required speed relative to real time, e.g. 3x"
+    )
+    process_parser.add_argument(
+        "--proxy",
+        help="Fast low-resolution preview, e.g. 360p: inputs and pixel parameters are scaled down, "
+             "stages encode with ultrafast (output gets a .proxy360p suffix)"
+    )
+    process_parser.add_argument(
+        "--from",
+        dest="window_start",
+        help="Render only from this position of the input, e.g. 40 or 0:40 "
+             "(time parameters of modules are rebased; output gets a .40-50s suffix)"
+    )
+    process_parser.add_argument(
+        "--to",
+        dest="window_end",
+        help="Render only up to this position of the input"
+    )
+    process_parser.add_argument(
+        "--skip-checks",
+        action="store_true",
+        help="Skip dependency checks (FFmpeg)"
+    )
+    
+    # Парсер для пакетной обработки
+    batch_parser = subparsers.add_parser("batch", help="Process a set of videos within a time budget")
+    batch_parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Input videos or directories (searched recursively)"
+    )
+    batch_parser.add_argument(
+        "--manifest",
+        help="CSV/JSON/YAML list of jobs: input, optional output and values of configuration variables"
+    )
+    batch_parser.add_argument(
+        "-D", "--define",
+        action="append",
+        metavar="NAME=VALUE",
+        help="Value of a ${NAME} variable in the configuration (can be repeated)"
+    )
+    batch_parser.add_argument(
+        "-c", "--config",
+        required=True,
+        help="Path to YAML configuration file"
+    )
+    batch_parser.add_argument(
+        "-o", "--output-dir",
+        default="output",
+        help="Directory for processed videos (default: output)"
+    )
+    batch_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="Number of parallel jobs (default: host profile from 'tune', otherwise 2)"
+    )
+    batch_parser.add_argument(
+        "--deadline",
+        help="Time budget of the whole batch, e.g. 2h"
+    )
+    batch_parser.add_argument(
+        "--target-speed",
+        help="Required speed of every job relative to real time, e.g. 3x"
+    )
+    batch_parser.add_argument(
+        "--pattern",
+        default="*.mp4",
+        help="Glob pattern of input files in directories (default: *.mp4)"
+    )
+    batch_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue interrupted jobs from the last completed stage"
+    )
+    batch_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the chosen presets and time estimates"
+    )
+    batch_parser.add_argument(
+        "--metrics-file",
+        help="Write Prometheus metrics to this file (node_exporter textfile collector)"
+    )
+    batch_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this local port at /metrics"
+    )
+    batch_parser.add_argument(
+        "-l", "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    batch_parser.add_argument(
+        "--log-file",
+        help="Path to log file (if not specified, logs are output to console only)"
+    )
+    
+    # Парсер для проверки конфигурации
+    check_parser = subparsers.add_parser("check", help="Validate configuration, assets and FFmpeg without processing")
+    check_parser.add_argument(
+        "-c", "--config",
+        required=True,
+        help="Path to YAML configuration file"
+    )
+    check_parser.add_argument(
+        "-i", "--input",
+        help="Path to input video (overrides value from configuration)"
+    )
+    check_parser.add_argument(
+        "-o", "--output",
+        help="Path to output video (overrides value from configuration)"
+    )
+    check_parser.add_argument(
+        "-D", "--define",
+        action="append",
+        metavar="NAME=VALUE",
+        help="Value of a ${NAME} variable in the configuration (can be repeated)"
+    )
+    
+    # Парсер для подбора настроек энкодера
+    sweep_parser = subparsers.add_parser("sweep", help="Measure speed, size and quality over a grid of x264 settings")
+    sweep_parser.add_argument(
+        "-i", "--input",
+        required=True,
+        help="Sample video"
+    )
+    sweep_parser.add_argument(
+        "--start",
+        help="Start of the sample clip in the input, e.g. 30 or 0:30 (default: whole input)"
+    )
+    sweep_parser.add_argument(
+        "--duration",
+        type=float,
+        default=10.0,
+        help="Duration of the sample clip in seconds when --start is given (default: 10)"
+    )
+    sweep_parser.add_argument(
+        "--presets",
+        default="veryfast,faster,fast,medium,slow",
+        help="Comma-separated x264 presets (default: veryfast,faster,fast,medium,slow)"
+    )
+    sweep_parser.add_argument(
+        "--crf",
+        default="18,20,23",
+        help="Comma-separated CRF values (default: 18,20,23)"
+    )
+    sweep_parser.add_argument(
+        "--threads",
+        default="0",
+        help="Comma-separated thread counts, 0 - chosen by x264 (default: 0)"
+    )
+    sweep_parser.add_argument(
+        "--json",
+        help="Save all results and the Pareto frontier to a JSON file"
+    )
+    sweep_parser.add_argument(
+        "--work-dir",
+        help="Keep encoded files in this directory (default: temporary directory)"
+    )
+    sweep_parser.add_argument(
+        "-l", "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    sweep_parser.add_argument(
+        "--log-file",
+        help="Path to log file (if not specified, logs are output to console only)"
+    )
+    
+    # Парсер для подбора раскладки заданий и потоков на машине
+    tune_parser = subparsers.add_parser("tune", help="Find the fastest parallel jobs x encoder threads layout of this host")
+    tune_parser.add_argument(
+        "-c", "--config",
+        required=True,
+        help="Path to YAML configuration file"
+    )
+    tune_parser.add_argument(
+        "-i", "--input",
+        help="Sample video (default: input from configuration)"
+    )
+    tune_parser.add_argument(
+        "-D", "--define",
+        action="append",
+        metavar="NAME=VALUE",
+        help="Value of a ${NAME} variable in the configuration (can be repeated)"
+    )
+    tune_parser.add_argument(
+        "--start",
+        default="0",
+        help="Start of the sample clip in the input, e.g. 30 or 0:30 (default: 0)"
+    )
+    tune_parser.add_argument(
+        "--duration",
+        type=float,
+        default=5.0,
+        help="Duration of the sample clip in seconds (default: 5)"
+    )
+    tune_parser.add_argument(
+        "--layouts",
+        help="Comma-separated WORKERSxTHREADS layouts, e.g. 2x8,8x2 (default: 1xN, 2xN/2, ..., Nx1 for N CPUs)"
+    )
+    tune_parser.add_argument(
+        "--rounds",
+        type=int,
+        default=1,
+        help="Sample copies processed by every worker (default: 1)"
+    )
+    tune_parser.add_argument(
+        "--max-memory",
+        type=float,
+        help="Do not choose layouts whose FFmpeg processes use more memory, in MB"
+    )
+    tune_parser.add_argument(
+        "--json",
+        help="Save all results to a JSON file"
+    )
+    tune_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only measure, do not write the host profile"
+    )
+    tune_parser.add_argument(
+        "-l", "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    tune_parser.add_argument(
+        "--log-file",
+        help="Path to log file (if not specified, logs are output to console only)"
+    )
+    
+    # Парсер для режима демона
+    serve_parser = subparsers.add_parser("serve", help="Watch a directory and process new videos")
+    serve_parser.add_argument(
+        "--watch",
+        required=True,
+        help="Directory with input videos (watched recursively)"
+    )
+    serve_parser.add_argument(
+        "-c", "--config",
+        required=True,
+        help="Path to YAML configuration file"
+    )
+    serve_parser.add_argument(
+        "-o", "--output-dir",
+        default="output",
+        help="Directory for processed videos (default: output)"
+    )
+    serve_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="Number of parallel jobs (default: host profile from 'tune', otherwise 2)"
+    )
+    serve_parser.add_argument(
+        "--queue-db",
+        help="Path to the job queue database (default: .video_pipeline_queue.db in output directory)"
+    )
+    serve_parser.add_argument(
+        "--pattern",
+        default="*.mp4",
+        help="Glob pattern of input files (default: *.mp4)"
+    )
+    serve_parser.add_argument(
+        "--stable-seconds",
+        type=float,
+        default=5.0,
+        help="Time a file must stay unchanged before it is processed (default: 5)"
+    )
+    serve_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Use directory polling instead of inotify"
+    )
+    serve_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Requeue jobs that failed in previous runs"
+    )
+    serve_parser.add_argument(
+        "--metrics-file",
+        help="Write Prometheus metrics to this file (node_exporter textfile collector)"
+    )
+    serve_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this local port at /metrics"
+    )
+    serve_parser.add_argument(
+        "-l", "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    serve_parser.add_argument(
+        "--log-file",
+        help="Path to log file (if not specified, logs are output to console only)"
+    )
+    serve_parser.add_argument(
+        "--skip-checks",
+        action="store_true",
+        help="Skip dependency checks (FFmpeg)"
+    )
+    
+    # Парсер для постановки заданий в общую очередь
+    submit_parser = subparsers.add_parser("submit", help="Add videos to a shared queue directory for workers")
+    submit_parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Input videos and/or directories (searched recursively)"
+    )
+    submit_parser.add_argument(
+        "--queue",
+        required=True,
+        help="Queue directory on a filesystem shared by all workers"
+    )
+    submit_parser.add_argument(
+        "-o", "--output-dir",
+        default="output",
+        help="Directory for processed videos (default: output)"
+    )
+    submit_parser.add_argument(
+        "-c", "--config",
+        help="Configuration for these jobs (default: configuration of the worker)"
+    )
+    submit_parser.add_argument(
+        "--pattern",
+        default="*.mp4",
+        help="Glob pattern of input files inside directories (default: *.mp4)"
+    )
+    submit_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Requeue jobs that failed earlier"
+    )
+    
+    # Парсер для распределенного воркера
+    worker_parser = subparsers.add_parser("worker", help="Process jobs from a shared queue directory")
+    worker_parser.add_argument(
+        "--queue",
+        required=True,
+        help="Queue directory on a filesystem shared by all workers"
+    )
+    worker_parser.add_argument(
+        "-c", "--config",
+        help="Configuration for jobs submitted without one"
+    )
+    worker_parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        help="Number of parallel jobs in this process (default: host profile from 'tune', otherwise 1)"
+    )
+    worker_parser.add_argument(
+        "--lease",
+        type=float,
+        default=60.0,
+        help="Seconds without heartbeat after which a job of a lost worker is reclaimed (default: 60)"
+    )
+    worker_parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Attempts of a job before it is moved to failed (default: 3)"
+    )
+    worker_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between queue scans when it is empty (default: 5)"
+    )
+    worker_parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Exit when the queue has no pending or running jobs"
+    )
+    worker_parser.add_argument(
+        "--metrics-file",
+        help="Write Prometheus metrics to this file (node_exporter textfile collector)"
+    )
+    worker_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this local port at /metrics"
+    )
+    worker_parser.add_argument(
+        "-l", "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Logging level (default: INFO)"
+    )
+    worker_parser.add_argument(
+        "--log-file",
+        help="Path to log file (if not specified, logs are output to console only)"
+    )
+    worker_parser.add_argument(
         "--skip-checks",
         action="store_true",
         help="Skip dependency checks (FFmpeg)"
@@ -69,6 +492,33 @@ def parse_args():
     
     return parser.parse_args()
 
+def _metrics_exporter(args):
+    """
+    Create the metrics exporter requested on the command line.
+    
+    Returns:
+        Context manager that exports metrics while the command runs
+    """
+    from contextlib import nullcontext
+    
+    if not args.metrics_file and not args.metrics_port:
+        return nullcontext()
+    from video_pipeline.core.metrics import MetricsExporter
+    return MetricsExporter(textfile=args.metrics_file, port=args.metrics_port)
+
+def _variables(args) -> dict:
+    """
+    Collect configuration variables from -D options.
+    
+    The input and output given on the command line are also available
+    as ${input} and ${output}.
+    """
+    from video_pipeline.config.template import parse_variables
+    
+    variables = {name: getattr(args, name) for name in ("input", "output") if getattr(args, name, None)}
+    variables.update(parse_variables(args.define))
+    return variables
+
 def main():
     """
     Main function to run the pipeline.
@@ -94,15 +544,264 @@ def main():
             sys.exit(1)
         
         try:
-            # Create and run the pipeline
-            pipeline = Pipeline(args.config)
-            pipeline.process(args.input, args.output)
-            logger.info("Video processing completed successfully")
+            variables = _variables(args)
+            if args.window_start is not None or args.window_end is not None:
+                from video_pipeline.core.window import process_window
+                
+                outputs = process_window(args.config, args.window_start, args.window_end, args.input, args.output,
+                                         proxy=args.proxy, variables=variables, jobs=args.jobs, resume=args.resume,
+                                         work_dir=args.work_dir, deadline=args.deadline,
+                                         target_speed=args.target_speed)
+                logger.info(f"Window render completed: {', '.join(outputs.values())}")
+            elif args.proxy:
+                from video_pipeline.core.proxy import process_proxy
+                
+                outputs = process_proxy(args.config, args.proxy, args.input, args.output, variables=variables,
+                                        jobs=args.jobs, resume=args.resume, work_dir=args.work_dir)
+                logger.info(f"Proxy render completed: {', '.join(outputs.values())}")
+            else:
+                from video_pipeline.core.pipeline import Pipeline
+                
+                # Create and run the pipeline
+                pipeline = Pipeline(args.config, variables=variables)
+                pipeline.process(args.input, args.output, jobs=args.jobs, resume=args.resume, work_dir=args.work_dir,
+                                 deadline=args.deadline, target_speed=args.target_speed)
+                logger.info("Video processing completed successfully")
         except Exception as e:
             logger.error(f"Error processing video: {str(e)}", exc_info=True)
             sys.exit(1)
             
+    elif args.command == "batch":
+        logger = setup_logger(args.log_level, args.log_file)
+        
+        if not os.path.exists(args.config):
+            logger.error(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        if not args.inputs and not args.manifest:
+            logger.error("Specify input videos or directories, or a --manifest")
+            sys.exit(1)
+            
+        try:
+            from video_pipeline.config.template import parse_variables
+            from video_pipeline.core.batch import Batch
+            
+            batch = Batch(
+                args.config,
+                args.inputs,
+                args.output_dir,
+                workers=args.workers,
+                deadline=args.deadline,
+                target_speed=args.target_speed,
+                pattern=args.pattern,
+                resume=args.resume,
+                variables=parse_variables(args.define),
+                manifest=args.manifest
+            )
+            if args.dry_run:
+                for input_path, output_path, plan in batch.plan():
+                    print(f"{input_path} -> {output_path}: preset {plan.preset}, "
+                          f"rc-lookahead {plan.lookahead}, estimated {plan.estimated_seconds:.0f}s")
+                sys.exit(0)
+                
+            with _metrics_exporter(args):
+                completed, failed = batch.run()
+        except Exception as e:
+            logger.error(f"Batch error: {str(e)}", exc_info=True)
+            sys.exit(1)
+        if failed:
+            sys.exit(1)
+            
+    elif args.command == "check":
+        from video_pipeline.config.template import load_template
+        from video_pipeline.core.preflight import run_preflight
+        
+        if not os.path.exists(args.config):
+            print(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        try:
+            config = load_template(args.config).render(_variables(args))
+        except ValueError as e:
+            print(f"ERROR: {str(e)}")
+            sys.exit(1)
+            
+        report = run_preflight(config, args.input, args.output)
+        for warning in report.warnings:
+            print(f"WARNING: {warning}")
+        for error in report.errors:
+            print(f"ERROR: {error}")
+            
+        if not report.ok:
+            print(f"Check failed: {len(report.errors)} errors, {len(report.warnings)} warnings")
+            sys.exit(1)
+        print(f"Configuration OK ({len(report.warnings)} warnings)")
+            
+    elif args.command == "sweep":
+        logger = setup_logger(args.log_level, args.log_file)
+        
+        if not check_ffmpeg_installed():
+            logger.error("FFmpeg is not installed or not found in PATH.")
+            sys.exit(1)
+            
+        try:
+            from video_pipeline.core.sweep import format_table, run_sweep, save_results
+            
+            sample = args.input
+            if args.start is not None:
+                from video_pipeline.core.window import make_window_input, parse_time
+                
+                start = parse_time(args.start)
+                sample = make_window_input(args.input, start, start + args.duration)
+                
+            results = run_sweep(
+                sample,
+                presets=[p.strip() for p in args.presets.split(",") if p.strip()],
+                crfs=[int(c) for c in args.crf.split(",") if c.strip()],
+                threads=[int(t) for t in args.threads.split(",") if t.strip()],
+                work_dir=args.work_dir
+            )
+            print(format_table(results))
+            print("* - Pareto frontier (no other setting is faster, smaller and better at once)")
+            if args.json:
+                save_results(results, args.json, args.input)
+                print(f"Results saved to {args.json}")
+        except Exception as e:
+            logger.error(f"Sweep error: {str(e)}", exc_info=True)
+            sys.exit(1)
+            
+    elif args.command == "tune":
+        logger = setup_logger(args.log_level, args.log_file)
+        
+        if not check_ffmpeg_installed():
+            logger.error("FFmpeg is not installed or not found in PATH.")
+            sys.exit(1)
+            
+        if not os.path.exists(args.config):
+            logger.error(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        try:
+            from video_pipeline.config.template import load_template
+            from video_pipeline.core.preflight import input_files
+            from video_pipeline.core.tune import (best_profile, default_layouts, format_table, parse_layouts,
+                                                  profile_path, run_tune, save_host_profile, save_results)
+            from video_pipeline.core.window import make_window_input, parse_time
+            
+            config = load_template(args.config).render(_variables(args))
+            input_path = next(iter(input_files(config, args.input).values()), None)
+            if not input_path:
+                logger.error("Specify a sample video with -i")
+                sys.exit(1)
+                
+            # Короткий образец из реального входа: все раскладки обрабатывают одно и то же
+            start = parse_time(args.start)
+            sample = make_window_input(input_path, start, start + args.duration)
+            layouts = parse_layouts(args.layouts) if args.layouts else default_layouts()
+            results = run_tune(config, sample, layouts, config_path=args.config, rounds=args.rounds,
+                               max_memory_mb=args.max_memory)
+            print(format_table(results))
+            print("* - fastest layout" + (f" within {args.max_memory:g} MB" if args.max_memory else ""))
+            if args.json:
+                save_results(results, args.json, input_path)
+                print(f"Results saved to {args.json}")
+                
+            profile = best_profile(results, args.config)
+            if profile is None:
+                logger.error("No layout fits the memory limit")
+                sys.exit(1)
+            if not args.dry_run:
+                save_host_profile(profile)
+                print(f"Host profile saved to {profile_path()}: {profile.workers} workers x {profile.threads} threads")
+        except Exception as e:
+            logger.error(f"Tune error: {str(e)}", exc_info=True)
+            sys.exit(1)
+            
+    elif args.command == "serve":
+        from video_pipeline.core.daemon import Daemon
+        
+        logger = setup_logger(args.log_level, args.log_file)
+        
+        # FFmpeg проверяется один раз при запуске демона
+        if not args.skip_checks and not check_ffmpeg_installed():
+            logger.error("FFmpeg is not installed or not found in PATH.")
+            sys.exit(1)
+            
+        if not os.path.exists(args.config):
+            logger.error(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        try:
+            daemon = Daemon(
+                args.watch,
+                args.config,
+                args.output_dir,
+                workers=args.workers,
+                queue_db=args.queue_db,
+                pattern=args.pattern,
+                stable_seconds=args.stable_seconds,
+                use_inotify=not args.poll,
+                retry_failed=args.retry_failed
+            )
+            with _metrics_exporter(args):
+                daemon.run()
+        except Exception as e:
+            logger.error(f"Daemon error: {str(e)}", exc_info=True)
+            sys.exit(1)
+            
+    elif args.command == "submit":
+        from video_pipeline.core.batch import collect_jobs
+        from video_pipeline.core.shared_queue import SharedQueue
+        
+        if args.config and not os.path.exists(args.config):
+            print(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        queue = SharedQueue(args.queue)
+        if args.retry_failed:
+            print(f"Requeued {queue.requeue_failed()} failed jobs")
+        added = 0
+        for input_path, output_path in collect_jobs(args.inputs, args.output_dir, args.pattern):
+            if queue.add(input_path, output_path, args.config):
+                added += 1
+        counts = queue.counts()
+        print(f"Added {added} jobs (pending: {counts['pending']}, running: {counts['claimed']}, "
+              f"done: {counts['done']}, failed: {counts['failed']})")
+        
+    elif args.command == "worker":
+        from video_pipeline.core.worker import Worker
+        
+        logger = setup_logger(args.log_level, args.log_file)
+        
+        if not args.skip_checks and not check_ffmpeg_installed():
+            logger.error("FFmpeg is not installed or not found in PATH.")
+            sys.exit(1)
+            
+        if args.config and not os.path.exists(args.config):
+            logger.error(f"Configuration file not found: {args.config}")
+            sys.exit(1)
+            
+        try:
+            worker = Worker(
+                args.queue,
+                config_path=args.config,
+                threads=args.workers,
+                lease_seconds=args.lease,
+                max_attempts=args.max_attempts,
+                poll_interval=args.poll_interval,
+                drain=args.drain
+            )
+            with _metrics_exporter(args):
+                worker.run()
+        except Exception as e:
+            logger.error(f"Worker error: {str(e)}", exc_info=True)
+            sys.exit(1)
+        if worker.failed:
+            sys.exit(1)
+            
     elif args.command == "generate":
+        from video_pipeline.config.generate_examples import generate_example_config
+        
         # Генерируем пример конфигурации
         example_config = generate_example_config()
         
@@ -128,7 +827,7 @@ def main():
             sys.exit(1)
             
     else:
-        print("Please specify a command: process or generate")
+        print("Please specify a command: process, batch, check, sweep, tune, serve, submit, worker or generate")
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+Выражения в параметрах конфигурации: ${probe(footage).duration / 2}
+"""
+import ast
+import math
+import operator
+from typing import Dict, Any, Callable, List, Optional
+
+_BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_COMPARE_OPERATORS: Dict[type, Callable[[Any, Any], bool]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+class ProbeFacts:
+    """
+    Свойства медиафайла для выражений (результат probe(...)).
+
+    Данные берутся из общего кеша ffprobe (utils.probe), поэтому файл
+    читается один раз, сколько бы выражений и заданий на него ни ссылалось.
+
+    Attributes:
+        path: Путь к файлу
+        duration: Длительность в секундах
+        width: Ширина первого видеопотока
+        height: Высота первого видеопотока
+        fps: Частота кадров
+        frames: Число кадров (по длительности и частоте кадров)
+        has_audio: Есть ли аудиопоток
+        has_video: Есть ли видеопоток
+    """
+
+    def __init__(self, path: str):
+        from video_pipeline.utils.probe import probe, media_duration, has_stream, video_stream, frame_rate
+
+        info = probe(path)
+        stream = video_stream(info) or {}
+        self.path = path
+        self.duration = media_duration(info) or 0.0
+        self.width = int(stream.get("width") or 0)
+        self.height = int(stream.get("height") or 0)
+        self.fps = frame_rate(stream) or 0.0
+        self.frames = int(round(self.duration * self.fps))
+        self.has_audio = has_stream(info, "audio")
+        self.has_video = has_stream(info, "video")
+
+# Атрибуты, доступные в выражениях
+_PROBE_ATTRIBUTES = ("path", "duration", "width", "height", "fps", "frames", "has_audio", "has_video")
+
+def _probe(path: Any) -> ProbeFacts:
+    if not isinstance(path, str) or not path:
+        raise ValueError(f"probe() expects a file path, got {path!r}")
+    return ProbeFacts(path)
+
+def _even(value: float) -> int:
+    # Размеры кадра для libx264 должны быть четными
+    return int(round(value / 2)) * 2
+
+# Функции, доступные в выражениях
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "probe": _probe,
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": round,
+    "int": int,
+    "float": float,
+    "str": str,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "even": _even,
+}
+
+class Expression:
+    """
+    Выражение, разобранное и проверенное один раз.
+
+    Допускаются числа, строки, имена переменных, арифметика, сравнения,
+    условное выражение ``a if cond else b``, вызовы функций из FUNCTIONS
+    и атрибуты результата probe(). Все остальное (доступ к произвольным
+    атрибутам, импорт, индексы, лямбды) отклоняется при разборе, поэтому
+    конфигурация не может выполнить произвольный код.
+    """
+
+    def __init__(self, text: str):
+        """
+        Разбор выражения.
+
+        Args:
+            text: Текст выражения без ${ }
+
+        Raises:
+            ValueError: Если выражение содержит недопустимые конструкции
+        """
+        self.text = text.strip()
+        try:
+            self._tree = ast.parse(self.text, mode="eval").body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression '{self.text}': {e.msg}")
+        self.names: List[str] = []
+        self._check(self._tree)
+
+    def _check(self, node: ast.AST):
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool)) and node.value is not None:
+                raise ValueError(f"Invalid constant in '{self.text}'")
+        elif isinstance(node, ast.Name):
+            if node.id not in self.names:
+                self.names.append(node.id)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            self._check(node.operand)
+        elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE_OPERATORS for op in node.ops):
+            for child in [node.left] + node.comparators:
+                self._check(child)
+        elif isinstance(node, ast.IfExp):
+            for child in (node.test, node.body, node.orelse):
+                self._check(child)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Only calls of {', '.join(FUNCTIONS)} are allowed in '{self.text}'")
+            for arg in node.args:
+                self._check(arg)
+        elif isinstance(node, ast.Attribute):
+            if node.attr not in _PROBE_ATTRIBUTES:
+                raise ValueError(f"Unknown attribute '{node.attr}' in '{self.text}' "
+                                 f"(available: {', '.join(_PROBE_ATTRIBUTES)})")
+            self._check(node.value)
+        else:
+            raise ValueError(f"Unsupported syntax '{ast.dump(node)[:40]}' in '{self.text}'")
+
+    def evaluate(self, names: Dict[str, Any], convert: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Вычисление выражения.
+
+        Args:
+            names: Значения переменных
+            convert: Преобразование значений переменных (например, "12" -> 12)
+
+        Returns:
+            Значение выражения
+
+        Raises:
+            KeyError: Если переменная не задана (имя переменной)
+            ValueError: Если вычисление невозможно
+        """
+        def evaluate(node: ast.AST) -> Any:
+            if isinstance(node, ast.Constant):
+                return node.value
+            if isinstance(node, ast.Name):
+                if node.id not in names:
+                    raise KeyError(node.id)
+                value = names[node.id]
+                return convert(value) if convert else value
+            if isinstance(node, ast.BinOp):
+                return _BINARY_OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+            if isinstance(node, ast.UnaryOp):
+                return _UNARY_OPERATORS[type(node.op)](evaluate(node.operand))
+            if isinstance(node, ast.Compare):
+                left = evaluate(node.left)
+                for op, comparator in zip(node.ops, node.comparators):
+                    right = evaluate(comparator)
+                    if not _COMPARE_OPERATORS[type(op)](left, right):
+                        return False
+                    left = right
+                return True
+            if isinstance(node, ast.IfExp):
+                return evaluate(node.body) if evaluate(node.test) else evaluate(node.orelse)
+            if isinstance(node, ast.Call):
+                return FUNCTIONS[node.func.id](*[evaluate(arg) for arg in node.args])
+            if isinstance(node, ast.Attribute):
+                value = evaluate(node.value)
+                if not isinstance(value, ProbeFacts):
+                    raise ValueError(f"Attribute '{node.attr}' is only available on probe(...)")
+                return getattr(value, node.attr)
+            raise ValueError(f"Unsupported syntax in '{self.text}'")
+
+        try:
+            return evaluate(self._tree)
+        except (ValueError, FileNotFoundError, TypeError, ArithmeticError) as e:
+            raise ValueError(f"Cannot evaluate '{self.text}': {str(e)}")
@@ -25,24 +25,32 @@ def generate_example_config() -> Dict[str, Any]:
         
         # Генерируем примеры параметров на основе схемы
         for param_name, param_schema in schema["properties"].items():
+            # Параметр может допускать несколько типов, пример строим по первому
+            param_type = param_schema["type"]
+            if isinstance(param_type, list):
+                param_type = param_type[0]
+                
             if "default" in param_schema:
                 example_params[param_name] = param_schema["default"]
+            elif "enum" in param_schema:
+                example_params[param_name] = param_schema["enum"][0]
             else:
                 # Генерируем примеры значений в зависимости от типа
-                if param_schema["type"] == "string":
+                if param_type == "string":
                     if "format" in param_schema and param_schema["format"] == "file":
-                        example_params[param_name] = f"path/to/{module_name}_file.mp4"
+                        extension = {"image": "png", "font": "ttf"}.get(param_schema.get("media"), "mp4")
+                        example_params[param_name] = f"path/to/{module_name}_file.{extension}"
                     else:
                         example_params[param_name] = f"example_{param_name}"
-                elif param_schema["type"] == "number":
-                    example_params[param_name] = 1.0
-                elif param_schema["type"] == "integer":
-                    example_params[param_name] = 100
-                elif param_schema["type"] == "boolean":
+                elif param_type == "number":
+                    example_params[param_name] = param_schema.get("maximum", 1.0)
+                elif param_type == "integer":
+                    example_params[param_name] = min(100, param_schema.get("maximum", 100))
+                elif param_type == "boolean":
                     example_params[param_name] = False
-                elif param_schema["type"] == "array":
+                elif param_type == "array":
                     example_params[param_name] = []
-                elif param_schema["type"] == "object":
+                elif param_type == "object":
                     example_params[param_name] = {}
         
         # Добавляем модуль в конфигурацию
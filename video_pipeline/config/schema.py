@@ -1,13 +1,14 @@
 """
 Схема валидации YAML-конфигурации
 """
-import jsonschema
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
 # Базовая схема для валидации конфигурации
 CONFIG_SCHEMA = {
     "type": "object",
-    "required": ["input", "output", "modules"],
+    # input и output могут передаваться из командной строки или демона
+    "required": ["modules"],
     "properties": {
         "input": {
             "type": "string",
@@ -17,6 +18,22 @@ CONFIG_SCHEMA = {
             "type": "string",
             "description": "Путь к выходному видео"
         },
+        "work_dir": {
+            "type": "string",
+            "description": "Директория журналов запуска и промежуточных файлов"
+        },
+        "deadline": {
+            "type": ["string", "number"],
+            "description": "Бюджет времени обработки (например, 2h или 90m), по нему выбирается пресет x264"
+        },
+        "target_speed": {
+            "type": ["string", "number"],
+            "description": "Требуемая скорость относительно реального времени (например, 3x)"
+        },
+        "variables": {
+            "type": "object",
+            "description": "Значения по умолчанию переменных ${name} (переопределяются -D name=value)"
+        },
         "modules": {
             "type": "array",
             "items": {
@@ -37,6 +54,103 @@ CONFIG_SCHEMA = {
     }
 }
 
+# Схема графовой конфигурации с именованными потоками
+GRAPH_CONFIG_SCHEMA = {
+    "type": "object",
+    "required": ["stages"],
+    "properties": {
+        "inputs": {
+            "type": "object",
+            "description": "Именованные входные потоки (имя -> путь к видео)",
+            "additionalProperties": {
+                "type": "string"
+            }
+        },
+        "outputs": {
+            "type": "object",
+            "description": "Выходные файлы (имя потока -> путь к видео)",
+            "additionalProperties": {
+                "type": "string"
+            }
+        },
+        "variables": {
+            "type": "object",
+            "description": "Значения по умолчанию переменных ${name} (переопределяются -D name=value)"
+        },
+        "deadline": {
+            "type": ["string", "number"],
+            "description": "Бюджет времени обработки (например, 2h или 90m), по нему выбирается пресет x264"
+        },
+        "target_speed": {
+            "type": ["string", "number"],
+            "description": "Требуемая скорость относительно реального времени (например, 3x)"
+        },
+        "jobs": {
+            "type": "integer",
+            "minimum": 1,
+            "description": "Количество параллельно выполняемых этапов"
+        },
+        "stages": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Имя модуля"
+                    },
+                    "input": {
+                        "type": "string",
+                        "description": "Входной поток (по умолчанию - выход предыдущего этапа)"
+                    },
+                    "output": {
+                        "type": "string",
+                        "description": "Имя выходного потока этапа"
+                    },
+                    "streams": {
+                        "type": "object",
+                        "description": "Параметры модуля, заполняемые путями других потоков",
+                        "additionalProperties": {
+                            "type": ["string", "array"]
+                        }
+                    },
+                    "params": {
+                        "type": "object",
+                        "description": "Параметры модуля"
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Общие фрагменты схем модулей
+_POSITIONS_8 = ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"]
+_POSITIONS_CORNERS = ["center", "topleft", "topright", "bottomleft", "bottomright"]
+_POSITIONS_SIDES = ["center", "top", "bottom", "left", "right", "center_left", "center_right"]
+_POSITIONS_OVERLAY = _POSITIONS_SIDES + ["topleft", "topright", "bottomleft", "bottomright"]
+
+# Число секунд: число или строка с числом (например, результат ffprobe в shell-скрипте)
+_SECONDS = {
+    "type": ["number", "string"],
+    "pattern": "^\\s*[0-9]+(\\.[0-9]*)?\\s*$",
+    "minimum": 0.0
+}
+
+# Параметры-файлы помечаются "format": "file" и типом содержимого "media"
+# (video, image или font): перед запуском проверяется, что файлы существуют,
+# а видео и изображения читаются ffprobe
+
+# Список видеофайлов (или один файл); каждый проверяется перед запуском
+_CLIPS = {
+    "type": ["string", "array"],
+    "items": {"type": "string"},
+    "format": "file",
+    "media": "video"
+}
+
 # Схемы для конкретных модулей
 MODULE_SCHEMAS = {
     "resize": {
@@ -59,11 +173,13 @@ MODULE_SCHEMAS = {
         "type": "object",
         "properties": {
             "image_path": {
-                "type": "string"
+                "type": "string",
+                "format": "file",
+                "media": "image"
             },
             "position": {
                 "type": "string",
-                "enum": ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"]
+                "enum": _POSITIONS_CORNERS
             },
             "opacity": {
                 "type": "number",
@@ -72,7 +188,7 @@ MODULE_SCHEMAS = {
             },
             "scale": {
                 "type": "number",
-                "minimum": 0.1
+                "exclusiveMinimum": 0.0
             }
         },
         "required": ["image_path"]
@@ -86,7 +202,7 @@ MODULE_SCHEMAS = {
         "properties": {
             "position": {
                 "type": "string",
-                "enum": ["none", "center", "topleft", "topright", "bottomleft", "bottomright"]
+                "enum": ["none"] + _POSITIONS_CORNERS
             },
             "width": {
                 "type": "integer",
@@ -119,26 +235,29 @@ MODULE_SCHEMAS = {
             },
             "position": {
                 "type": "string",
-                "enum": ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"]
+                "enum": _POSITIONS_SIDES
             },
             "color": {
                 "type": "string"
             },
             "image_path": {
-                "type": "string"
+                "type": "string",
+                "format": "file",
+                "media": "image"
             }
-        },
-        "required": ["width", "height"]
+        }
     },
     "addvideo": {
         "type": "object",
         "properties": {
             "video_path": {
-                "type": "string"
+                "type": "string",
+                "format": "file",
+                "media": "video"
             },
             "position": {
                 "type": "string",
-                "enum": ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"]
+                "enum": _POSITIONS_OVERLAY
             },
             "x": {
                 "type": "integer"
@@ -156,7 +275,7 @@ MODULE_SCHEMAS = {
             },
             "scale": {
                 "type": "number",
-                "minimum": 0.1
+                "exclusiveMinimum": 0.0
             },
             "alpha": {
                 "type": "number",
@@ -176,6 +295,10 @@ MODULE_SCHEMAS = {
             },
             "mute": {
                 "type": "boolean"
+            },
+            "video_offset": {
+                "type": "number",
+                "minimum": 0.0
             }
         },
         "required": ["video_path"]
@@ -184,40 +307,45 @@ MODULE_SCHEMAS = {
         "type": "object",
         "properties": {
             "color": {
-                "type": "array",
-                "items": {
-                    "type": "string"
-                }
+                "type": "string",
+                "description": "Цвет фона: green, #RRGGBB или 0xRRGGBB"
             },
             "similarity": {
-                "type": "array",
-                "items": {
-                    "type": "number",
-                    "minimum": 0.0,
-                    "maximum": 1.0
-                }
+                "type": "number",
+                "minimum": 0.0,
+                "maximum": 1.0
             },
             "blend": {
-                "type": "array",
-                "items": {
-                    "type": "number",
-                    "minimum": 0.0,
-                    "maximum": 1.0
-                }
-            },
-            "yuv": {
-                "type": "boolean"
+                "type": "number",
+                "minimum": 0.0,
+                "maximum": 1.0
             },
             "overlay": {
-                "type": "string"
+                "type": "string",
+                "format": "file",
+                "media": "video"
             },
             "position": {
                 "type": "string",
-                "enum": ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"]
+                "enum": _POSITIONS_OVERLAY
+            },
+            "x": {
+                "type": "integer"
+            },
+            "y": {
+                "type": "integer"
+            },
+            "width": {
+                "type": "integer",
+                "minimum": 1
+            },
+            "height": {
+                "type": "integer",
+                "minimum": 1
             },
             "scale": {
                 "type": "number",
-                "minimum": 0.1
+                "exclusiveMinimum": 0.0
             },
             "mute_overlay": {
                 "type": "boolean"
@@ -230,7 +358,7 @@ MODULE_SCHEMAS = {
         "properties": {
             "duration": {
                 "type": "number",
-                "minimum": 0.1
+                "exclusiveMinimum": 0.0
             },
             "output_dir": {
                 "type": "string"
@@ -240,6 +368,40 @@ MODULE_SCHEMAS = {
             },
             "use_input_name": {
                 "type": "boolean"
+            },
+            "split_on": {
+                "type": "string",
+                "enum": ["duration", "scene"],
+                "description": "Равные части или разрез по сменам сцен без перекодирования"
+            },
+            "scene_threshold": {
+                "type": "number",
+                "minimum": 0.0,
+                "maximum": 1.0,
+                "description": "Минимальная оценка смены сцены"
+            },
+            "scene_tolerance": {
+                "type": "number",
+                "minimum": 0.0,
+                "description": "Допустимое отклонение точки разреза от duration в секундах"
+            },
+            "min_duration": {
+                "type": "number",
+                "minimum": 0.0,
+                "description": "Части короче этой длительности не создаются"
+            },
+            "merge_short_tail": {
+                "type": "boolean",
+                "description": "Присоединять короткую последнюю часть к предыдущей"
+            },
+            "overlap": {
+                "type": "number",
+                "minimum": 0.0,
+                "description": "Перекрытие соседних частей в секундах"
+            },
+            "manifest": {
+                "type": ["boolean", "string"],
+                "description": "Путь к JSON-манифесту частей (true - в output_dir)"
             }
         },
         "required": ["duration"],
@@ -247,7 +409,18 @@ MODULE_SCHEMAS = {
     },
     "utility.prepareforyt": {
         "type": "object",
-        "properties": {},
+        "properties": {
+            "output_mode": {
+                "type": "string",
+                "enum": ["faststart", "fragmented", "hls"],
+                "description": "Обычный MP4, фрагментированный MP4 или сегменты HLS с плейлистом"
+            },
+            "segment_duration": {
+                "type": "number",
+                "exclusiveMinimum": 0.0,
+                "description": "Длительность фрагмента или сегмента HLS в секундах"
+            }
+        },
         "description": "Модуль для подготовки видео к загрузке на YouTube"
     },
     "text_effects": {
@@ -259,6 +432,8 @@ MODULE_SCHEMAS = {
             },
             "font": {
                 "type": "string",
+                "format": "file",
+                "media": "font",
                 "description": "Путь к файлу шрифта (TTF)"
             },
             "font_size": {
@@ -272,7 +447,7 @@ MODULE_SCHEMAS = {
             },
             "position": {
                 "type": "string",
-                "enum": ["center", "top", "bottom", "left", "right", "topleft", "topright", "bottomleft", "bottomright"],
+                "enum": _POSITIONS_8,
                 "description": "Позиция текста"
             },
             "x": {
@@ -294,6 +469,11 @@ MODULE_SCHEMAS = {
                 "maximum": 10,
                 "description": "Интенсивность эффекта (1-10)"
             },
+            "amplitude": {
+                "type": "number",
+                "minimum": 0,
+                "description": "Амплитуда тряски или волны в пикселях (по умолчанию по интенсивности)"
+            },
             "start_time": {
                 "type": "number",
                 "minimum": 0,
@@ -324,18 +504,15 @@ MODULE_SCHEMAS = {
             },
             "module_params": {
                 "type": "object",
-                "description": "Параметры для вызываемого модуля",
-                "additionalProperties": {
-                    "type": ["string", "number", "boolean", "object", "array"]
-                }
+                "description": "Параметры для вызываемого модуля"
             },
             "custom_input": {
                 "type": "string",
-                "description": "Путь к входному видео (обязательный параметр)"
+                "description": "Путь к входному видео (по умолчанию - вход этапа)"
             },
             "custom_output": {
                 "type": "string",
-                "description": "Путь к выходному видео (обязательный параметр)"
+                "description": "Путь к выходному видео (по умолчанию - выход этапа)"
             },
             "copy_to_pipeline": {
                 "type": "boolean",
@@ -343,54 +520,256 @@ MODULE_SCHEMAS = {
                 "default": False
             }
         },
-        "required": ["module_name", "custom_input", "custom_output"],
+        "required": ["module_name"],
         "description": "Модуль для вызова других модулей напрямую, может работать изолированно от основного конвейера"
     },
     "cut_video": {
         "type": "object",
         "properties": {
-            "start": {
+            "start": dict(_SECONDS, description="Время начала фрагмента в секундах"),
+            "duration": dict(_SECONDS, description="Длительность фрагмента в секундах"),
+            "accurate": {
+                "type": "boolean",
+                "description": "Использовать точное обрезание (с перекодированием)"
+            }
+        },
+        "description": "Модуль для обрезки видео по времени (извлечения определенного фрагмента)"
+    },
+    "trim_dead_air": {
+        "type": "object",
+        "properties": {
+            "mode": {
+                "type": "string",
+                "enum": ["any", "all", "black", "silence", "none"],
+                "description": "Пустой участок: черное изображение или тишина, оба сразу, только изображение, только звук, ничего не удалять"
+            },
+            "min_duration": dict(_SECONDS, description="Минимальная длительность удаляемого участка в секундах"),
+            "padding": dict(_SECONDS, description="Сколько секунд пустого участка оставить рядом с содержимым"),
+            "black_threshold": {
                 "type": "number",
                 "minimum": 0.0,
-                "description": "Время начала фрагмента в секундах"
+                "maximum": 1.0,
+                "description": "Порог яркости черного пикселя"
             },
-            "duration": {
+            "silence_noise": {
                 "type": "number",
-                "minimum": 0.1,
-                "description": "Длительность фрагмента в секундах"
+                "maximum": 0.0,
+                "description": "Уровень тишины в дБ"
             },
             "accurate": {
                 "type": "boolean",
-                "description": "Использовать точное обрезание (с перекодированием)"
+                "description": "Точная обрезка с перекодированием"
             }
         },
-        "description": "Модуль для обрезки видео по времени (извлечения определенного фрагмента)"
+        "description": "Модуль для удаления черных и тихих участков в начале и в конце видео"
+    },
+    "concat": {
+        "type": "object",
+        "properties": {
+            "before": dict(_CLIPS, description="Клипы перед видео (интро)"),
+            "after": dict(_CLIPS, description="Клипы после видео (аутро)"),
+            "crf": {
+                "type": "integer",
+                "minimum": 0,
+                "maximum": 51,
+                "description": "Качество клипов, которые приводятся к параметрам видео"
+            },
+            "preset": {
+                "type": "string",
+                "description": "Пресет энкодера для клипов, которые приводятся к параметрам видео"
+            }
+        },
+        "description": "Модуль для склейки видео с заставками; без перекодирования, если параметры совпадают"
+    },
+    "stack": {
+        "type": "object",
+        "properties": {
+            "videos": dict(_CLIPS, description="Видео, которые раскладываются после входного видео этапа"),
+            "layout": {
+                "type": "string",
+                "enum": ["vertical", "horizontal", "grid", "custom"],
+                "description": "Раскладка"
+            },
+            "cells": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "x": {"type": "integer", "minimum": 0},
+                        "y": {"type": "integer", "minimum": 0},
+                        "width": {"type": "integer", "minimum": 2},
+                        "height": {"type": "integer", "minimum": 2}
+                    },
+                    "required": ["x", "y", "width", "height"]
+                },
+                "description": "Ячейки произвольной раскладки в порядке входов"
+            },
+            "columns": {
+                "type": "integer",
+                "minimum": 1,
+                "description": "Число столбцов сетки"
+            },
+            "width": {
+                "type": "integer",
+                "minimum": 2,
+                "description": "Ширина итогового кадра"
+            },
+            "height": {
+                "type": "integer",
+                "minimum": 2,
+                "description": "Высота итогового кадра"
+            },
+            "fit": {
+                "type": "string",
+                "enum": ["cover", "contain", "stretch"],
+                "description": "Вписывание видео в ячейку"
+            },
+            "color": {
+                "type": "string",
+                "description": "Цвет полей и незанятых областей"
+            },
+            "audio": {
+                "type": ["string", "integer"],
+                "description": "Звук: first, номер входа, mix или none"
+            },
+            "duration": {
+                "type": "string",
+                "enum": ["shortest", "longest", "first"],
+                "description": "Длительность результата"
+            },
+            "video_offset": {
+                "type": "number",
+                "minimum": 0.0,
+                "description": "Момент видео из videos, с которого они раскладываются"
+            }
+        },
+        "description": "Модуль для раскладки нескольких видео на одном кадре одним кодированием"
     }
 }
 
-def validate_config(config: Dict[str, Any]) -> None:
+# Скомпилированные валидаторы (ключ - имя схемы)
+_validators: Dict[str, Any] = {}
+_validators_lock = threading.Lock()
+
+def _normalize(name: str) -> str:
+    return name.strip().lower().replace('_', '').replace('-', '')
+
+# Схемы модулей по нормализованному имени (delete_audio и deleteaudio - один модуль)
+_SCHEMAS_BY_KEY = {_normalize(name): schema for name, schema in MODULE_SCHEMAS.items()}
+
+def get_module_schema(module_name: str) -> Optional[Dict[str, Any]]:
     """
-    Валидация конфигурации.
+    Получение схемы параметров модуля по имени из конфигурации.
+    
+    Args:
+        module_name: Имя модуля (регистр, "_" и "-" не учитываются)
+        
+    Returns:
+        Схема параметров или None, если схема не описана
+    """
+    key = _normalize(module_name)
+    return _SCHEMAS_BY_KEY.get(key) or _SCHEMAS_BY_KEY.get(f"utility.{key}")
+
+def get_validator(name: str, schema: Dict[str, Any]):
+    """
+    Получение скомпилированного валидатора схемы.
+    
+    Схема проверяется и компилируется один раз за процесс, повторные
+    вызовы возвращают готовый валидатор.
+    
+    Args:
+        name: Уникальное имя схемы
+        schema: Схема JSON Schema
+        
+    Returns:
+        Валидатор jsonschema
+    """
+    with _validators_lock:
+        validator = _validators.get(name)
+        if validator is None:
+            import jsonschema
+            
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = validator_class(schema)
+            _validators[name] = validator
+        return validator
+
+def _format_error(error) -> str:
+    path = ".".join(str(p) for p in error.absolute_path)
+    return f"{path}: {error.message}" if path else error.message
+
+def check_module_params(module_name: str, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Проверка параметров модуля по схеме.
+    
+    Args:
+        module_name: Имя модуля из конфигурации
+        params: Параметры модуля
+        
+    Returns:
+        Кортеж (ошибки, предупреждения). Неизвестные параметры считаются
+        предупреждениями: модули игнорируют их, но это часто опечатка.
+    """
+    schema = get_module_schema(module_name)
+    if schema is None:
+        return [], []
+    
+    validator = get_validator(f"module:{_normalize(module_name)}", schema)
+    errors = [_format_error(e) for e in sorted(validator.iter_errors(params), key=str)]
+    
+    known = schema.get("properties", {})
+    warnings = [f"unknown parameter '{name}'" for name in params if name not in known]
+    return errors, warnings
+
+def check_config(config: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Проверка всей конфигурации: основной схемы и параметров каждого модуля.
     
     Args:
         config: Словарь с конфигурацией
         
-    Raises:
-        jsonschema.exceptions.ValidationError: Если конфигурация не соответствует схеме
+    Returns:
+        Кортеж (ошибки, предупреждения)
     """
-    # Валидация основной схемы
-    jsonschema.validate(config, CONFIG_SCHEMA)
+    if not isinstance(config, dict):
+        return ["configuration must be a mapping"], []
     
-    # Валидация параметров каждого модуля
-    for module_config in config.get("modules", []):
+    if "stages" in config:
+        validator = get_validator("graph_config", GRAPH_CONFIG_SCHEMA)
+    else:
+        validator = get_validator("config", CONFIG_SCHEMA)
+    
+    errors = [_format_error(e) for e in validator.iter_errors(config)]
+    warnings = []
+    if errors:
+        return errors, warnings
+    
+    for i, module_config in enumerate(config.get("modules", config.get("stages", []))):
         module_name = module_config.get("name")
-        module_params = module_config.get("params", {})
+        params = dict(module_config.get("params") or {})
+        # Параметры из streams заполняются путями потоков при выполнении
+        for param in module_config.get("streams", {}):
+            params.setdefault(param, "")
         
-        if module_name in MODULE_SCHEMAS:
-            try:
-                jsonschema.validate(module_params, MODULE_SCHEMAS[module_name])
-            except jsonschema.exceptions.ValidationError as e:
-                raise jsonschema.exceptions.ValidationError(
-                    f"Ошибка валидации параметров модуля '{module_name}': {str(e)}")
+        module_errors, module_warnings = check_module_params(module_name, params)
+        errors.extend(f"stage {i + 1} ({module_name}): {e}" for e in module_errors)
+        warnings.extend(f"stage {i + 1} ({module_name}): {w}" for w in module_warnings)
+    
+    return errors, warnings
+
+def validate_config(config: Dict[str, Any]) -> None:
+    """
+    Валидация конфигурации.
+    
+    Args:
+        config: Словарь с конфигурацией
+        
+    Raises:
+        ValueError: Если конфигурация не соответствует схеме
+    """
+    errors, _ = check_config(config)
+    if errors:
+        raise ValueError("Invalid configuration:\n" + "\n".join(f"  - {e}" for e in errors))
                     
-    return True 
\ No newline at end of file
+    return True
@@ -0,0 +1,302 @@
+"""
+Шаблоны конфигураций с переменными ${name} и выражениями ${probe(name).duration}
+"""
+import os
+import re
+import csv
+import copy
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from video_pipeline.config.expressions import Expression
+
+# ${name}, ${name:-значение по умолчанию} или ${выражение}; $$ - символ $
+_TOKEN_RE = re.compile(r"\$\$|\$\{([^}]*)\}")
+_PLACEHOLDER_RE = re.compile(r"\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?::-(.*))?", re.DOTALL)
+_NUMBER_RE = re.compile(r"[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?")
+
+# Путь к значению внутри конфигурации: ключи словарей и индексы списков
+_Path = Tuple[Union[str, int], ...]
+
+class _Placeholder:
+    """
+    Подстановка одной переменной или выражения.
+    """
+
+    def __init__(self, name: str, default: Optional[str], expression: Optional[Expression] = None):
+        self.name = name
+        self.default = default
+        self.expression = expression
+
+    @property
+    def names(self) -> List[str]:
+        return self.expression.names if self.expression else [self.name]
+
+    def value(self, variables: Dict[str, Any], missing: List[str]) -> Any:
+        if self.expression is not None:
+            try:
+                return self.expression.evaluate(variables, convert=_convert)
+            except KeyError as e:
+                missing.append(e.args[0])
+                return ""
+        if self.name in variables:
+            return variables[self.name]
+        if self.default is not None:
+            return self.default
+        missing.append(self.name)
+        return ""
+
+def _convert(value: Any) -> Any:
+    """
+    Значение переменной, занимающей всю строку, получает тип по содержимому:
+    "12.5" -> 12.5, "true" -> True. Значения не-строки (из YAML-манифеста)
+    не меняются.
+    """
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    if _NUMBER_RE.fullmatch(text):
+        return float(text) if any(c in text for c in ".eE") else int(text)
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    return value
+
+def _compile_string(text: str) -> Optional[List[Union[str, _Placeholder]]]:
+    """
+    Разбор строки на литералы и подстановки.
+
+    Returns:
+        Список частей или None, если подстановок в строке нет
+
+    Raises:
+        ValueError: Если подстановка записана неверно
+    """
+    if "$" not in text:
+        return None
+    parts: List[Union[str, _Placeholder]] = []
+    position = 0
+    has_placeholders = False
+    for match in _TOKEN_RE.finditer(text):
+        parts.append(text[position:match.start()])
+        position = match.end()
+        if match.group(0) == "$$":
+            parts.append("$")
+            continue
+        placeholder = _PLACEHOLDER_RE.fullmatch(match.group(1))
+        if placeholder:
+            parts.append(_Placeholder(placeholder.group(1), placeholder.group(2)))
+        else:
+            # Выражение разбирается и проверяется один раз, при загрузке шаблона
+            parts.append(_Placeholder(match.group(1), None, Expression(match.group(1))))
+        has_placeholders = True
+    parts.append(text[position:])
+    if not has_placeholders and "$$" not in text:
+        return None
+    return [part for part in parts if part != ""]
+
+class ConfigTemplate:
+    """
+    Конфигурация с переменными, разобранная один раз.
+
+    Строковые значения могут содержать ``${name}``, ``${name:-default}`` и
+    выражения над переменными и данными ffprobe, например
+    ``${probe(footage).duration}`` или ``${even(probe(input).width / 2)}``
+    (см. config.expressions); значения по умолчанию также задаются в
+    разделе ``variables`` конфигурации. При создании шаблона YAML
+    разбирается и все подстановки и выражения компилируются заранее,
+    поэтому ``render`` для каждого задания только копирует словарь и
+    вычисляет значения.
+    """
+
+    def __init__(self, data: Any):
+        """
+        Компиляция шаблона.
+
+        Args:
+            data: Разобранная YAML-конфигурация
+
+        Raises:
+            ValueError: Если подстановка записана неверно
+        """
+        self.data = data
+        self.defaults: Dict[str, Any] = {}
+        if isinstance(data, dict) and isinstance(data.get("variables"), dict):
+            self.defaults = dict(data["variables"])
+        self._slots: List[Tuple[_Path, List[Union[str, _Placeholder]]]] = []
+        self._collect(data, ())
+
+    def _collect(self, node: Any, path: _Path):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                # Раздел variables содержит значения по умолчанию и не подставляется
+                if path == () and key == "variables":
+                    continue
+                self._collect(value, path + (key,))
+        elif isinstance(node, list):
+            for index, value in enumerate(node):
+                self._collect(value, path + (index,))
+        elif isinstance(node, str):
+            parts = _compile_string(node)
+            if parts is not None:
+                self._slots.append((path, parts))
+
+    @property
+    def variables(self) -> List[str]:
+        """
+        Имена переменных, используемых в шаблоне.
+        """
+        names = []
+        for _, parts in self._slots:
+            for part in parts:
+                if isinstance(part, _Placeholder):
+                    names.extend(name for name in part.names if name not in names)
+        return names
+
+    def render(self, variables: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Подстановка значений переменных.
+
+        Args:
+            variables: Значения переменных (дополняют и переопределяют раздел variables)
+
+        Returns:
+            Новая конфигурация
+
+        Raises:
+            ValueError: Если значение переменной не задано или выражение не вычисляется
+        """
+        if not self._slots:
+            return copy.deepcopy(self.data)
+
+        values = dict(self.defaults)
+        values.update(variables or {})
+        # Входы, заданные в конфигурации без переменных, доступны выражениям:
+        # ${probe(input).width} для линейной конфигурации, ${probe(main)...} для графа
+        if isinstance(self.data, dict):
+            literal = {"input": self.data.get("input")}
+            if isinstance(self.data.get("inputs"), dict):
+                literal.update(self.data["inputs"])
+            for name, path in literal.items():
+                if isinstance(path, str) and "$" not in path:
+                    values.setdefault(name, path)
+        missing: List[str] = []
+        config = copy.deepcopy(self.data)
+        for path, parts in self._slots:
+            if len(parts) == 1 and isinstance(parts[0], _Placeholder):
+                value = _convert(parts[0].value(values, missing))
+            else:
+                value = "".join(str(p.value(values, missing)) if isinstance(p, _Placeholder) else p
+                                for p in parts)
+            target = config
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+
+        if missing:
+            names = ", ".join(sorted(set(missing)))
+            raise ValueError(f"Undefined configuration variables: {names} (pass them with -D name=value)")
+        return config
+
+# Скомпилированные шаблоны: путь -> (mtime, размер, шаблон)
+_templates: Dict[str, Tuple[float, int, ConfigTemplate]] = {}
+_templates_lock = threading.Lock()
+
+def load_template(config_path: str) -> ConfigTemplate:
+    """
+    Загрузка шаблона конфигурации из YAML-файла.
+
+    Файл разбирается и компилируется один раз за процесс; повторные вызовы
+    (например, для каждого задания пакета) возвращают готовый шаблон, пока
+    файл не изменится.
+
+    Args:
+        config_path: Путь к YAML-файлу
+
+    Returns:
+        Шаблон конфигурации
+
+    Raises:
+        FileNotFoundError: Если файл не найден
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        template = ConfigTemplate(yaml.safe_load(f))
+    with _templates_lock:
+        _templates[path] = (stat.st_mtime, stat.st_size, template)
+    return template
+
+def parse_variables(items: Optional[List[str]]) -> Dict[str, str]:
+    """
+    Разбор переменных командной строки вида ``name=value``.
+
+    Args:
+        items: Значения аргументов -D
+
+    Returns:
+        Словарь имя -> значение
+
+    Raises:
+        ValueError: Если аргумент записан неверно
+    """
+    variables = {}
+    for item in items or []:
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+            raise ValueError(f"Invalid variable '{item}', expected name=value")
+        variables[name] = value
+    return variables
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Загрузка манифеста заданий пакетной обработки.
+
+    Манифест - CSV с заголовком, JSON или YAML со списком заданий. Каждое
+    задание содержит input, необязательный output и любые переменные
+    шаблона конфигурации (input и output тоже доступны как переменные).
+
+    Args:
+        path: Путь к манифесту (.csv, .json, .yaml или .yml)
+
+    Returns:
+        Список заданий
+
+    Raises:
+        FileNotFoundError: Если файл не найден
+        ValueError: Если манифест имеет неверный формат
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Manifest not found: {path}")
+
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if extension == ".csv":
+            # Пустая ячейка - значение не задано (действует значение по умолчанию)
+            jobs: Any = [{k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+                         for row in csv.DictReader(f)]
+        elif extension == ".json":
+            jobs = json.load(f)
+        else:
+            import yaml
+
+            jobs = yaml.safe_load(f) or []
+    if isinstance(jobs, dict):
+        jobs = jobs.get("jobs", [])
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError(f"Manifest must be a list of jobs: {path}")
+    for i, job in enumerate(jobs):
+        if not job.get("input"):
+            raise ValueError(f"Manifest {path}: job {i + 1} has no input")
+    return jobs
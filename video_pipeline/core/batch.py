@@ -0,0 +1,195 @@
+"""
+Batch processing with a shared time budget
+"""
+import os
+import time
+import fnmatch
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from video_pipeline.config.template import load_manifest, load_template
+from video_pipeline.core.context import run_context
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.core.deadline import EncodePlan, SpeedModel, job_cost, parse_duration, parse_speed, plan_jobs
+from video_pipeline.core.pipeline import Pipeline
+from video_pipeline.core.tune import encoder_context, host_layout
+from video_pipeline.utils.probe import probe_many, media_duration
+
+logger = logging.getLogger(__name__)
+
+def collect_jobs(inputs: List[str], output_dir: str, pattern: str = "*.mp4") -> List[Tuple[str, str]]:
+    """
+    Expand inputs into (input, output) pairs.
+
+    Files from a directory keep their relative path inside the output directory.
+
+    Args:
+        inputs: Input videos and directories (searched recursively)
+        output_dir: Directory for processed videos (skipped when inside an input directory)
+        pattern: Glob pattern of input files inside directories
+
+    Returns:
+        List of (input path, output path)
+    """
+    output_dir = os.path.abspath(output_dir)
+    jobs = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if os.path.join(os.path.abspath(root), d) != output_dir)
+                for name in sorted(files):
+                    if fnmatch.fnmatch(name, pattern):
+                        input_path = os.path.join(root, name)
+                        relative = os.path.relpath(input_path, path)
+                        jobs.append((input_path, os.path.join(output_dir, relative)))
+        elif os.path.isfile(path):
+            jobs.append((path, os.path.join(output_dir, os.path.basename(path))))
+        else:
+            logger.warning(f"Input not found: {path}")
+    return jobs
+
+class Batch:
+    """
+    Processes a set of videos with one configuration.
+
+    Before anything is encoded, every input is probed and its cost is
+    estimated from duration, resolution and the stages of the configuration.
+    With a deadline or target speed the x264 preset and lookahead are chosen
+    per job, so that the batch finishes on time and uses slower presets
+    (smaller files) when there is slack.
+
+    Jobs from a manifest carry their own ${name} variables; the configuration
+    template is parsed once and rendered for every job.
+    """
+
+    def __init__(self, config_path: str, inputs: List[str], output_dir: str,
+                 workers: Optional[int] = None, deadline: Optional[str] = None,
+                 target_speed: Optional[str] = None, pattern: str = "*.mp4",
+                 resume: bool = False, variables: Optional[Dict[str, Any]] = None,
+                 manifest: Optional[str] = None):
+        """
+        Initialize the batch.
+
+        Args:
+            config_path: Path to the YAML configuration file
+            inputs: Input videos and directories (searched recursively)
+            output_dir: Directory for processed videos
+            workers: Number of jobs processed in parallel (default: host profile
+                of ``video-pipeline tune``, otherwise 2)
+            deadline: Time budget of the whole batch, e.g. "2h" (overrides configuration)
+            target_speed: Required speed of every job, e.g. "3x" (overrides configuration)
+            pattern: Glob pattern of input files inside directories
+            resume: Continue interrupted jobs from their last completed stage
+            variables: Values of ${name} variables for all jobs
+            manifest: CSV/JSON/YAML list of jobs (input, optional output and
+                per-job variables), in addition to inputs
+        """
+        self.output_dir = os.path.abspath(output_dir)
+        # Число заданий и потоки энкодера из профиля машины (video-pipeline tune)
+        self.workers, self._layout_options = host_layout(workers, 2, config_path)
+        self.pattern = pattern
+        self.resume = resume
+
+        variables = variables or {}
+        self.jobs = collect_jobs(inputs, self.output_dir, self.pattern)
+        job_variables = [{"input": i, "output": o, **variables} for i, o in self.jobs]
+        for job in load_manifest(manifest) if manifest else []:
+            output_path = job.get("output") or os.path.join(self.output_dir, os.path.basename(job["input"]))
+            self.jobs.append((job["input"], output_path))
+            job_variables.append({**variables, **job, "output": output_path})
+
+        # Конфигурация с переменными создается для каждого задания из одного
+        # разобранного шаблона; без переменных все задания делят один конвейер
+        self._pipelines: Dict[Tuple[str, str], Pipeline] = {}
+        if load_template(config_path).variables:
+            for job, values in zip(self.jobs, job_variables):
+                self._pipelines[job] = Pipeline(config_path, variables=values)
+        self.pipeline = next(iter(self._pipelines.values()), None) or Pipeline(config_path, variables=variables)
+        self.deadline = parse_duration(deadline or self.pipeline.config.get('deadline'))
+        self.target_speed = parse_speed(target_speed or self.pipeline.config.get('target_speed'))
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def plan(self) -> List[Tuple[str, str, EncodePlan]]:
+        """
+        Probe inputs and choose encoder settings for every job.
+
+        Returns:
+            List of (input, output, plan); inputs that cannot be read are skipped
+        """
+        probes, errors = probe_many(input_path for input_path, _ in self.jobs)
+        for path, error in errors.items():
+            logger.error(f"Skipping {path}: {error}")
+
+        jobs = [(i, o) for i, o in self.jobs if i in probes]
+        costs = [(job_cost(self._pipeline(i, o).config, [probes[i]]), media_duration(probes[i])) for i, o in jobs]
+        plans = plan_jobs(costs, deadline=self.deadline, target_speed=self.target_speed, workers=self.workers)
+        return [(i, o, plan) for (i, o), plan in zip(jobs, plans)]
+
+    def _pipeline(self, input_path: str, output_path: str) -> Pipeline:
+        return self._pipelines.get((input_path, output_path), self.pipeline)
+
+    def _process(self, input_path: str, output_path: str, plan: EncodePlan):
+        with self._pending_lock:
+            self._pending -= 1
+            METRICS.set_queue_depth(self._pending)
+        pipeline = self._pipeline(input_path, output_path)
+        pipeline.load()
+        # Пресет плана применяется только при заданном ограничении времени;
+        # без него задания кодируются с настройками модулей, как в process
+        limited = bool(self.deadline or self.target_speed)
+        start_time = time.monotonic()
+        if limited:
+            context = run_context(encoder_options={**self._layout_options, **plan.options})
+        else:
+            context = encoder_context(self._layout_options)
+        with context:
+            pipeline.process(input_path, output_path, resume=self.resume)
+        # Продолженный запуск пропускает этапы и исказил бы оценку скорости
+        if limited and not self.resume:
+            SpeedModel.observe(plan, time.monotonic() - start_time)
+
+    def run(self) -> Tuple[int, int]:
+        """
+        Process all jobs.
+
+        Returns:
+            Tuple (completed jobs, failed jobs)
+        """
+        planned = self.plan()
+        if not planned:
+            logger.warning("No input videos to process")
+            return 0, 0
+
+        estimate = max(max(p.estimated_seconds for _, _, p in planned),
+                       sum(p.estimated_seconds for _, _, p in planned) / self.workers)
+        logger.info(f"Batch of {len(planned)} jobs on {self.workers} workers, estimated time {estimate:.0f}s"
+                    + (f", deadline {self.deadline:.0f}s" if self.deadline else ""))
+        for input_path, _, plan in planned:
+            logger.info(f"  {input_path}: preset {plan.preset}, estimated {plan.estimated_seconds:.0f}s")
+
+        self.pipeline.load()
+        completed, failed = 0, 0
+        start_time = time.monotonic()
+
+        # Длинные задания запускаются первыми, чтобы не остаться в хвосте партии
+        planned.sort(key=lambda job: job[2].estimated_seconds, reverse=True)
+        self._pending = len(planned)
+        METRICS.set_queue_depth(self._pending)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._process, i, o, plan): i for i, o, plan in planned}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    completed += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Job failed: {futures[future]}: {str(e)}")
+
+        elapsed = time.monotonic() - start_time
+        logger.info(f"Batch finished in {elapsed:.0f}s: {completed} completed, {failed} failed")
+        if self.deadline and elapsed > self.deadline:
+            logger.warning(f"Deadline of {self.deadline:.0f}s exceeded by {elapsed - self.deadline:.0f}s")
+        return completed, failed
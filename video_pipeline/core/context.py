@@ -0,0 +1,78 @@
+"""
+Per-run context shared between the pipeline and its modules
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Optional
+
+class RunCancelled(Exception):
+    """
+    The run was cancelled through RunContext.cancel.
+    """
+
+@dataclass(frozen=True)
+class RunContext:
+    """
+    State of the current pipeline run visible to modules.
+
+    Modules keep the ``process(input_path, output_path)`` interface; anything
+    a run needs to pass them on top of that lives here.
+
+    Attributes:
+        checkpoint: Checkpoint of the current stage (see core.journal.StageCheckpoint)
+        stage_index: Index of the stage being executed
+        encoder_options: x264 options overriding module defaults
+            (e.g. {"preset": "slow", "rc-lookahead": "50"}), applied by run_ffmpeg
+        progress: Reporter of the current stage (see core.progress.ProgressTracker.stage);
+            run_ffmpeg feeds it the ``-progress`` reports of every FFmpeg command
+        layout_options: x264 options of the host profile (e.g. {"threads": "4"});
+            Pipeline merges them under the options it runs with, so they do not
+            disable the deadline planner
+        cancel: Event that aborts the run; run_ffmpeg terminates the running
+            FFmpeg command and raises RunCancelled once it is set
+    """
+    checkpoint: Optional[Any] = None
+    stage_index: Optional[int] = None
+    encoder_options: Optional[Dict[str, str]] = None
+    progress: Optional[Callable[[Any], None]] = None
+    layout_options: Optional[Dict[str, str]] = None
+    cancel: Optional[threading.Event] = None
+
+_current = ContextVar("video_pipeline_run_context", default=RunContext())
+
+def current_context() -> RunContext:
+    """
+    Get the context of the current run.
+
+    Returns:
+        Current run context (empty outside of a pipeline run)
+    """
+    return _current.get()
+
+def raise_if_cancelled():
+    """
+    Raise RunCancelled if the cancel event of the current run is set.
+    """
+    cancel = _current.get().cancel
+    if cancel is not None and cancel.is_set():
+        raise RunCancelled("Run cancelled")
+
+@contextmanager
+def run_context(**changes):
+    """
+    Temporarily extend the current context.
+
+    Args:
+        **changes: Context fields to override
+
+    Yields:
+        New context
+    """
+    context = replace(_current.get(), **changes)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
@@ -0,0 +1,151 @@
+"""
+Watch-folder daemon: detects new inputs and processes them with a warm worker pool
+"""
+import os
+import signal
+import logging
+import threading
+from typing import Optional
+
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.core.pipeline import Pipeline
+from video_pipeline.core.queue import JobQueue, RUNNING, FAILED
+from video_pipeline.core.tune import encoder_context, host_layout
+from video_pipeline.core.watcher import FolderWatcher
+
+logger = logging.getLogger(__name__)
+
+class Daemon:
+    """
+    Long-running service that watches a directory and processes new videos.
+
+    The configuration is parsed and modules are loaded once, FFmpeg is
+    checked once; jobs are taken from a persistent SQLite queue by worker
+    threads, so every file is processed without interpreter startup.
+    """
+
+    def __init__(self, watch_dir: str, config_path: str, output_dir: str,
+                 workers: Optional[int] = None, queue_db: Optional[str] = None,
+                 pattern: str = "*.mp4", stable_seconds: float = 5.0,
+                 use_inotify: bool = True, retry_failed: bool = False):
+        """
+        Initialize the daemon.
+
+        Args:
+            watch_dir: Directory with input videos
+            config_path: Path to the YAML configuration file
+            output_dir: Directory for processed videos
+            workers: Number of worker threads (default: host profile, otherwise 2)
+            queue_db: Path to the queue database (default: in output directory)
+            pattern: Glob pattern of input file names
+            stable_seconds: Time during which an input must not change before processing
+            use_inotify: Use inotify if available
+            retry_failed: Requeue jobs that failed in previous runs
+        """
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        # Число заданий и потоки энкодера из профиля машины (video-pipeline tune)
+        self.workers, self._layout_options = host_layout(workers, 2, config_path)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.pipeline = Pipeline(config_path)
+        self.pipeline.load()
+
+        self.queue = JobQueue(queue_db or os.path.join(self.output_dir, ".video_pipeline_queue.db"))
+        interrupted = self.queue.requeue(RUNNING)
+        if interrupted:
+            logger.warning(f"Requeued {interrupted} jobs interrupted by previous shutdown")
+        if retry_failed:
+            logger.info(f"Requeued {self.queue.requeue(FAILED)} failed jobs")
+
+        self.watcher = FolderWatcher(
+            self.watch_dir,
+            pattern=pattern,
+            stable_seconds=stable_seconds,
+            use_inotify=use_inotify,
+            exclude_dirs=[self.output_dir]
+        )
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def _output_path(self, input_path: str) -> str:
+        """
+        Build the output path, keeping the input's position in the watched tree.
+
+        Args:
+            input_path: Path to input video
+
+        Returns:
+            Path to output video
+        """
+        relative = os.path.relpath(os.path.abspath(input_path), self.watch_dir)
+        return os.path.join(self.output_dir, relative)
+
+    def _worker(self, number: int):
+        """
+        Worker loop: take jobs from the queue until the daemon is stopped.
+        """
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self._wakeup.wait(timeout=5.0)
+                self._wakeup.clear()
+                continue
+            METRICS.set_queue_depth(self.queue.counts()['pending'])
+
+            logger.info(f"[worker {number}] Job {job['id']}: {job['input_path']} -> {job['output_path']}")
+            try:
+                # Повторная попытка продолжает прерванный запуск с последнего этапа
+                with encoder_context(self._layout_options):
+                    self.pipeline.process(job['input_path'], job['output_path'], resume=True)
+                self.queue.complete(job['id'])
+                logger.info(f"[worker {number}] Job {job['id']} completed")
+            except Exception as e:
+                self.queue.fail(job['id'], str(e))
+                logger.error(f"[worker {number}] Job {job['id']} failed: {str(e)}", exc_info=True)
+
+    def stop(self, *args):
+        """
+        Request a graceful shutdown: running jobs are finished first.
+        """
+        logger.warning("Stopping daemon, waiting for running jobs...")
+        self._stop.set()
+        self._wakeup.set()
+
+    def run(self):
+        """
+        Run the daemon until SIGINT/SIGTERM.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        counts = self.queue.counts()
+        METRICS.set_queue_depth(counts['pending'])
+        logger.warning(
+            f"Watching {self.watch_dir} with {self.workers} workers "
+            f"(pending: {counts['pending']}, done: {counts['done']}, failed: {counts['failed']})"
+        )
+
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(number + 1,), name=f"worker-{number + 1}")
+            thread.start()
+            self._threads.append(thread)
+
+        try:
+            while not self._stop.is_set():
+                for path in self.watcher.poll(timeout=1.0):
+                    if self.queue.add(path, self._output_path(path)):
+                        logger.info(f"Queued new input: {path}")
+                        METRICS.set_queue_depth(self.queue.counts()['pending'])
+                        self._wakeup.set()
+        finally:
+            self._stop.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join()
+            self.watcher.close()
+            self.queue.close()
@@ -0,0 +1,276 @@
+"""
+Deadline-aware selection of x264 presets
+"""
+import os
+import re
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from video_pipeline.modules.registry import get_module_class
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+from video_pipeline.utils.probe import media_duration, video_stream, frame_rate
+
+logger = logging.getLogger(__name__)
+
+# Пресеты x264 от быстрого к медленному: относительное время кодирования
+# (medium = 1.0) и rc-lookahead, с которым пресет используется
+PRESETS: List[Tuple[str, float, int]] = [
+    ("ultrafast", 0.12, 0),
+    ("superfast", 0.2, 0),
+    ("veryfast", 0.35, 10),
+    ("faster", 0.55, 20),
+    ("fast", 0.7, 30),
+    ("medium", 1.0, 40),
+    ("slow", 1.7, 50),
+    ("slower", 3.0, 60),
+    ("veryslow", 6.0, 60),
+]
+PRESET_NAMES = [name for name, _, _ in PRESETS]
+
+DEFAULT_PRESET = "fast"
+# Самый медленный пресет, который выбирается при наличии запаса времени
+SLOWEST_PRESET = "slower"
+
+# Начальная оценка скорости кодирования на пресете medium (пикселей в секунду),
+# примерно 1080p30 в реальном времени; уточняется по фактическим запускам
+DEFAULT_THROUGHPUT = 1920 * 1080 * 30.0
+
+_SPEED_FILE = "encode_speed.json"
+_speed_lock = threading.Lock()
+
+def parse_duration(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Parse a duration such as ``2h``, ``1h30m``, ``90m``, ``45s`` or a number of seconds.
+
+    Args:
+        value: Duration from configuration or command line
+
+    Returns:
+        Seconds or None if the value is empty
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().lower()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    match = re.fullmatch(r"(?:(\d+(?:\.\d+)?)h)?\s*(?:(\d+(?:\.\d+)?)m)?\s*(?:(\d+(?:\.\d+)?)s)?", text)
+    if not match or not any(match.groups()):
+        raise ValueError(f"Invalid duration: {value}")
+    hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+def parse_speed(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Parse a speed factor such as ``3x`` or ``0.5``.
+
+    Args:
+        value: Speed from configuration or command line
+
+    Returns:
+        Speed factor relative to real time or None if the value is empty
+
+    Raises:
+        ValueError: If the value cannot be parsed or is not positive
+    """
+    if value is None or value == "":
+        return None
+    try:
+        speed = float(str(value).strip().lower().rstrip("x"))
+    except ValueError:
+        raise ValueError(f"Invalid speed: {value}")
+    if speed <= 0:
+        raise ValueError(f"Speed must be positive: {value}")
+    return speed
+
+@dataclass(frozen=True)
+class EncodePlan:
+    """
+    Encoder settings chosen for one job.
+
+    Attributes:
+        preset: x264 preset
+        lookahead: rc-lookahead in frames
+        cost: Estimated job cost (pixels to encode, weighted by stage)
+        estimated_seconds: Estimated encoding time
+    """
+    preset: str
+    lookahead: int
+    cost: float
+    estimated_seconds: float
+
+    @property
+    def options(self) -> Dict[str, str]:
+        """
+        x264 options for the run context (see utils.ffmpeg.run_ffmpeg).
+        """
+        return {"preset": self.preset, "rc-lookahead": str(self.lookahead)}
+
+def _stages(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return config.get("stages") or config.get("modules") or []
+
+def job_cost(config: Dict[str, Any], infos: List[Dict[str, Any]]) -> float:
+    """
+    Estimate the cost of processing an input with a configuration.
+
+    The cost is the number of pixels every re-encoding stage has to encode
+    (duration x resolution x frame rate of the input), weighted by the
+    module's ``encode_cost``. Stream-copy stages cost nothing.
+
+    Args:
+        config: Pipeline configuration
+        infos: Probe results of the input videos
+
+    Returns:
+        Cost in weighted pixels
+    """
+    pixels = 0.0
+    for info in infos:
+        stream = video_stream(info) or {}
+        duration = media_duration(info) or 0.0
+        size = (stream.get("width") or 1920) * (stream.get("height") or 1080)
+        pixels = max(pixels, duration * size * (frame_rate(stream) or 30.0))
+
+    weight = 0.0
+    for stage in _stages(config):
+        params = stage.get("params") or {}
+        try:
+            module_class = get_module_class(stage.get("name", ""))
+        except (ImportError, AttributeError):
+            continue
+        _, encoders = module_class.ffmpeg_requirements(params)
+        if "libx264" in encoders:
+            weight += module_class.encode_cost
+    return pixels * weight
+
+def _preset_factor(preset: str) -> float:
+    return PRESETS[PRESET_NAMES.index(preset)][1]
+
+def _plan(preset: str, cost: float, throughput: float) -> EncodePlan:
+    _, factor, lookahead = PRESETS[PRESET_NAMES.index(preset)]
+    return EncodePlan(preset, lookahead, cost, cost * factor / throughput)
+
+def plan_jobs(jobs: List[Tuple[float, Optional[float]]], deadline: Optional[float] = None,
+              target_speed: Optional[float] = None, workers: int = 1,
+              throughput: Optional[float] = None) -> List[EncodePlan]:
+    """
+    Choose a preset for every job of a batch.
+
+    With ``target_speed`` each job gets the slowest preset that still encodes
+    faster than ``duration / target_speed``. With ``deadline`` all jobs start
+    at the slowest preset and the job that takes longest is moved to a
+    faster preset until the batch (spread over ``workers``) fits into the
+    deadline. Without limits every job uses the default preset.
+
+    Args:
+        jobs: (cost, duration in seconds) of each job
+        deadline: Time budget of the whole batch in seconds
+        target_speed: Required encoding speed relative to real time
+        workers: Number of jobs processed in parallel
+        throughput: Encoding speed on preset medium (weighted pixels per second)
+
+    Returns:
+        Plans in the order of jobs
+    """
+    throughput = throughput or SpeedModel.load().throughput
+    slowest = PRESET_NAMES.index(SLOWEST_PRESET)
+
+    if deadline is None and target_speed is None:
+        return [_plan(DEFAULT_PRESET, cost, throughput) for cost, _ in jobs]
+
+    levels = []
+    for cost, duration in jobs:
+        level = slowest
+        if target_speed is not None and duration:
+            budget = duration / target_speed
+            while level > 0 and cost * PRESETS[level][1] / throughput > budget:
+                level -= 1
+        levels.append(level)
+
+    if deadline is not None and jobs:
+        def job_time(i):
+            return jobs[i][0] * PRESETS[levels[i]][1] / throughput
+
+        # Время партии: не меньше самого долгого задания и общего времени на всех воркерах
+        def batch_time():
+            times = [job_time(i) for i in range(len(jobs))]
+            return max(max(times), sum(times) / max(1, workers))
+
+        while batch_time() > deadline:
+            candidates = [i for i in range(len(jobs)) if levels[i] > 0]
+            if not candidates:
+                logger.warning(f"Deadline of {deadline:.0f}s cannot be met even with preset {PRESET_NAMES[0]}: "
+                               f"estimated {batch_time():.0f}s")
+                break
+            longest = max(candidates, key=job_time)
+            levels[longest] -= 1
+
+    return [_plan(PRESET_NAMES[level], cost, throughput) for level, (cost, _) in zip(levels, jobs)]
+
+class SpeedModel:
+    """
+    Measured encoding speed of this machine.
+
+    Stored in the cache directory and updated after every planned job with
+    an exponential moving average, so estimates follow the actual hardware.
+    """
+
+    # Вес нового измерения в скользящем среднем
+    SMOOTHING = 0.3
+
+    def __init__(self, throughput: float = DEFAULT_THROUGHPUT, samples: int = 0):
+        self.throughput = throughput
+        self.samples = samples
+
+    @staticmethod
+    def _path() -> Optional[str]:
+        try:
+            return os.path.join(get_cache_dir(), _SPEED_FILE)
+        except OSError:
+            return None
+
+    @classmethod
+    def load(cls) -> "SpeedModel":
+        """
+        Load the model from the cache (defaults if there is none).
+        """
+        path = cls._path()
+        data = (load_json(path) if path else None) or {}
+        try:
+            return cls(float(data.get("throughput", DEFAULT_THROUGHPUT)), int(data.get("samples", 0)))
+        except (TypeError, ValueError):
+            return cls()
+
+    @classmethod
+    def observe(cls, plan: EncodePlan, seconds: float):
+        """
+        Update the model with the actual time of a job.
+
+        Args:
+            plan: Plan the job was executed with
+            seconds: Actual processing time
+        """
+        if seconds <= 0 or plan.cost <= 0:
+            return
+        measured = plan.cost * _preset_factor(plan.preset) / seconds
+        with _speed_lock:
+            model = cls.load()
+            if model.samples:
+                model.throughput += cls.SMOOTHING * (measured - model.throughput)
+            else:
+                model.throughput = measured
+            model.samples += 1
+            path = cls._path()
+            if path:
+                save_json(path, {"throughput": model.throughput, "samples": model.samples})
+        logger.debug(f"Encoding speed updated: {model.throughput / 1e6:.1f} Mpx/s on preset medium")
@@ -0,0 +1,417 @@
+"""
+Graph (DAG) pipeline: named inputs, named streams and parallel branches
+"""
+import os
+import time
+import shutil
+import tempfile
+import logging
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Any, Optional
+
+from tqdm import tqdm
+
+from video_pipeline.core.context import run_context
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.core.progress import ProgressEvent, ProgressTracker, format_eta, stage_weight
+from video_pipeline.modules.registry import get_module_class
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.probe import probe, media_duration, video_stream, frame_rate
+
+logger = logging.getLogger(__name__)
+
+def is_graph_config(config: Dict[str, Any]) -> bool:
+    """
+    Check whether configuration uses the graph format (``stages`` section).
+
+    Args:
+        config: Dictionary with configuration
+
+    Returns:
+        True for graph configurations, False for linear ones
+    """
+    return isinstance(config, dict) and 'stages' in config
+
+class GraphStage:
+    """
+    Single stage of the graph: one module applied to a named stream.
+    """
+
+    def __init__(self, index: int, stage_config: Dict[str, Any], default_input: Optional[str]):
+        """
+        Initialize the stage from configuration.
+
+        Args:
+            index: Stage index in configuration
+            stage_config: Stage configuration (name, input, output, params, streams)
+            default_input: Stream used when the stage does not specify an input
+        """
+        self.index = index
+        self.name = stage_config.get('name')
+        if not self.name:
+            raise ValueError(f"Stage {index} must have a name")
+
+        self.params = stage_config.get('params') or {}
+        self.input = stage_config.get('input', default_input)
+        if not self.input:
+            raise ValueError(f"Stage {index} ({self.name}) has no input stream")
+
+        self.output = stage_config.get('output') or f"{self.name}_{index}"
+        # Параметры модуля, значения которых берутся из других потоков
+        self.streams = stage_config.get('streams') or {}
+        self.module_class = get_module_class(self.name)
+        self.module = None
+
+    @property
+    def dependencies(self) -> List[str]:
+        """
+        Names of all streams the stage consumes.
+        """
+        deps = [self.input]
+        for value in self.streams.values():
+            deps.extend(value if isinstance(value, list) else [value])
+        return deps
+
+    def create_module(self, paths: Dict[str, str]):
+        """
+        Create the module instance, substituting stream paths into params.
+
+        Args:
+            paths: Mapping of stream names to file paths
+
+        Returns:
+            Module instance
+        """
+        if self.module is not None:
+            return self.module
+
+        params = dict(self.params)
+        for param_name, stream in self.streams.items():
+            if isinstance(stream, list):
+                params[param_name] = [paths[s] for s in stream]
+            else:
+                params[param_name] = paths[stream]
+        return self.module_class(params)
+
+class GraphSegment:
+    """
+    Linear chain of stages executed as one task.
+
+    A segment of several stages consists only of filter modules and is
+    executed with a single FFmpeg call.
+    """
+
+    def __init__(self, stage: GraphStage):
+        self.stages = [stage]
+
+    @property
+    def input(self) -> str:
+        return self.stages[0].input
+
+    @property
+    def output(self) -> str:
+        return self.stages[-1].output
+
+    @property
+    def dependencies(self) -> List[str]:
+        return self.stages[0].dependencies
+
+    @property
+    def description(self) -> str:
+        return "+".join(stage.name for stage in self.stages)
+
+class GraphPipeline:
+    """
+    Pipeline described as a graph of stages connected by named streams.
+
+    Independent branches are executed in parallel, linear chains of filter
+    modules are fused into a single FFmpeg call.
+    """
+
+    def __init__(self, config: Dict[str, Any], jobs: Optional[int] = None):
+        """
+        Initialize the graph pipeline.
+
+        Args:
+            config: Graph configuration (inputs, stages, outputs)
+            jobs: Maximum number of stages executed in parallel
+        """
+        self.config = config
+        self.inputs = dict(config.get('inputs') or {})
+        self.outputs = dict(config.get('outputs') or {})
+        self.jobs = jobs or config.get('jobs') or min(4, os.cpu_count() or 1)
+        self.stages = self._load_stages()
+        self._check_graph()
+        self.segments = self._fuse_segments()
+
+    def _load_stages(self) -> List[GraphStage]:
+        """
+        Create stages from configuration.
+
+        Returns:
+            List of stages
+        """
+        stages = []
+        previous = next(iter(self.inputs), None) if len(self.inputs) == 1 else None
+        for index, stage_config in enumerate(self.config.get('stages') or []):
+            stage = GraphStage(index, stage_config, previous)
+            stages.append(stage)
+            previous = stage.output
+
+        if not stages:
+            raise ValueError("Configuration 'stages' section is empty")
+        return stages
+
+    def _check_graph(self):
+        """
+        Check that all streams are defined exactly once and the graph has no cycles.
+        """
+        producers = {}
+        for stage in self.stages:
+            if stage.output in self.inputs or stage.output in producers:
+                raise ValueError(f"Stream '{stage.output}' is defined more than once")
+            producers[stage.output] = stage
+
+        for stage in self.stages:
+            for dep in stage.dependencies:
+                if dep not in self.inputs and dep not in producers:
+                    raise ValueError(f"Stage {stage.index} ({stage.name}) uses unknown stream '{dep}'")
+
+        for stream in self.outputs:
+            if stream not in producers:
+                raise ValueError(f"Output stream '{stream}' is not produced by any stage")
+
+        # Топологическая сортировка (алгоритм Кана)
+        pending = {stage.output: set(d for d in stage.dependencies if d in producers) for stage in self.stages}
+        order = []
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Graph contains a cycle between streams: {', '.join(sorted(pending))}")
+            for name in ready:
+                order.append(producers[name])
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+        self.stages = order
+
+    def _fuse_segments(self) -> List[GraphSegment]:
+        """
+        Merge linear chains of filter modules into segments.
+
+        A stage is appended to the segment of its input stream when both are
+        plain filters, the stream has no other consumers and is not an output.
+
+        Returns:
+            List of segments in topological order
+        """
+        consumers = {}
+        for stage in self.stages:
+            for dep in stage.dependencies:
+                consumers[dep] = consumers.get(dep, 0) + 1
+
+        segments = []
+        by_output = {}
+        for stage in self.stages:
+            fusable = not stage.streams and self._video_filter(stage) is not None
+            segment = by_output.get(stage.input)
+            if (fusable and segment is not None
+                    and consumers.get(stage.input) == 1
+                    and stage.input not in self.outputs):
+                del by_output[stage.input]
+                segment.stages.append(stage)
+            else:
+                segment = GraphSegment(stage)
+                segments.append(segment)
+
+            if fusable:
+                by_output[stage.output] = segment
+
+        for segment in segments:
+            if len(segment.stages) > 1:
+                logger.info(f"Fused stages: {segment.description}")
+        return segments
+
+    def _video_filter(self, stage: GraphStage) -> Optional[str]:
+        """
+        Get the fusable filter of a stage without extra inputs.
+
+        Args:
+            stage: Graph stage
+
+        Returns:
+            Filter string or None
+        """
+        if stage.module is None:
+            stage.module = stage.create_module({})
+        return stage.module.video_filter()
+
+    def _create_tracker(self, inputs: Dict[str, str],
+                        callback: Optional[Callable[[ProgressEvent], None]]) -> ProgressTracker:
+        """
+        Create a progress tracker with one stage per segment.
+
+        Expected durations are propagated along the streams from the probed
+        inputs; a segment is weighted by its most expensive stage, because
+        fused stages are encoded once.
+
+        Args:
+            inputs: Input streams and their files
+            callback: Function called with every progress event
+
+        Returns:
+            Progress tracker
+        """
+        durations, rates = {}, {}
+        for name, path in inputs.items():
+            try:
+                info = probe(path)
+            except (OSError, ValueError):
+                continue
+            durations[name] = media_duration(info)
+            rates[name] = frame_rate(video_stream(info) or {})
+
+        tracker = ProgressTracker(callback)
+        for segment in self.segments:
+            duration = durations.get(segment.input)
+            weight = 0.0
+            for stage in segment.stages:
+                # Модули этапов с потоками создаются только при запуске
+                if duration is not None and stage.module is not None:
+                    duration = stage.module.expected_output_duration(duration)
+                weight = max(weight, stage_weight(stage.module_class, stage.params))
+            durations[segment.output] = duration
+            rates[segment.output] = rates.get(segment.input)
+            tracker.add_stage(segment.description, duration, rates[segment.output], weight)
+        return tracker
+
+    def process(self, input_path: Optional[str] = None, output_path: Optional[str] = None,
+                progress_callback: Optional[Callable[[ProgressEvent], None]] = None):
+        """
+        Execute the graph.
+
+        Args:
+            input_path: Path to input video (allowed only for a single named input)
+            output_path: Path to output video (allowed only for a single named output)
+            progress_callback: Function called with a core.progress.ProgressEvent
+                on every progress report of FFmpeg
+        """
+        inputs = dict(self.inputs)
+        outputs = dict(self.outputs)
+
+        if input_path:
+            if len(inputs) > 1:
+                raise ValueError("Input override is ambiguous for a graph with several inputs")
+            inputs = {next(iter(inputs), 'input'): input_path}
+        if output_path:
+            if len(outputs) > 1:
+                raise ValueError("Output override is ambiguous for a graph with several outputs")
+            outputs = {next(iter(outputs), self.stages[-1].output): output_path}
+        if not outputs:
+            raise ValueError("Output file not specified")
+
+        for name, path in inputs.items():
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Input file for stream '{name}' not found: {path}")
+        for path in outputs.values():
+            output_dir = os.path.dirname(path)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+        work_dir = tempfile.mkdtemp(prefix="video_pipeline_")
+        paths = dict(inputs)
+        remaining = list(self.segments)
+        running = {}
+
+        logger.info(f"Запуск графа - {len(self.stages)} этапов, {len(self.segments)} задач, {self.jobs} потоков")
+
+        try:
+            with METRICS.scratch_dir(work_dir), ThreadPoolExecutor(max_workers=self.jobs) as executor, \
+                    tqdm(total=100, desc="Обработка видео", bar_format="{l_bar}{bar:30}| {n:.0f}% [{elapsed}{postfix}]", colour="green") as pbar:
+                def on_progress(event: ProgressEvent):
+                    METRICS.observe_encode(event.stage_name, event.fps, event.speed)
+                    pbar.n = event.fraction * 100
+                    pbar.set_postfix_str(f"ETA {format_eta(event.eta)}")
+                    if progress_callback is not None:
+                        progress_callback(event)
+
+                tracker = self._create_tracker(inputs, on_progress)
+                while remaining or running:
+                    # Запускаем все задачи, входные потоки которых уже готовы
+                    for segment in [s for s in remaining if all(d in paths for d in s.dependencies)]:
+                        remaining.remove(segment)
+                        target = outputs.get(segment.output) or os.path.join(work_dir, f"{segment.output}.mp4")
+                        # Контекст запуска (например, настройки энкодера) передается в поток
+                        future = executor.submit(contextvars.copy_context().run,
+                                                 self._run_segment, segment, paths, target,
+                                                 tracker.stage(self.segments.index(segment)))
+                        running[future] = (segment, target)
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        segment, target = running.pop(future)
+                        try:
+                            future.result()
+                        except Exception:
+                            for other in running:
+                                other.cancel()
+                            raise
+                        paths[segment.output] = target
+                        pbar.set_description(f"Этап: {segment.description}")
+                        tracker.complete_stage(self.segments.index(segment))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        for stream, path in outputs.items():
+            logger.info(f"Stream '{stream}' saved to {path}")
+
+    def _run_segment(self, segment: GraphSegment, paths: Dict[str, str], output_path: str,
+                     progress: Optional[Callable[[Any], None]] = None):
+        """
+        Execute a segment.
+
+        Args:
+            segment: Segment to execute
+            paths: Mapping of ready streams to file paths
+            output_path: Path to the segment output
+            progress: Progress reporter of the segment
+        """
+        start_time = time.monotonic()
+        with run_context(progress=progress):
+            self._execute_segment(segment, paths, output_path)
+        METRICS.observe_stage(segment.description, time.monotonic() - start_time)
+
+    def _execute_segment(self, segment: GraphSegment, paths: Dict[str, str], output_path: str):
+        input_path = paths[segment.input]
+
+        if len(segment.stages) == 1:
+            stage = segment.stages[0]
+            logger.info(f"Applying stage {stage.index} ({stage.name}): {stage.input} -> {stage.output}")
+            stage.create_module(paths).process(input_path, output_path)
+            return
+
+        filters = ",".join(stage.module.video_filter() for stage in segment.stages)
+        cmd = [
+            'ffmpeg',
+            '-i', input_path,
+            '-vf', filters,
+            '-c:v', 'libx264',
+            '-preset', 'fast',
+            '-threads', '8',
+            '-map', '0:v',
+            '-map', '0:a?',
+            '-c:a', 'copy',
+            output_path,
+            '-y'
+        ]
+
+        logger.debug(f"Выполнение команды: {' '.join(cmd)}")
+
+        try:
+            run_ffmpeg(cmd)
+            logger.info(f"Fused stages {segment.description} applied: {input_path} -> {output_path}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ошибка при обработке объединенных этапов: {e.stderr.decode()}")
+            raise
@@ -0,0 +1,257 @@
+"""
+Run journal: stage-level checkpoints for resuming interrupted pipelines
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from video_pipeline.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = "journal.jsonl"
+
+def params_hash(module_name: str, params: Dict[str, Any]) -> str:
+    """
+    Hash of a stage definition (module name and parameters).
+
+    Args:
+        module_name: Module name from configuration
+        params: Module parameters
+
+    Returns:
+        Hex string
+    """
+    data = json.dumps({"name": module_name, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+def chain_hash(previous: str, stage_hash: str) -> str:
+    """
+    Combine the chain of the previous stage with the current stage definition.
+
+    A stage result can be reused only if the input and all stages up to and
+    including it are unchanged; the chain hash captures exactly that.
+
+    Args:
+        previous: Chain hash of the previous stage (or the input fingerprint)
+        stage_hash: Hash of the current stage definition
+
+    Returns:
+        Hex string
+    """
+    return hashlib.sha1(f"{previous}:{stage_hash}".encode()).hexdigest()
+
+class StageCheckpoint:
+    """
+    Checkpoint handle of a single stage, passed to modules through the run context.
+
+    Chunk-based modules (e.g. utility.cut) use it to skip chunks that were
+    already produced by an interrupted run.
+    """
+
+    def __init__(self, journal: "RunJournal", index: int, chain: str):
+        self.journal = journal
+        self.index = index
+        self.chain = chain
+
+    def chunk_done(self, key: str, path: str) -> bool:
+        """
+        Check whether a chunk was completed and its file is unchanged.
+
+        Args:
+            key: Chunk key (unique within the stage)
+            path: Path to the chunk file
+
+        Returns:
+            True if the chunk can be reused
+        """
+        record = self.journal.chunks.get((self.chain, key))
+        return (record is not None
+                and record["path"] == os.path.abspath(path)
+                and record["fingerprint"] is not None
+                and record["fingerprint"] == file_fingerprint(path))
+
+    def record_chunk(self, key: str, path: str):
+        """
+        Record a completed chunk.
+
+        Args:
+            key: Chunk key (unique within the stage)
+            path: Path to the chunk file
+        """
+        self.journal.append({
+            "event": "chunk",
+            "stage": self.index,
+            "chain": self.chain,
+            "key": key,
+            "path": os.path.abspath(path),
+            "fingerprint": file_fingerprint(path),
+        })
+
+class RunJournal:
+    """
+    Append-only journal of a pipeline run.
+
+    Every completed stage is recorded with its chain hash (input fingerprint
+    plus parameters of all stages so far) and the fingerprint of its output.
+    The journal and intermediate files live in a run directory, which is
+    kept after a failure and removed after success.
+    """
+
+    def __init__(self, run_dir: str):
+        """
+        Initialize the journal.
+
+        Args:
+            run_dir: Directory of the run (journal and intermediate files)
+        """
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, JOURNAL_NAME)
+        self.stages: Dict[int, Dict[str, Any]] = {}
+        self.chunks: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def run_dir_for(base_dir: str, input_path: str, output_path: str) -> str:
+        """
+        Get the run directory for a pair of input and output files.
+
+        Args:
+            base_dir: Directory with run directories
+            input_path: Path to input video
+            output_path: Path to output video
+
+        Returns:
+            Path to the run directory
+        """
+        key = f"{os.path.abspath(input_path)}\n{os.path.abspath(output_path)}"
+        return os.path.join(base_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def load(self) -> bool:
+        """
+        Load records of a previous run.
+
+        Returns:
+            True if a journal was found
+        """
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Последняя строка может быть оборвана при аварийном завершении
+                    continue
+                if record.get("event") == "stage":
+                    self.stages[record["index"]] = record
+                elif record.get("event") == "chunk":
+                    self.chunks[(record["chain"], record["key"])] = record
+        return True
+
+    def start(self, resume: bool):
+        """
+        Prepare the run directory.
+
+        Args:
+            resume: Keep results of a previous run; otherwise start from scratch
+        """
+        if resume and self.load():
+            logger.info(f"Loaded run journal {self.path}: {len(self.stages)} stages, {len(self.chunks)} chunks")
+        else:
+            self.remove()
+            self.stages.clear()
+            self.chunks.clear()
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def append(self, record: Dict[str, Any]):
+        """
+        Append a record to the journal and flush it to disk.
+
+        Args:
+            record: Journal record
+        """
+        record = dict(record, time=time.time())
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if record["event"] == "stage":
+                self.stages[record["index"]] = record
+            elif record["event"] == "chunk":
+                self.chunks[(record["chain"], record["key"])] = record
+
+    def record_stage(self, index: int, module_name: str, chain: str, output_path: str):
+        """
+        Record a completed stage.
+
+        Args:
+            index: Stage index
+            module_name: Module name from configuration
+            chain: Chain hash of the stage
+            output_path: Path to the stage output
+        """
+        self.append({
+            "event": "stage",
+            "index": index,
+            "module": module_name,
+            "chain": chain,
+            "path": os.path.abspath(output_path),
+            "fingerprint": file_fingerprint(output_path),
+        })
+
+    def completed_stage(self, index: int, chain: str) -> Optional[str]:
+        """
+        Check whether a stage result from a previous run can be reused.
+
+        Args:
+            index: Stage index
+            chain: Expected chain hash of the stage
+
+        Returns:
+            Path to the stage output or None if the stage has to be run again
+        """
+        record = self.stages.get(index)
+        if record is None or record["chain"] != chain:
+            return None
+        if record["fingerprint"] != file_fingerprint(record["path"]):
+            logger.warning(f"Output of stage {index} was modified, stage will be repeated")
+            return None
+        return record["path"]
+
+    def checkpoint(self, index: int, chain: str) -> StageCheckpoint:
+        """
+        Create a checkpoint handle for a stage.
+
+        Args:
+            index: Stage index
+            chain: Chain hash of the stage
+
+        Returns:
+            Stage checkpoint
+        """
+        return StageCheckpoint(self, index, chain)
+
+    def remove(self):
+        """
+        Delete the run directory with the journal and intermediate files.
+        """
+        if os.path.exists(self.run_dir):
+            try:
+                shutil.rmtree(self.run_dir)
+            except OSError as e:
+                logger.warning(f"Failed to delete run directory {self.run_dir}: {str(e)}")
+                return
+        
+        # Удаляем общую директорию запусков, если она опустела
+        try:
+            os.rmdir(os.path.dirname(self.run_dir))
+        except OSError:
+            pass
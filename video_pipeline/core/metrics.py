@@ -0,0 +1,281 @@
+"""
+Run metrics in Prometheus text format
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограммы длительности этапов в секундах
+STAGE_DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+class Metrics:
+    """
+    Counters and gauges of pipeline runs in this process.
+
+    The pipeline feeds it from its own accounting: job outcomes from
+    Pipeline.process, stage durations and FFmpeg progress (fps, speed)
+    from the stage loop, running FFmpeg processes from run_ffmpeg and
+    scratch directories from the run journal. Updates are cheap, so they
+    are always recorded; ``render()`` is only called when an exporter is
+    running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, int] = {"started": 0, "succeeded": 0, "failed": 0}
+        self.queue_depth = 0
+        self.ffmpeg_processes = 0
+        # Модуль -> (счетчики корзин, сумма, количество)
+        self.stage_durations: Dict[str, Tuple[List[int], float, int]] = {}
+        self.encode_fps: Dict[str, float] = {}
+        self.realtime_factor: Dict[str, float] = {}
+        self.scratch_dirs: Set[str] = set()
+
+    def job_started(self):
+        with self._lock:
+            self.jobs["started"] += 1
+
+    def job_finished(self, succeeded: bool):
+        with self._lock:
+            self.jobs["succeeded" if succeeded else "failed"] += 1
+
+    def set_queue_depth(self, depth: int):
+        with self._lock:
+            self.queue_depth = depth
+
+    def observe_stage(self, module: str, seconds: float):
+        """
+        Record the duration of a completed stage.
+
+        Args:
+            module: Module name
+            seconds: Stage duration
+        """
+        with self._lock:
+            buckets, total, count = self.stage_durations.get(module) or ([0] * len(STAGE_DURATION_BUCKETS), 0.0, 0)
+            for i, bound in enumerate(STAGE_DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self.stage_durations[module] = (buckets, total + seconds, count + 1)
+
+    def observe_encode(self, module: str, fps: Optional[float], speed: Optional[float]):
+        """
+        Record the current encoding speed of a stage.
+
+        Args:
+            module: Module name
+            fps: Frames per second reported by FFmpeg
+            speed: Speed relative to real time reported by FFmpeg
+        """
+        with self._lock:
+            if fps is not None:
+                self.encode_fps[module] = fps
+            if speed is not None:
+                self.realtime_factor[module] = speed
+
+    @contextmanager
+    def ffmpeg_process(self):
+        """
+        Count an FFmpeg process while it runs.
+        """
+        with self._lock:
+            self.ffmpeg_processes += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.ffmpeg_processes -= 1
+
+    @contextmanager
+    def scratch_dir(self, path: str):
+        """
+        Include a directory of intermediate files in the scratch disk usage while it is in use.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            self.scratch_dirs.add(path)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.scratch_dirs.discard(path)
+
+    def render(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format.
+
+        Returns:
+            Metrics text
+        """
+        with self._lock:
+            jobs = dict(self.jobs)
+            queue_depth = self.queue_depth
+            ffmpeg_processes = self.ffmpeg_processes
+            durations = {m: (list(b), s, c) for m, (b, s, c) in self.stage_durations.items()}
+            encode_fps = dict(self.encode_fps)
+            realtime_factor = dict(self.realtime_factor)
+            scratch_dirs = sorted(self.scratch_dirs)
+
+        # Размер промежуточных файлов считается вне блокировки
+        scratch_bytes = sum(_dir_size(path) for path in scratch_dirs if os.path.isdir(path))
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Iterator[Tuple[str, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, value in samples:
+                lines.append(f"{name}{suffix} {value}")
+
+        for outcome in ("started", "succeeded", "failed"):
+            metric(f"video_pipeline_jobs_{outcome}_total", "counter", f"Jobs {outcome}",
+                   iter([("", jobs[outcome])]))
+        metric("video_pipeline_queue_depth", "gauge", "Jobs waiting to be processed",
+               iter([("", queue_depth)]))
+
+        histogram = []
+        for module, (buckets, total, count) in sorted(durations.items()):
+            for bound, value in zip(STAGE_DURATION_BUCKETS, buckets):
+                histogram.append((f"_bucket{_labels(module=module, le=bound)}", value))
+            histogram.append((f"_bucket{_labels(module=module, le='+Inf')}", count))
+            histogram.append((f"_sum{_labels(module=module)}", float(total)))
+            histogram.append((f"_count{_labels(module=module)}", count))
+        metric("video_pipeline_stage_duration_seconds", "histogram", "Duration of pipeline stages",
+               iter(histogram))
+
+        metric("video_pipeline_encode_fps", "gauge", "Last reported FFmpeg frames per second",
+               ((_labels(module=m), float(v)) for m, v in sorted(encode_fps.items())))
+        metric("video_pipeline_realtime_factor", "gauge", "Last reported FFmpeg speed relative to real time",
+               ((_labels(module=m), float(v)) for m, v in sorted(realtime_factor.items())))
+        metric("video_pipeline_scratch_bytes", "gauge", "Disk usage of intermediate files",
+               iter([("", scratch_bytes)]))
+        metric("video_pipeline_ffmpeg_processes", "gauge", "Running FFmpeg processes",
+               iter([("", ffmpeg_processes)]))
+        return "\n".join(lines) + "\n"
+
+# Метрики процесса; обновляются конвейером, экспортируются MetricsExporter
+METRICS = Metrics()
+
+class MetricsExporter:
+    """
+    Publishes METRICS for Prometheus.
+
+    Metrics are written to a file for the node_exporter textfile collector
+    (atomically, every ``interval`` seconds and on stop) and/or served over
+    HTTP on a local port at ``/metrics``.
+    """
+
+    def __init__(self, textfile: Optional[str] = None, port: Optional[int] = None,
+                 host: str = "127.0.0.1", interval: float = 15.0):
+        """
+        Initialize the exporter.
+
+        Args:
+            textfile: Path of the .prom file for the textfile collector
+            port: Port of the HTTP endpoint
+            host: Address the HTTP endpoint listens on
+            interval: Seconds between textfile updates
+        """
+        self.textfile = textfile
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._server = None
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    def write_textfile(self):
+        """
+        Write the metrics file atomically.
+        """
+        if not self.textfile:
+            return
+        directory = os.path.dirname(os.path.abspath(self.textfile))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(METRICS.render())
+            os.replace(temp_path, self.textfile)
+        except OSError as e:
+            logger.error(f"Error writing metrics to {self.textfile}: {str(e)}")
+
+    def _textfile_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def start(self):
+        """
+        Start the HTTP endpoint and the textfile writer.
+        """
+        if self.port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = METRICS.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    logger.debug(f"Metrics request: {format % args}")
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"Serving metrics on http://{self.host}:{self._server.server_port}/metrics")
+
+        if self.textfile:
+            self.write_textfile()
+            thread = threading.Thread(target=self._textfile_loop, name="metrics-textfile", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"Writing metrics to {self.textfile} every {self.interval:.0f}s")
+
+    def stop(self):
+        """
+        Stop the exporter; the textfile gets the final values.
+        """
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5.0)
+        self.write_textfile()
+
+    def __enter__(self) -> "MetricsExporter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
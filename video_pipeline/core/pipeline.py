@@ -2,14 +2,26 @@
 Core video processing pipeline class
 """
 import os
-import yaml
+import copy
 import logging
 import sys
-from typing import Dict, List, Any, Optional
-from importlib import import_module
-from tqdm import tqdm
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple, Union
 
+from video_pipeline.config.template import ConfigTemplate, load_template
+from video_pipeline.core.context import current_context, raise_if_cancelled, run_context
+from video_pipeline.core.deadline import SpeedModel, job_cost, parse_duration, parse_speed, plan_jobs
+from video_pipeline.core.journal import RunJournal, chain_hash, params_hash
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.core.preflight import input_files, run_preflight
+from video_pipeline.core.progress import ProgressEvent, ProgressTracker, format_eta, stage_weight
+from video_pipeline.modules.registry import get_module_class
 from video_pipeline.utils.ffmpeg import check_ffmpeg_installed
+from video_pipeline.utils.fingerprint import file_fingerprint
+from video_pipeline.utils.probe import probe, media_duration, video_stream, frame_rate
 
 logger = logging.getLogger(__name__)
 
@@ -17,31 +29,71 @@ class Pipeline:
     """
     Main video processing pipeline class.
     Loads configuration from YAML and executes video processing modules.
+    
+    For many inputs with one configuration use ``compile()``: the returned
+    CompiledPipeline checks the configuration once and is safe to share
+    between threads.
     """
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: Optional[str], config: Optional[Dict[str, Any]] = None,
+                 variables: Optional[Dict[str, Any]] = None):
         """
         Initialize the video processing pipeline.
         
         Args:
-            config_path: Path to the YAML configuration file
+            config_path: Path to the YAML configuration file (None with config)
+            config: Already loaded (e.g. rewritten) configuration; the file is not read then
+            variables: Values of ${name} variables in the configuration
         """
         self.config_path = config_path
-        self.config = self._load_config()
+        self.variables = variables or {}
+        self.config = config if config is not None else self._load_config()
         self.modules = []
+        self._lock = threading.Lock()
+        self._ffmpeg_checked = False
+        # Граф, построенный заранее (CompiledPipeline)
+        self._graph = None
+        
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any], variables: Optional[Dict[str, Any]] = None) -> "Pipeline":
+        """
+        Create a pipeline from a configuration dictionary instead of a YAML file.
+        
+        Args:
+            config: Configuration in the same format as the YAML file
+            variables: Values of ${name} variables in the configuration
+            
+        Returns:
+            Pipeline with a private copy of the configuration
+        """
+        return cls(None, config=ConfigTemplate(config).render(variables), variables=variables)
+        
+    def compile(self, jobs: Optional[int] = None) -> "CompiledPipeline":
+        """
+        Validate the configuration and load its modules once for many runs.
+        
+        Args:
+            jobs: Maximum number of parallel stages (graph configurations only)
+            
+        Returns:
+            Immutable, thread-safe CompiledPipeline
+            
+        Raises:
+            ValueError: If FFmpeg is not installed or the configuration has errors
+        """
+        return CompiledPipeline(self.config, config_path=self.config_path, jobs=jobs)
         
     def _load_config(self) -> Dict[str, Any]:
         """
         Load configuration from YAML file.
         
+        The file is parsed once per process (config.template.load_template);
+        ${name} variables are substituted from ``self.variables``.
+        
         Returns:
             Dictionary with configuration
         """
-        if not os.path.exists(self.config_path):
-            raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
-            
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_template(self.config_path).render(self.variables)
     
     def _load_modules(self):
         """
@@ -56,43 +108,7 @@ class Pipeline:
                 raise ValueError("Module must have a name")
                 
             try:
-                # Разбиваем имя модуля на части
-                module_parts = module_name.split('.')
-                
-                # Формируем путь к модулю
-                if len(module_parts) > 1:
-                    # Если есть подмодуль (например, utility.prepare_for_yt)
-                    module_path = f"video_pipeline.modules.{module_parts[0]}.{module_parts[1]}"
-                else:
-                    # Если модуль в корневой директории
-                    module_path = f"video_pipeline.modules.{module_name}"
-                
-                # Импортируем модуль
-                module = import_module(module_path)
-                
-                # Получаем последнюю часть имени для поиска класса
-                last_part = module_parts[-1]
-                
-                # Пробуем разные варианты имени класса
-                class_variants = [
-                    last_part.capitalize(),  # prepareforyt -> Prepareforyt
-                    last_part,  # Оставить как есть (если в конфиге указано правильно)
-                    # Convert snake_case to CamelCase
-                    ''.join(x.capitalize() or '_' for x in last_part.split('_'))  # prepare_for_yt -> PrepareForYt
-                ]
-                
-                # Пробуем каждый вариант
-                module_class = None
-                for variant in class_variants:
-                    try:
-                        module_class = getattr(module, variant)
-                        break
-                    except AttributeError:
-                        continue
-                        
-                if module_class is None:
-                    raise AttributeError(f"Could not find class for module {module_name}")
-                    
+                module_class = get_module_class(module_name)
                 module_instance = module_class(module_config.get('params', {}))
                 self.modules.append(module_instance)
                 logger.info(f"Module {module_name} loaded successfully")
@@ -100,22 +116,134 @@ class Pipeline:
                 logger.error(f"Error loading module {module_name}: {str(e)}")
                 raise
     
-    def process(self, input_path: Optional[str] = None, output_path: Optional[str] = None):
+    def load(self):
+        """
+        Load processing modules once; safe to call from several threads.
+        """
+        from video_pipeline.core.graph import is_graph_config
+        if is_graph_config(self.config):
+            return
+            
+        with self._lock:
+            if not self.modules:
+                self._load_modules()
+    
+    def process(self, input_path: Optional[str] = None, output_path: Optional[str] = None,
+                jobs: Optional[int] = None, resume: bool = False, work_dir: Optional[str] = None,
+                deadline: Optional[str] = None, target_speed: Optional[str] = None,
+                progress_callback: Optional[Callable[[ProgressEvent], None]] = None):
         """
         Start video processing.
         
         Args:
             input_path: Path to input video (overrides path from configuration)
             output_path: Path to output video (overrides path from configuration)
+            jobs: Maximum number of parallel stages (graph configurations only)
+            resume: Continue an interrupted run from the last completed stage
+            work_dir: Directory for run journals and intermediate files
+                (default: .video_pipeline next to the output file)
+            deadline: Time budget for the run, e.g. "30m" (overrides configuration)
+            target_speed: Required speed relative to real time, e.g. "3x" (overrides configuration)
+            progress_callback: Function called with a core.progress.ProgressEvent
+                (frames, out_time, fps, speed, overall fraction and ETA) on every
+                progress report of FFmpeg
         """
-        # Check for FFmpeg
-        if not check_ffmpeg_installed():
-            logger.error("FFmpeg not found. Install FFmpeg before using the pipeline.")
+        # Check for FFmpeg (once per pipeline instance)
+        if not self._ffmpeg_checked:
+            if not check_ffmpeg_installed():
+                logger.error("FFmpeg not found. Install FFmpeg before using the pipeline.")
+                return
+            self._ffmpeg_checked = True
+            
+        # Preflight: ошибки параметров, отсутствующие файлы и фильтры FFmpeg
+        # обнаруживаются до первого кодирования
+        report = run_preflight(self.config, input_path, output_path)
+        report.log()
+        report.raise_for_errors()
+        
+        self._execute(input_path, output_path, report.input_probes(), jobs, resume, work_dir,
+                      deadline, target_speed, progress_callback)
+        
+    def _execute(self, input_path: Optional[str], output_path: Optional[str], infos: List[Dict[str, Any]],
+                 jobs: Optional[int], resume: bool, work_dir: Optional[str], deadline: Optional[str],
+                 target_speed: Optional[str], progress_callback: Optional[Callable[[ProgressEvent], None]]):
+        """
+        Choose encoder settings and run the stages of a checked configuration.
+        
+        Args:
+            infos: Probe results of the input videos
+        """
+        # Пресет x264 под дедлайн выбирается, только если его не задал
+        # вызывающий код (например, планировщик пакетной обработки)
+        plan = None
+        deadline = parse_duration(deadline or self.config.get('deadline'))
+        target_speed = parse_speed(target_speed or self.config.get('target_speed'))
+        if current_context().encoder_options is None and (deadline or target_speed):
+            duration = max((media_duration(info) or 0.0 for info in infos), default=0.0)
+            plan = plan_jobs([(job_cost(self.config, infos), duration)],
+                             deadline=deadline, target_speed=target_speed)[0]
+            logger.info(f"Encoder preset {plan.preset} (rc-lookahead {plan.lookahead}), "
+                        f"estimated encoding time {plan.estimated_seconds:.0f}s")
+            
+        # Потоки из профиля машины дополняют выбранные настройки, но не заменяют их
+        options = plan.options if plan else current_context().encoder_options
+        layout = current_context().layout_options
+        if layout:
+            options = {**layout, **(options or {})}
+
+        start_time = time.monotonic()
+        METRICS.job_started()
+        try:
+            with run_context(encoder_options=options):
+                self._run(input_path, output_path, jobs, resume, work_dir, progress_callback)
+        except Exception:
+            METRICS.job_finished(succeeded=False)
+            raise
+        METRICS.job_finished(succeeded=True)
+            
+        # Фактическое время уточняет оценку скорости кодирования этой машины
+        if plan and not resume:
+            SpeedModel.observe(plan, time.monotonic() - start_time)
+    
+    def _create_tracker(self, input_file: str,
+                        callback: Optional[Callable[[ProgressEvent], None]]) -> ProgressTracker:
+        """
+        Create a progress tracker with one stage per module.
+
+        Expected frame counts come from the probed input: every module maps
+        the duration of its input to the duration of its output
+        (``expected_output_duration``).
+        """
+        try:
+            info = probe(input_file)
+            duration = media_duration(info)
+            rate = frame_rate(video_stream(info) or {})
+        except (OSError, ValueError):
+            duration, rate = None, None
+            
+        tracker = ProgressTracker(callback)
+        for module, module_config in zip(self.modules, self.config['modules']):
+            if duration is not None:
+                duration = module.expected_output_duration(duration)
+            tracker.add_stage(module_config.get('name'), duration, rate,
+                              stage_weight(module.__class__, module_config.get('params', {})))
+        return tracker
+    
+    def _run(self, input_path: Optional[str], output_path: Optional[str], jobs: Optional[int],
+             resume: bool, work_dir: Optional[str],
+             progress_callback: Optional[Callable[[ProgressEvent], None]] = None):
+        """
+        Execute the stages of the pipeline.
+        """
+        # Graph configurations are executed by the DAG scheduler
+        from video_pipeline.core.graph import GraphPipeline, is_graph_config
+        if is_graph_config(self.config):
+            graph = self._graph if self._graph is not None and jobs is None else GraphPipeline(self.config, jobs=jobs)
+            graph.process(input_path, output_path, progress_callback)
             return
             
         # Load modules if not loaded yet
-        if not self.modules:
-            self._load_modules()
+        self.load()
             
         # Determine file paths
         input_file = input_path or self.config.get('input')
@@ -135,44 +263,204 @@ class Pipeline:
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
             
-        # Temporary files for intermediate results
+        # Журнал запуска и промежуточные файлы хранятся в отдельной директории,
+        # которая сохраняется при ошибке для продолжения с --resume
+        base_dir = work_dir or self.config.get('work_dir') or os.path.join(output_dir or '.', '.video_pipeline')
+        journal = RunJournal(RunJournal.run_dir_for(base_dir, input_file, output_file))
+        journal.start(resume)
+        with METRICS.scratch_dir(journal.run_dir):
+            self._run_stages(journal, input_file, output_file, resume, progress_callback)
+            
+    def _run_stages(self, journal: RunJournal, input_file: str, output_file: str, resume: bool,
+                    progress_callback: Optional[Callable[[ProgressEvent], None]]):
+        """
+        Execute the modules one after another, recording every stage in the journal.
+        """
+        # Цепочка хешей: входной файл и параметры всех этапов до текущего
+        chain = file_fingerprint(input_file)
+        chains = []
+        for module_config in self.config['modules']:
+            chain = chain_hash(chain, params_hash(module_config.get('name'), module_config.get('params', {})))
+            chains.append(chain)
+            
+        # Пропускаем этапы, завершенные в прерванном запуске
         temp_input = input_file
+        start_index = 0
+        if resume:
+            for i, stage_chain in enumerate(chains):
+                completed_output = journal.completed_stage(i, stage_chain)
+                if completed_output is None:
+                    break
+                temp_input = completed_output
+                start_index = i + 1
+            if start_index:
+                logger.warning(f"Resuming from stage {start_index + 1}/{len(self.modules)}")
         
         # Apply modules sequentially
         logger.info(f"Запуск обработки видео - {len(self.modules)} модулей")
         
-        # Создаем прогресс-бар с tqdm
-        with tqdm(total=len(self.modules), desc="Обработка видео", bar_format="{l_bar}{bar:30}{r_bar}", colour="green") as pbar:
-            for i, module in enumerate(self.modules):
-                # Обновляем описание прогресс-бара с именем текущего модуля
-                pbar.set_description(f"Модуль: {module.__class__.__name__}")
-                
-                is_last_module = i == len(self.modules) - 1
-                temp_output = output_file if is_last_module else f"temp_{i}.mp4"
-                
-                logger.info(f"Applying module {module.__class__.__name__}")
-                module.process(temp_input, temp_output)
+        from tqdm import tqdm
+        
+        try:
+            # Прогресс-бар показывает взвешенную долю всех этапов по кадрам FFmpeg
+            with tqdm(total=100, desc="Обработка видео", bar_format="{l_bar}{bar:30}| {n:.0f}% [{elapsed}{postfix}]", colour="green") as pbar:
+                def on_progress(event: ProgressEvent):
+                    METRICS.observe_encode(event.stage_name, event.fps, event.speed)
+                    pbar.n = event.fraction * 100
+                    pbar.set_postfix_str(f"ETA {format_eta(event.eta)}")
+                    if progress_callback is not None:
+                        progress_callback(event)
                 
-                # If not the last module, update input file for the next one
-                if not is_last_module:
-                    temp_input = temp_output
+                tracker = self._create_tracker(input_file, on_progress)
+                for i in range(start_index):
+                    tracker.skip_stage(i)
                 
-                # Обновляем прогресс после обработки модуля
-                pbar.update(1)
+                for i in range(start_index, len(self.modules)):
+                    module = self.modules[i]
+                    
+                    # Обновляем описание прогресс-бара с именем текущего модуля
+                    pbar.set_description(f"Модуль: {module.__class__.__name__}")
+                    
+                    is_last_module = i == len(self.modules) - 1
+                    temp_output = output_file if is_last_module else os.path.join(journal.run_dir, f"temp_{i}.mp4")
+                    
+                    logger.info(f"Applying module {module.__class__.__name__}")
+                    stage_start = time.monotonic()
+                    with run_context(checkpoint=journal.checkpoint(i, chains[i]), stage_index=i,
+                                     progress=tracker.stage(i)):
+                        module.process(temp_input, temp_output)
+                    # Отмененный запуск не отмечает этап в журнале: его может продолжать другой процесс
+                    raise_if_cancelled()
+                    journal.record_stage(i, self.config['modules'][i].get('name'), chains[i], temp_output)
+                    METRICS.observe_stage(self.config['modules'][i].get('name'), time.monotonic() - stage_start)
+                    
+                    # If not the last module, update input file for the next one
+                    if not is_last_module:
+                        temp_input = temp_output
+                    
+                    tracker.complete_stage(i)
+        except Exception:
+            logger.warning(f"Run state kept in {journal.run_dir}, use --resume to continue")
+            raise
+            
+        # Clean up temporary files
+        journal.remove()
                 
         logger.info(f"Processing complete. Result saved to {output_file}")
-        
-        # Clean up temporary files
-        self._cleanup_temp_files()
-    
-    def _cleanup_temp_files(self):
+
+
+class CompiledPipeline:
+    """
+    Checked configuration with loaded modules, reusable for any number of inputs.
+
+    FFmpeg availability, the configuration and its shared assets (overlays,
+    images, fonts) are checked once, modules are created once and graph
+    configurations are planned and fused once. Every run only checks its
+    own input; probe results of inputs and assets come from the shared
+    cache. Modules keep no state between runs, so ``run`` may be called
+    from several threads at once, for different outputs.
+    """
+
+    def __init__(self, config: Dict[str, Any], config_path: Optional[str] = None, jobs: Optional[int] = None):
         """
-        Delete temporary files.
+        Compile a configuration.
+
+        Args:
+            config: Pipeline configuration (copied)
+            config_path: Path of the YAML file the configuration comes from
+            jobs: Maximum number of parallel stages (graph configurations only)
+
+        Raises:
+            ValueError: If FFmpeg is not installed or the configuration has errors
         """
-        for i in range(len(self.modules) - 1):
-            temp_file = f"temp_{i}.mp4"
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except OSError as e:
-                    logger.warning(f"Failed to delete temporary file {temp_file}: {str(e)}") 
\ No newline at end of file
+        if not check_ffmpeg_installed():
+            raise ValueError("FFmpeg not found. Install FFmpeg before using the pipeline.")
+
+        report = run_preflight(config, check_inputs=False)
+        report.log()
+        report.raise_for_errors()
+
+        from video_pipeline.core.graph import GraphPipeline, is_graph_config
+
+        self._pipeline = Pipeline(config_path, config=copy.deepcopy(config))
+        self._pipeline._ffmpeg_checked = True
+        if is_graph_config(self._pipeline.config):
+            self._pipeline._graph = GraphPipeline(self._pipeline.config, jobs=jobs)
+        else:
+            self._pipeline.load()
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """
+        Copy of the compiled configuration.
+        """
+        return copy.deepcopy(self._pipeline.config)
+
+    def run(self, input_path: Optional[str] = None, output_path: Optional[str] = None,
+            resume: bool = False, work_dir: Optional[str] = None, deadline: Optional[str] = None,
+            target_speed: Optional[str] = None,
+            progress_callback: Optional[Callable[[ProgressEvent], None]] = None):
+        """
+        Process one input.
+
+        Args:
+            input_path: Path to input video (overrides path from configuration)
+            output_path: Path to output video (overrides path from configuration)
+            resume: Continue an interrupted run from the last completed stage
+            work_dir: Directory for run journals and intermediate files
+            deadline: Time budget for the run, e.g. "30m" (overrides configuration)
+            target_speed: Required speed relative to real time, e.g. "3x" (overrides configuration)
+            progress_callback: Function called with a core.progress.ProgressEvent
+
+        Raises:
+            ValueError: If no input is given or it cannot be read
+            FileNotFoundError: If the input file does not exist
+        """
+        inputs = input_files(self._pipeline.config, input_path)
+        if not inputs:
+            raise ValueError("Input file not specified")
+        # Повторное чтение ffprobe не выполняется: результаты берутся из кеша
+        infos = [probe(path) for path in inputs.values()]
+        self._pipeline._execute(input_path, output_path, infos, None, resume, work_dir,
+                                deadline, target_speed, progress_callback)
+
+    def map(self, jobs: Iterable[Union[str, Tuple[str, str]]], output_dir: Optional[str] = None,
+            workers: int = 2, **kwargs) -> List[Tuple[str, str, Optional[Exception]]]:
+        """
+        Process many inputs in parallel.
+
+        A failed job does not stop the others; its exception is returned.
+
+        Args:
+            jobs: Pairs (input, output) or input paths (written to output_dir
+                under the same file name)
+            output_dir: Directory for outputs of jobs given as input paths
+            workers: Number of jobs processed in parallel
+            **kwargs: Arguments of ``run`` (resume, work_dir, deadline, ...)
+
+        Returns:
+            List of (input, output, exception or None) in the order of jobs
+
+        Raises:
+            ValueError: If a job has no output and output_dir is not given
+        """
+        pairs = []
+        for job in jobs:
+            if isinstance(job, str):
+                if not output_dir:
+                    raise ValueError(f"No output for {job}: pass (input, output) or output_dir")
+                job = (job, os.path.join(output_dir, os.path.basename(job)))
+            pairs.append(job)
+
+        def run(input_path: str, output_path: str) -> Optional[Exception]:
+            try:
+                self.run(input_path, output_path, **kwargs)
+            except Exception as e:
+                logger.error(f"Job failed: {input_path}: {str(e)}")
+                return e
+            return None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            # Контекст запуска (например, настройки энкодера) передается в каждый поток
+            futures = [executor.submit(contextvars.copy_context().run, run, i, o) for i, o in pairs]
+            return [(i, o, future.result()) for (i, o), future in zip(pairs, futures)]
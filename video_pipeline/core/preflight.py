@@ -0,0 +1,209 @@
+"""
+Preflight checks of a pipeline configuration before any encoding
+"""
+import os
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from video_pipeline.config.schema import check_config, check_module_params, get_module_schema
+from video_pipeline.modules.registry import get_module_class
+from video_pipeline.utils.ffmpeg import get_ffmpeg_capabilities
+from video_pipeline.utils.probe import probe_many, has_stream
+
+logger = logging.getLogger(__name__)
+
+class PreflightReport:
+    """
+    Problems found by the preflight checks.
+
+    Errors make the pipeline fail before the first encode; warnings
+    (e.g. unknown parameters) are only logged.
+    """
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.inputs: Dict[str, str] = {}
+        self.probes: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def input_probes(self) -> List[Dict[str, Any]]:
+        """
+        Probe results of the input videos.
+        """
+        return [self.probes[path] for path in self.inputs.values() if path in self.probes]
+
+    def log(self):
+        """
+        Log all warnings and errors.
+        """
+        for warning in self.warnings:
+            logger.warning(f"Preflight: {warning}")
+        for error in self.errors:
+            logger.error(f"Preflight: {error}")
+
+    def raise_for_errors(self):
+        """
+        Raise an exception listing all errors, if there are any.
+
+        Raises:
+            ValueError: If the checks found errors
+        """
+        if self.errors:
+            raise ValueError("Preflight check failed:\n" + "\n".join(f"  - {e}" for e in self.errors))
+
+def _stages(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return config.get("stages") or config.get("modules") or []
+
+def input_files(config: Dict[str, Any], input_path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Input files of a configuration with the command line override applied.
+
+    Args:
+        config: Pipeline configuration
+        input_path: Input video (overrides value from configuration)
+
+    Returns:
+        Mapping of input names to paths (``input`` for linear configurations)
+    """
+    if "stages" in config:
+        inputs = dict(config.get("inputs") or {})
+        if input_path and len(inputs) == 1:
+            inputs = {name: input_path for name in inputs}
+        return inputs
+
+    input_file = input_path or config.get("input")
+    return {"input": input_file} if input_file else {}
+
+def _assets(module_name: str, params: Dict[str, Any], skip: Tuple[str, ...] = ()) -> List[Tuple[str, str, str]]:
+    """
+    File parameters of a module: (parameter, path, media type).
+
+    File parameters are marked with ``"format": "file"`` in the module schema;
+    a list parameter (e.g. clips of ``concat``) yields one asset per item.
+    Parameters filled from graph streams are produced at run time and skipped.
+    """
+    schema = get_module_schema(module_name) or {}
+    assets = []
+    for param, param_schema in schema.get("properties", {}).items():
+        if param_schema.get("format") != "file" or param in skip:
+            continue
+        value = params.get(param)
+        if isinstance(value, str) and value:
+            assets.append((param, value, param_schema.get("media", "file")))
+        elif isinstance(value, list):
+            assets.extend((f"{param}[{i}]", item, param_schema.get("media", "file"))
+                          for i, item in enumerate(value) if isinstance(item, str) and item)
+    return assets
+
+def run_preflight(config: Dict[str, Any], input_path: Optional[str] = None,
+                  output_path: Optional[str] = None, max_workers: int = 8,
+                  check_inputs: bool = True) -> PreflightReport:
+    """
+    Validate a pipeline configuration without encoding anything.
+
+    Checks, in order:
+      - configuration and module parameters against the (compiled, cached) schemas;
+      - that every module name resolves through the module registry;
+      - that the FFmpeg build provides the filters and encoders the modules need;
+      - that input files and referenced assets (overlays, images, fonts) exist;
+      - that input videos and media assets are readable (probed concurrently).
+
+    Args:
+        config: Pipeline configuration
+        input_path: Input video (overrides value from configuration)
+        output_path: Output video (overrides value from configuration)
+        max_workers: Maximum number of concurrent ffprobe processes
+        check_inputs: Check the input and output files; disabled when a
+            configuration is validated once for many inputs (Pipeline.compile)
+
+    Returns:
+        Report with errors and warnings
+    """
+    report = PreflightReport()
+
+    errors, warnings = check_config(config)
+    report.errors.extend(errors)
+    report.warnings.extend(warnings)
+    if not isinstance(config, dict):
+        return report
+
+    if check_inputs and "stages" not in config and not (output_path or config.get("output")):
+        report.errors.append("output file not specified")
+
+    capabilities = get_ffmpeg_capabilities()
+    if capabilities is None:
+        report.errors.append("FFmpeg is not installed or not available in PATH")
+
+    # Файлы для проверки ffprobe: путь -> (описание, ожидаемый тип потока)
+    to_probe: Dict[str, Tuple[str, str]] = {}
+
+    inputs = input_files(config, input_path) if check_inputs else {}
+    report.inputs.update(inputs)
+    if check_inputs and not inputs:
+        report.errors.append("input file not specified")
+    for name, path in inputs.items():
+        label = "input file" if name == "input" else f"input '{name}'"
+        if not os.path.isfile(path):
+            report.errors.append(f"{label} not found: {path}")
+        else:
+            to_probe[path] = (label, "video")
+
+    for i, stage in enumerate(_stages(config)):
+        module_name = stage.get("name")
+        if not module_name:
+            continue
+        label = f"stage {i + 1} ({module_name})"
+        params = stage.get("params") or {}
+
+        try:
+            module_class = get_module_class(module_name)
+        except (ImportError, AttributeError) as e:
+            report.errors.append(f"{label}: {str(e)}")
+            continue
+
+        assets = _assets(module_name, params, tuple(stage.get("streams") or ()))
+
+        # Вложенный модуль обертки проверяется по своей схеме
+        if getattr(module_class, "module_name", None) == "utility.module_wrapper" and params.get("module_name"):
+            nested_name = params["module_name"]
+            nested_params = params.get("module_params") or {}
+            try:
+                get_module_class(nested_name)
+            except (ImportError, AttributeError) as e:
+                report.errors.append(f"{label}: {str(e)}")
+                continue
+            nested_errors, nested_warnings = check_module_params(nested_name, nested_params)
+            report.errors.extend(f"{label}: module_params: {e}" for e in nested_errors)
+            report.warnings.extend(f"{label}: module_params: {w}" for w in nested_warnings)
+            assets.extend((f"module_params.{param}", path, media)
+                          for param, path, media in _assets(nested_name, nested_params))
+
+        if capabilities is not None:
+            filters, encoders = module_class.ffmpeg_requirements(params)
+            missing_filters = [f for f in filters if f not in capabilities["filters"]]
+            missing_encoders = [e for e in encoders if e not in capabilities["encoders"]]
+            if missing_filters:
+                report.errors.append(f"{label}: FFmpeg has no filters: {', '.join(missing_filters)}")
+            if missing_encoders:
+                report.errors.append(f"{label}: FFmpeg has no encoders: {', '.join(missing_encoders)}")
+
+        for param, path, media in assets:
+            if not os.path.isfile(path):
+                report.errors.append(f"{label}: {param}: file not found: {path}")
+            elif media in ("video", "image"):
+                to_probe.setdefault(path, (f"{label}: {param}", media))
+
+    # Входные файлы и ассеты читаются ffprobe параллельно
+    results, probe_errors = probe_many(to_probe, max_workers=max_workers)
+    report.probes.update(results)
+    for path, (label, media) in to_probe.items():
+        if path in probe_errors:
+            report.errors.append(f"{label}: cannot read {path}: {probe_errors[path]}")
+        elif not has_stream(results[path], "video"):
+            report.errors.append(f"{label}: no {media} stream in {path}")
+
+    return report
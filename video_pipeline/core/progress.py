@@ -0,0 +1,302 @@
+"""
+Frame-accurate progress of FFmpeg commands and whole pipeline runs
+"""
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Вес кадра этапа без перекодирования (копирование потоков) относительно
+# простого перекодирования
+STREAM_COPY_WEIGHT = 0.1
+
+@dataclass(frozen=True)
+class FFmpegProgress:
+    """
+    One report of ``ffmpeg -progress``.
+
+    Attributes:
+        frame: Frames written so far
+        out_time: Position in the output in seconds
+        fps: Current processing speed in frames per second
+        speed: Current speed relative to real time
+        finished: True for the last report of the command
+    """
+    frame: int = 0
+    out_time: float = 0.0
+    fps: Optional[float] = None
+    speed: Optional[float] = None
+    finished: bool = False
+
+def _number(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value.strip().rstrip("x"))
+    except ValueError:
+        # FFmpeg пишет N/A, пока значение неизвестно
+        return None
+
+def parse_progress(lines: Iterable[str]) -> Iterator[FFmpegProgress]:
+    """
+    Parse the output of ``ffmpeg -progress pipe:1``.
+
+    FFmpeg writes blocks of ``key=value`` lines, each block ending with
+    ``progress=continue`` or ``progress=end``.
+
+    Args:
+        lines: Lines of the progress output
+
+    Yields:
+        One report per block
+    """
+    values: Dict[str, str] = {}
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        if key != "progress":
+            values[key] = value
+            continue
+
+        # out_time_us есть в новых версиях; out_time_ms исторически тоже в микросекундах
+        out_time = _number(values.get("out_time_us") or values.get("out_time_ms"))
+        yield FFmpegProgress(
+            frame=int(_number(values.get("frame")) or 0),
+            out_time=max(0.0, (out_time or 0.0) / 1e6),
+            fps=_number(values.get("fps")),
+            speed=_number(values.get("speed")),
+            finished=value.strip() == "end",
+        )
+        values = {}
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    Progress of a pipeline run passed to the progress callback.
+
+    Attributes:
+        stage_index: Index of the stage that reported progress
+        stage_name: Module (or fused stages) of that stage
+        stage_fraction: Completed part of the stage from 0 to 1
+        fraction: Completed part of the whole run from 0 to 1, weighted by
+            the expected frames and encoding cost of every stage
+        frame: Frames written by the stage so far
+        expected_frames: Frames the stage is expected to write (0 if unknown)
+        out_time: Position in the stage output in seconds
+        fps: Current processing speed in frames per second
+        speed: Current speed relative to real time
+        elapsed: Seconds since the run started
+        eta: Estimated seconds until the run finishes (None until it can be estimated)
+    """
+    stage_index: int
+    stage_name: str
+    stage_fraction: float
+    fraction: float
+    frame: int
+    expected_frames: float
+    out_time: float
+    fps: Optional[float]
+    speed: Optional[float]
+    elapsed: float
+    eta: Optional[float]
+
+class _Stage:
+    """
+    Progress state of one stage.
+    """
+
+    def __init__(self, name: str, expected_duration: Optional[float], frame_rate: Optional[float], weight: float):
+        self.name = name
+        self.expected_duration = expected_duration or 0.0
+        self.expected_frames = self.expected_duration * (frame_rate or 0.0)
+        self.weight = max(weight, 0.0)
+        # Кадры и время завершенных команд этапа (например, частей utility.cut)
+        self.done_frames = 0
+        self.done_time = 0.0
+        self.frame = 0
+        self.out_time = 0.0
+        self.fps: Optional[float] = None
+        self.speed: Optional[float] = None
+        self.fraction = 0.0
+
+    def update(self, info: FFmpegProgress):
+        self.frame = self.done_frames + info.frame
+        self.out_time = self.done_time + info.out_time
+        self.fps, self.speed = info.fps, info.speed
+        if self.expected_frames > 0 and info.frame:
+            fraction = self.frame / self.expected_frames
+        elif self.expected_duration > 0:
+            fraction = self.out_time / self.expected_duration
+        else:
+            fraction = 0.0
+        # Доля не убывает и достигает 1 только при завершении этапа
+        self.fraction = max(self.fraction, min(fraction, 0.99))
+        if info.finished:
+            self.done_frames, self.done_time = self.frame, self.out_time
+
+class ProgressTracker:
+    """
+    Combines the progress of all stages into one value with an ETA.
+
+    Every stage is weighted by the number of frames it is expected to write
+    (from the probed duration and frame rate of the input) multiplied by its
+    relative encoding cost, so a slow chromakey stage counts for more than
+    a stream copy of the same length. Stage progress comes from
+    ``ffmpeg -progress`` reports, see ``stage()``.
+    """
+
+    def __init__(self, callback: Optional[Callable[[ProgressEvent], None]] = None):
+        """
+        Initialize the tracker.
+
+        Args:
+            callback: Function called with a ProgressEvent on every report
+        """
+        self.callback = callback
+        self.stages: List[_Stage] = []
+        self.start_time = time.monotonic()
+        # Доля, выполненная до начала запуска (этапы, пропущенные при --resume)
+        self._base = 0.0
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, expected_duration: Optional[float] = None,
+                  frame_rate: Optional[float] = None, weight: float = 1.0) -> int:
+        """
+        Add a stage.
+
+        Args:
+            name: Stage name shown in progress events
+            expected_duration: Expected duration of the stage output in seconds
+            frame_rate: Expected frame rate of the stage output
+            weight: Relative cost of one frame of the stage
+
+        Returns:
+            Stage index
+        """
+        self.stages.append(_Stage(name, expected_duration, frame_rate, weight))
+        return len(self.stages) - 1
+
+    def _weights(self) -> List[float]:
+        # Этапы без оценки длительности получают средний вес остальных
+        weights = [s.weight * (s.expected_frames or s.expected_duration) for s in self.stages]
+        known = [w for w in weights if w > 0]
+        default = sum(known) / len(known) if known else 1.0
+        return [w if w > 0 else default for w in weights]
+
+    @property
+    def fraction(self) -> float:
+        """
+        Completed part of the run from 0 to 1.
+        """
+        weights = self._weights()
+        total = sum(weights)
+        if not total:
+            return 0.0
+        return sum(w * s.fraction for w, s in zip(weights, self.stages)) / total
+
+    def eta(self) -> Optional[float]:
+        """
+        Estimated seconds until the run finishes.
+        """
+        fraction = self.fraction
+        if fraction <= self._base:
+            return None
+        elapsed = time.monotonic() - self.start_time
+        return elapsed * (1.0 - fraction) / (fraction - self._base)
+
+    def stage(self, index: int) -> Callable[[FFmpegProgress], None]:
+        """
+        Get the reporter of a stage.
+
+        The reporter is put into the run context (``progress``), where
+        run_ffmpeg picks it up and feeds it every ``-progress`` report of
+        the stage's FFmpeg commands.
+
+        Args:
+            index: Stage index
+
+        Returns:
+            Function accepting FFmpegProgress
+        """
+        def report(info: FFmpegProgress):
+            with self._lock:
+                self.stages[index].update(info)
+            self._notify(index)
+        return report
+
+    def skip_stage(self, index: int):
+        """
+        Mark a stage completed in an earlier run (it does not count towards the ETA).
+
+        Args:
+            index: Stage index
+        """
+        with self._lock:
+            self.stages[index].fraction = 1.0
+            self._base = self.fraction
+
+    def complete_stage(self, index: int):
+        """
+        Mark a stage as completed.
+
+        Args:
+            index: Stage index
+        """
+        with self._lock:
+            stage = self.stages[index]
+            stage.fraction = 1.0
+        self._notify(index)
+
+    def _notify(self, index: int):
+        if self.callback is None:
+            return
+        with self._lock:
+            stage = self.stages[index]
+            event = ProgressEvent(
+                stage_index=index,
+                stage_name=stage.name,
+                stage_fraction=stage.fraction,
+                fraction=self.fraction,
+                frame=stage.frame,
+                expected_frames=stage.expected_frames,
+                out_time=stage.out_time,
+                fps=stage.fps,
+                speed=stage.speed,
+                elapsed=time.monotonic() - self.start_time,
+                eta=self.eta(),
+            )
+        try:
+            self.callback(event)
+        except Exception as e:
+            # Ошибка в обработчике прогресса не должна прерывать кодирование
+            logger.debug(f"Progress callback failed: {str(e)}")
+
+def stage_weight(module_class: type, params: Dict[str, Any]) -> float:
+    """
+    Relative cost of one frame of a stage.
+
+    Re-encoding stages weigh their module's ``encode_cost``, stream-copy
+    stages a small fixed amount.
+
+    Args:
+        module_class: Module class of the stage
+        params: Module parameters
+
+    Returns:
+        Weight of the stage
+    """
+    _, encoders = module_class.ffmpeg_requirements(params)
+    return module_class.encode_cost if "libx264" in encoders else STREAM_COPY_WEIGHT
+
+def format_eta(seconds: Optional[float]) -> str:
+    """
+    Format an ETA as ``H:MM:SS`` (``?`` if unknown).
+    """
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,253 @@
+"""
+Low-resolution proxy renders for tuning configurations
+"""
+import os
+import re
+import copy
+import logging
+import subprocess
+from typing import Dict, Any, Optional, Tuple
+
+from video_pipeline.core.context import run_context
+from video_pipeline.core.pipeline import Pipeline
+from video_pipeline.modules.registry import get_module_class
+from video_pipeline.utils.cache import get_cache_dir
+from video_pipeline.utils.fingerprint import file_fingerprint
+from video_pipeline.utils.probe import probe, video_stream
+
+logger = logging.getLogger(__name__)
+
+# Настройки x264 для всех этапов прокси: скорость важнее размера и качества
+PROXY_ENCODER_OPTIONS = {"preset": "ultrafast", "crf": "28"}
+
+def parse_proxy(value: str) -> int:
+    """
+    Parse a proxy resolution such as ``360p`` or ``360``.
+
+    Args:
+        value: Proxy resolution from the command line
+
+    Returns:
+        Size of the short side of the frame in pixels
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*p?\s*", str(value).lower())
+    if not match or int(match.group(1)) < 16:
+        raise ValueError(f"Invalid proxy resolution: {value}")
+    return int(match.group(1))
+
+def proxy_factor(path: str, size: int) -> float:
+    """
+    Scale factor that brings the short side of a video to ``size``.
+
+    The short side is used, so ``360p`` means 640x360 for landscape and
+    360x640 for vertical video.
+
+    Args:
+        path: Path to the video
+        size: Proxy size of the short side
+
+    Returns:
+        Factor, at most 1 (videos are never upscaled)
+
+    Raises:
+        ValueError: If the video has no readable video stream
+    """
+    stream = video_stream(probe(path))
+    if not stream or not stream.get("width") or not stream.get("height"):
+        raise ValueError(f"Cannot determine video size: {path}")
+    return min(1.0, size / min(int(stream["width"]), int(stream["height"])))
+
+def proxy_config(config: Dict[str, Any], factor: float) -> Dict[str, Any]:
+    """
+    Rewrite a configuration for a proxy render.
+
+    Pixel-valued parameters of every module (sizes, offsets, font sizes)
+    are scaled by ``factor`` so the proxy has the same layout as the full
+    render (see BaseModule.proxy_params).
+
+    Args:
+        config: Pipeline configuration (linear or graph)
+        factor: Scale factor
+
+    Returns:
+        New configuration
+    """
+    config = copy.deepcopy(config)
+    for stage in config.get("stages") or config.get("modules") or []:
+        try:
+            module_class = get_module_class(stage.get("name", ""))
+        except (ImportError, AttributeError):
+            # Ошибку в имени модуля покажет проверка конфигурации
+            continue
+        stage["params"] = module_class.proxy_params(stage.get("params") or {}, factor)
+    return config
+
+def make_proxy_input(path: str, factor: float) -> str:
+    """
+    Downscale an input video for proxy renders.
+
+    The result is cached by file fingerprint and factor, so repeated
+    previews of the same input skip this step.
+
+    Args:
+        path: Path to the input video
+        factor: Scale factor
+
+    Returns:
+        Path to the downscaled video
+
+    Raises:
+        FileNotFoundError: If the input does not exist
+        subprocess.CalledProcessError: If FFmpeg fails
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"Input file not found: {path}")
+
+    proxy_path = os.path.join(get_cache_dir("proxy"), f"{fingerprint}_{factor:.4f}.mp4")
+    if os.path.exists(proxy_path):
+        logger.info(f"Using cached proxy of {path}: {proxy_path}")
+        return proxy_path
+
+    temp_path = f"{proxy_path}.{os.getpid()}.tmp.mp4"
+    cmd = [
+        'ffmpeg',
+        '-i', path,
+        '-vf', f"scale=trunc(iw*{factor:.6f}/2)*2:trunc(ih*{factor:.6f}/2)*2",
+        '-c:v', 'libx264',
+        '-preset', PROXY_ENCODER_OPTIONS["preset"],
+        '-crf', PROXY_ENCODER_OPTIONS["crf"],
+        '-map', '0:v:0',
+        '-map', '0:a?',
+        '-c:a', 'copy',
+        '-y',
+        temp_path
+    ]
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error creating proxy of {path}: {e.stderr.decode()}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, proxy_path)
+    return proxy_path
+
+def preview_io(config: Dict[str, Any], input_path: Optional[str], output_path: Optional[str],
+               suffix: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Inputs and outputs of a preview render (proxy or time window).
+
+    Without an explicit output every output of the configuration gets
+    ``suffix`` before its extension, so a preview never overwrites the full
+    render (``out.mp4`` -> ``out.proxy360p.mp4``).
+
+    Args:
+        config: Pipeline configuration (linear or graph)
+        input_path: Input video (overrides value from configuration)
+        output_path: Output video (overrides value from configuration)
+        suffix: Suffix of default output names
+
+    Returns:
+        Tuple (input name -> path, output name -> path)
+    """
+    def with_suffix(path):
+        root, ext = os.path.splitext(path)
+        return f"{root}{suffix}{ext or '.mp4'}"
+
+    if "stages" in config:
+        inputs = dict(config.get("inputs") or {})
+        if input_path:
+            if len(inputs) > 1:
+                raise ValueError("Input override is ambiguous for a graph with several inputs")
+            inputs = {next(iter(inputs), "input"): input_path}
+        outputs = dict(config.get("outputs") or {})
+        if output_path:
+            if len(outputs) > 1:
+                raise ValueError("Output override is ambiguous for a graph with several outputs")
+            return inputs, {next(iter(outputs), "output"): output_path}
+        return inputs, {name: with_suffix(path) for name, path in outputs.items()}
+
+    input_file = input_path or config.get("input")
+    output_file = output_path or config.get("output")
+    if not input_file:
+        raise ValueError("Input file not specified")
+    if not output_file:
+        raise ValueError("Output file not specified")
+    return {"input": input_file}, {"output": output_file if output_path else with_suffix(output_file)}
+
+def apply_proxy(config: Dict[str, Any], inputs: Dict[str, str],
+                size: int) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Downscale inputs and pixel parameters for a proxy render.
+
+    All inputs are scaled by one factor (taken from the first input), so the
+    scaled parameters fit every stream of a graph.
+
+    Args:
+        config: Pipeline configuration
+        inputs: Input name -> path
+        size: Proxy size of the short side
+
+    Returns:
+        Tuple (scaled configuration, input name -> downscaled video)
+    """
+    factor = proxy_factor(next(iter(inputs.values())), size)
+    logger.info(f"Proxy render at {size}p: scale factor {factor:.3f}")
+    return proxy_config(config, factor), {name: make_proxy_input(path, factor) for name, path in inputs.items()}
+
+def run_preview(config_path: str, config: Dict[str, Any], inputs: Dict[str, str], outputs: Dict[str, str],
+                encoder_options: Optional[Dict[str, str]] = None, **kwargs):
+    """
+    Run a rewritten configuration on prepared inputs.
+
+    Args:
+        config_path: Path to the original configuration file
+        config: Rewritten configuration
+        inputs: Input name -> path
+        outputs: Output name -> path
+        encoder_options: x264 options for all stages
+        **kwargs: Additional arguments for Pipeline.process
+    """
+    if "stages" in config:
+        config = dict(config, inputs=inputs, outputs=outputs)
+        process_args = {}
+    else:
+        process_args = {"input_path": inputs["input"], "output_path": outputs["output"]}
+
+    with run_context(encoder_options=encoder_options):
+        Pipeline(config_path, config=config).process(**process_args, **kwargs)
+
+def process_proxy(config_path: str, proxy: str, input_path: Optional[str] = None,
+                  output_path: Optional[str] = None, variables: Optional[Dict[str, Any]] = None,
+                  **kwargs) -> Dict[str, str]:
+    """
+    Render a configuration at proxy resolution.
+
+    Inputs are downscaled first (cached), pixel parameters of all modules
+    are scaled by the same factor, and every stage encodes with
+    ``ultrafast``, so the whole chain previews several times faster with
+    the layout of the full render.
+
+    Args:
+        config_path: Path to the YAML configuration file
+        proxy: Proxy resolution, e.g. "360p"
+        input_path: Input video (overrides value from configuration)
+        output_path: Output video (default: output of the configuration
+            with a ``.proxy360p`` suffix)
+        variables: Values of ${name} variables in the configuration
+        **kwargs: Additional arguments for Pipeline.process (jobs, work_dir, ...)
+
+    Returns:
+        Mapping of output names to written files
+    """
+    size = parse_proxy(proxy)
+    config = Pipeline(config_path, variables=variables).config
+    inputs, outputs = preview_io(config, input_path, output_path, f".proxy{size}p")
+    config, inputs = apply_proxy(config, inputs, size)
+    run_preview(config_path, config, inputs, outputs, dict(PROXY_ENCODER_OPTIONS), **kwargs)
+    return outputs
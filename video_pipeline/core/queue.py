@@ -0,0 +1,173 @@
+"""
+Persistent SQLite job queue for the watch-folder daemon
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Статусы заданий
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    input_size INTEGER NOT NULL,
+    input_mtime REAL NOT NULL,
+    output_path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    UNIQUE (input_path, input_size, input_mtime)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+class JobQueue:
+    """
+    Job queue stored in a SQLite database.
+
+    A job is identified by the input path together with its size and mtime,
+    so the same file is never processed twice, while a replaced file is
+    queued again. Job states survive daemon restarts.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the queue database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, input_path: str, output_path: str) -> bool:
+        """
+        Add a job for the input file if it has not been queued yet.
+
+        Args:
+            input_path: Path to input video
+            output_path: Path to output video
+
+        Returns:
+            True if a new job was created
+        """
+        stat = os.stat(input_path)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (input_path, input_size, input_mtime, output_path, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(input_path), stat.st_size, stat.st_mtime, output_path, time.time())
+            )
+            return cursor.rowcount > 0
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest pending job and mark it as running.
+
+        Returns:
+            Job as a dictionary or None if the queue is empty
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (PENDING,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, error = NULL WHERE id = ?",
+                    (RUNNING, time.time(), row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(row)
+
+    def complete(self, job_id: int):
+        """
+        Mark a job as successfully completed.
+
+        Args:
+            job_id: Job identifier
+        """
+        self._finish(job_id, DONE, None)
+
+    def fail(self, job_id: int, error: str):
+        """
+        Mark a job as failed.
+
+        Args:
+            job_id: Job identifier
+            error: Error message
+        """
+        self._finish(job_id, FAILED, error)
+
+    def _finish(self, job_id: int, status: str, error: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def requeue(self, status: str) -> int:
+        """
+        Return all jobs with the given status to the pending state.
+
+        Used on startup for jobs interrupted by a crash (running) and,
+        on request, for failed jobs.
+
+        Args:
+            status: Status of jobs to requeue
+
+        Returns:
+            Number of requeued jobs
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (PENDING, status)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get the number of jobs in each status.
+
+        Returns:
+            Dictionary status -> number of jobs
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
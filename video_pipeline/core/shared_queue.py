@@ -0,0 +1,334 @@
+"""
+Job queue in a directory on a shared filesystem for workers on several hosts
+"""
+import os
+import json
+import time
+import socket
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Каталоги очереди; задание переходит между ними атомарным переименованием
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+LEASES = "leases"
+
+STATES = (PENDING, CLAIMED, DONE, FAILED)
+
+class LeaseLost(Exception):
+    """
+    The lease of a claimed job expired and the job was taken by another worker.
+    """
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """
+    Write a JSON file atomically (temporary file in the same directory and rename).
+    """
+    temp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Файл переименован другим воркером или еще не дописан
+        return None
+
+class SharedQueue:
+    """
+    Job queue stored as JSON files in a directory on a shared filesystem (NFS, SMB).
+
+    Every job is a file that moves between ``pending/``, ``claimed/``,
+    ``done/`` and ``failed/``. A worker claims a job by renaming it from
+    ``pending/`` to ``claimed/``: rename is atomic on the file server, so
+    exactly one of the competing workers succeeds. While a job runs, its
+    worker keeps a lease file in ``leases/`` fresh (heartbeat). A job whose
+    lease has not been refreshed for ``lease_seconds`` (crashed worker,
+    lost host) is returned to ``pending/`` by any other worker.
+
+    No locks and no database are needed, so the queue works on filesystems
+    where SQLite locking is unreliable. Clocks of the hosts must be
+    synchronized (NTP) to well within ``lease_seconds``.
+    """
+
+    def __init__(self, root: str, lease_seconds: float = 60.0, max_attempts: int = 3):
+        """
+        Open (or create) the queue directory.
+
+        Args:
+            root: Queue directory
+            lease_seconds: Time after the last heartbeat when a claimed job is reclaimed
+            max_attempts: Claims of a job before it is moved to failed/
+        """
+        self.root = os.path.abspath(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        for state in STATES + (LEASES,):
+            os.makedirs(os.path.join(self.root, state), exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.root, state, f"{job_id}.json")
+
+    def _lease_path(self, job_id: str) -> str:
+        return os.path.join(self.root, LEASES, f"{job_id}.lease")
+
+    def _job_ids(self, state: str) -> List[str]:
+        directory = os.path.join(self.root, state)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-len(".json")] for name in names if name.endswith(".json")]
+
+    def add(self, input_path: str, output_path: str, config_path: Optional[str] = None) -> bool:
+        """
+        Add a job for the input file if it is not in the queue yet.
+
+        Like JobQueue, a job is identified by the input path together with
+        its size and mtime.
+
+        Args:
+            input_path: Path to input video (must be visible to all workers)
+            output_path: Path to output video
+            config_path: Path to the YAML configuration (default: configuration of the worker)
+
+        Returns:
+            True if a new job was created
+        """
+        input_path = os.path.abspath(input_path)
+        stat = os.stat(input_path)
+        key = f"{input_path}:{stat.st_size}:{stat.st_mtime}"
+        job_id = hashlib.sha1(key.encode()).hexdigest()[:16]
+        if any(os.path.exists(self._path(state, job_id)) for state in STATES):
+            return False
+
+        _write_json(self._path(PENDING, job_id), {
+            "id": job_id,
+            "input_path": input_path,
+            "output_path": os.path.abspath(output_path),
+            "config_path": os.path.abspath(config_path) if config_path else None,
+            "attempts": 0,
+            "error": None,
+            "created_at": time.time(),
+        })
+        return True
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest pending job.
+
+        Args:
+            worker_id: Identifier of the claiming worker (host, process, thread)
+
+        Returns:
+            Job as a dictionary or None if no job could be claimed
+        """
+        pending = []
+        for job_id in self._job_ids(PENDING):
+            try:
+                pending.append((os.stat(self._path(PENDING, job_id)).st_mtime, job_id))
+            except FileNotFoundError:
+                continue
+
+        for _, job_id in sorted(pending):
+            claimed_path = self._path(CLAIMED, job_id)
+            try:
+                os.rename(self._path(PENDING, job_id), claimed_path)
+            except FileNotFoundError:
+                # Задание забрал другой воркер
+                continue
+            # Аренда до записи файла аренды отсчитывается от переименования (ctime)
+            try:
+                self.heartbeat(job_id, worker_id)
+            except LeaseLost:
+                continue
+            job = _read_json(claimed_path)
+            if job is None:
+                logger.error(f"Unreadable job file {claimed_path}, moving to failed")
+                self._move(CLAIMED, FAILED, job_id)
+                continue
+            job["attempts"] = job.get("attempts", 0) + 1
+            job["worker"] = worker_id
+            job["started_at"] = time.time()
+            _write_json(claimed_path, job)
+            return job
+        return None
+
+    def heartbeat(self, job_id: str, worker_id: str):
+        """
+        Refresh the lease of a claimed job.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the worker holding the job
+
+        Raises:
+            LeaseLost: If the job is no longer claimed by this worker
+        """
+        lease = _read_json(self._lease_path(job_id))
+        if lease is not None and lease.get("worker") != worker_id:
+            raise LeaseLost(f"Job {job_id} is claimed by {lease.get('worker')}")
+        if not os.path.exists(self._path(CLAIMED, job_id)):
+            raise LeaseLost(f"Job {job_id} is no longer claimed")
+        _write_json(self._lease_path(job_id), {
+            "worker": worker_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "heartbeat": time.time(),
+        })
+
+    def complete(self, job_id: str, worker_id: str):
+        """
+        Mark a claimed job as successfully completed.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the worker holding the job
+
+        Raises:
+            LeaseLost: If the job was reclaimed in the meantime
+        """
+        self._finish(job_id, worker_id, DONE, None)
+
+    def fail(self, job_id: str, worker_id: str, error: str):
+        """
+        Mark a claimed job as failed.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Identifier of the worker holding the job
+            error: Error message
+
+        Raises:
+            LeaseLost: If the job was reclaimed in the meantime
+        """
+        self._finish(job_id, worker_id, FAILED, error)
+
+    def _finish(self, job_id: str, worker_id: str, state: str, error: Optional[str]):
+        # Проверка владельца; задание, отобранное по истечении аренды, не трогаем
+        self.heartbeat(job_id, worker_id)
+        private_path = self._take(job_id, state)
+        if private_path is None:
+            raise LeaseLost(f"Job {job_id} is no longer claimed")
+        job = _read_json(private_path) or {"id": job_id}
+        job.update(error=error, finished_at=time.time())
+        self._remove_lease(job_id)
+        _write_json(self._path(state, job_id), job)
+        os.remove(private_path)
+
+    def _take(self, job_id: str, action: str) -> Optional[str]:
+        """
+        Rename a claimed job file to a name unique for this process.
+
+        Only one of several workers finishing or reclaiming the same job at
+        once succeeds; the job is rewritten from the private copy.
+
+        Returns:
+            Path of the private copy or None if the job is no longer claimed
+        """
+        claimed_path = self._path(CLAIMED, job_id)
+        private_path = f"{claimed_path}.{action}.{socket.gethostname()}.{os.getpid()}"
+        try:
+            os.rename(claimed_path, private_path)
+        except FileNotFoundError:
+            return None
+        return private_path
+
+    def _move(self, source: str, target: str, job_id: str) -> bool:
+        try:
+            os.rename(self._path(source, job_id), self._path(target, job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _remove_lease(self, job_id: str):
+        try:
+            os.remove(self._lease_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _lease_age(self, job_id: str) -> Optional[float]:
+        """
+        Seconds since the last heartbeat of a claimed job (None if it is not claimed).
+        """
+        try:
+            stat = os.stat(self._lease_path(job_id))
+            last = stat.st_mtime
+        except FileNotFoundError:
+            # Воркер упал между переименованием и первой записью аренды
+            try:
+                last = os.stat(self._path(CLAIMED, job_id)).st_ctime
+            except FileNotFoundError:
+                return None
+        return time.time() - last
+
+    def reclaim_expired(self) -> int:
+        """
+        Return claimed jobs with expired leases to pending.
+
+        Jobs that already used ``max_attempts`` claims are moved to failed/.
+
+        Returns:
+            Number of reclaimed jobs
+        """
+        reclaimed = 0
+        for job_id in self._job_ids(CLAIMED):
+            age = self._lease_age(job_id)
+            if age is None or age < self.lease_seconds:
+                continue
+
+            private_path = self._take(job_id, "reclaim")
+            if private_path is None:
+                continue
+
+            job = _read_json(private_path) or {"id": job_id, "attempts": self.max_attempts}
+            lease = _read_json(self._lease_path(job_id)) or {}
+            job["error"] = f"Lease of {lease.get('worker', 'unknown worker')} expired after {age:.0f}s"
+            target = FAILED if job.get("attempts", 0) >= self.max_attempts else PENDING
+            # Аренда удаляется до возврата задания, чтобы новый воркер не увидел старую
+            self._remove_lease(job_id)
+            _write_json(self._path(target, job_id), job)
+            os.remove(private_path)
+
+            logger.warning(f"Job {job_id} ({job.get('input_path')}): {job['error']}, moved to {target}")
+            reclaimed += 1
+        return reclaimed
+
+    def requeue_failed(self) -> int:
+        """
+        Return all failed jobs to pending with a fresh attempt count.
+
+        Returns:
+            Number of requeued jobs
+        """
+        requeued = 0
+        for job_id in self._job_ids(FAILED):
+            failed_path = self._path(FAILED, job_id)
+            job = _read_json(failed_path)
+            if job is None:
+                continue
+            # Задание переписывается до переноса: в pending/ его сразу может забрать воркер
+            job.update(attempts=0, error=None)
+            _write_json(failed_path, job)
+            if self._move(FAILED, PENDING, job_id):
+                requeued += 1
+        return requeued
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get the number of jobs in each state.
+
+        Returns:
+            Dictionary state -> number of jobs
+        """
+        return {state: len(self._job_ids(state)) for state in STATES}
@@ -0,0 +1,241 @@
+"""
+Quality-versus-speed sweep of x264 encoder settings
+"""
+import os
+import re
+import json
+import math
+import time
+import shutil
+import logging
+import tempfile
+import itertools
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Sequence
+
+from video_pipeline.core.context import run_context
+from video_pipeline.core.deadline import PRESET_NAMES
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.probe import probe, media_duration, video_stream, frame_rate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRESETS = ["veryfast", "faster", "fast", "medium", "slow"]
+DEFAULT_CRFS = [18, 20, 23]
+DEFAULT_THREADS = [0]
+
+_SSIM_RE = re.compile(r"SSIM .*All:([0-9.]+)")
+_PSNR_RE = re.compile(r"PSNR .*average:([0-9.]+|inf)")
+
+@dataclass
+class SweepResult:
+    """
+    Measurements of one combination of encoder settings.
+
+    Attributes:
+        preset: x264 preset
+        crf: Constant rate factor
+        threads: Encoder threads (0 - chosen by x264)
+        seconds: Encoding time
+        fps: Encoding speed in frames per second
+        size: Output size in bytes
+        bitrate: Output video bitrate in kbit/s
+        ssim: SSIM against the sample (1.0 - identical)
+        psnr: PSNR against the sample in dB
+        pareto: True if no other combination is at least as fast, as small
+            and as good and better in one of these
+    """
+    preset: str
+    crf: int
+    threads: int
+    seconds: float
+    fps: float
+    size: int
+    bitrate: float
+    ssim: float
+    psnr: float
+    pareto: bool = False
+
+def _dominates(a: SweepResult, b: SweepResult) -> bool:
+    not_worse = a.fps >= b.fps and a.size <= b.size and a.ssim >= b.ssim
+    better = a.fps > b.fps or a.size < b.size or a.ssim > b.ssim
+    return not_worse and better
+
+def pareto_frontier(results: List[SweepResult]) -> List[SweepResult]:
+    """
+    Mark and return the combinations on the Pareto frontier of speed, size and SSIM.
+
+    Args:
+        results: Sweep results
+
+    Returns:
+        Results on the frontier, fastest first
+    """
+    for result in results:
+        result.pareto = not any(_dominates(other, result) for other in results if other is not result)
+    return sorted((r for r in results if r.pareto), key=lambda r: -r.fps)
+
+def measure_quality(encoded: str, reference: str) -> Dict[str, float]:
+    """
+    Compare an encoded video with its reference using FFmpeg's ssim and psnr filters.
+
+    Args:
+        encoded: Path to the encoded video
+        reference: Path to the reference video
+
+    Returns:
+        Dictionary with keys ssim and psnr
+
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg fails
+        ValueError: If FFmpeg did not report the metrics
+    """
+    cmd = [
+        'ffmpeg',
+        '-hide_banner',
+        '-i', encoded,
+        '-i', reference,
+        '-lavfi', "[0:v]split[e0][e1];[1:v]split[r0][r1];[e0][r0]ssim;[e1][r1]psnr",
+        '-f', 'null',
+        '-'
+    ]
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    output = result.stderr.decode('utf-8', errors='ignore')
+
+    ssim = _SSIM_RE.search(output)
+    psnr = _PSNR_RE.search(output)
+    if not ssim or not psnr:
+        raise ValueError(f"FFmpeg did not report SSIM/PSNR for {encoded}")
+    return {"ssim": float(ssim.group(1)), "psnr": float(psnr.group(1))}
+
+def run_sweep(sample: str, presets: Sequence[str] = DEFAULT_PRESETS, crfs: Sequence[int] = DEFAULT_CRFS,
+              threads: Sequence[int] = DEFAULT_THREADS, work_dir: Optional[str] = None) -> List[SweepResult]:
+    """
+    Encode a sample clip with every combination of presets, CRFs and thread counts.
+
+    Only video is encoded. Speed is measured from the frames reported by
+    ``ffmpeg -progress``, quality with the ssim and psnr filters against
+    the sample itself.
+
+    Args:
+        sample: Path to the sample clip
+        presets: x264 presets
+        crfs: CRF values
+        threads: Thread counts (0 - chosen by x264)
+        work_dir: Directory for encoded files (default: temporary, removed afterwards)
+
+    Returns:
+        Results in the order of the grid, with the Pareto frontier marked
+
+    Raises:
+        ValueError: If a preset is unknown or the sample cannot be read
+    """
+    unknown = [p for p in presets if p not in PRESET_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown presets: {', '.join(unknown)}")
+
+    info = probe(sample)
+    duration = media_duration(info) or 0.0
+    expected_frames = duration * (frame_rate(video_stream(info) or {}) or 0.0)
+
+    temp_dir = None
+    if work_dir is None:
+        work_dir = temp_dir = tempfile.mkdtemp(prefix="video_pipeline_sweep_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = []
+    grid = list(itertools.product(presets, crfs, threads))
+    try:
+        for number, (preset, crf, thread_count) in enumerate(grid, 1):
+            output_path = os.path.join(work_dir, f"{preset}_crf{crf}_t{thread_count}.mp4")
+            cmd = [
+                'ffmpeg',
+                '-i', sample,
+                '-map', '0:v:0',
+                '-an',
+                '-c:v', 'libx264',
+                '-preset', preset,
+                '-crf', str(crf),
+                '-threads', str(thread_count),
+                '-y',
+                output_path
+            ]
+
+            frames = []
+            start_time = time.monotonic()
+            try:
+                # Настройки энкодера из контекста не должны менять сетку
+                with run_context(encoder_options=None, progress=lambda p: frames.append(p.frame)):
+                    run_ffmpeg(cmd)
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Error encoding {preset}/crf {crf}/{thread_count} threads: {e.stderr.decode()}")
+                raise
+            seconds = time.monotonic() - start_time
+
+            size = os.path.getsize(output_path)
+            frame_count = max(frames, default=0) or expected_frames
+            quality = measure_quality(output_path, sample)
+            result = SweepResult(
+                preset=preset,
+                crf=int(crf),
+                threads=int(thread_count),
+                seconds=round(seconds, 3),
+                fps=round(frame_count / seconds, 2) if seconds > 0 else 0.0,
+                size=size,
+                bitrate=round(size * 8 / duration / 1000, 1) if duration else 0.0,
+                ssim=quality["ssim"],
+                psnr=quality["psnr"],
+            )
+            results.append(result)
+            logger.info(f"[{number}/{len(grid)}] preset {preset}, crf {crf}, threads {thread_count}: "
+                        f"{result.fps:.1f} fps, {size / 1e6:.2f} MB, SSIM {result.ssim:.4f}, PSNR {result.psnr:.2f}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    pareto_frontier(results)
+    return results
+
+def format_table(results: List[SweepResult]) -> str:
+    """
+    Format sweep results as a text table; the Pareto frontier is marked with ``*``.
+    """
+    header = f"{'':1} {'preset':<10} {'crf':>4} {'threads':>7} {'fps':>8} {'size MB':>8} {'kbit/s':>8} {'SSIM':>7} {'PSNR':>6}"
+    lines = [header, "-" * len(header)]
+    for r in sorted(results, key=lambda r: (not r.pareto, -r.fps)):
+        lines.append(f"{'*' if r.pareto else '':1} {r.preset:<10} {r.crf:>4} {r.threads:>7} {r.fps:>8.1f} "
+                     f"{r.size / 1e6:>8.2f} {r.bitrate:>8.0f} {r.ssim:>7.4f} {r.psnr:>6.2f}")
+    return "\n".join(lines)
+
+def _result_json(result: SweepResult) -> Dict[str, Any]:
+    data = asdict(result)
+    # PSNR одинаковых кадров бесконечен, а в строгом JSON нет Infinity
+    for name, value in data.items():
+        if isinstance(value, float) and not math.isfinite(value):
+            data[name] = None
+    return data
+
+def save_results(results: List[SweepResult], path: str, sample: str):
+    """
+    Save sweep results as JSON.
+
+    Non-finite values (PSNR of an output identical to the sample is
+    infinite) are written as ``null``, so the file is standard JSON.
+
+    Args:
+        results: Sweep results
+        path: Path to the JSON file
+        sample: Sample clip the results were measured on
+    """
+    data: Dict[str, Any] = {
+        "sample": os.path.abspath(sample),
+        "results": [_result_json(r) for r in results],
+        "pareto": [_result_json(r) for r in sorted((r for r in results if r.pareto), key=lambda r: -r.fps)],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, allow_nan=False)
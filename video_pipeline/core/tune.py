@@ -0,0 +1,392 @@
+"""
+Host auto-tuning: parallel jobs × encoder threads for a configuration
+"""
+import os
+import json
+import time
+import shutil
+import socket
+import logging
+import tempfile
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from video_pipeline.core.context import current_context, run_context
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+from video_pipeline.utils.probe import probe, media_duration, video_stream, frame_rate
+
+logger = logging.getLogger(__name__)
+
+# Интервал опроса памяти процессов FFmpeg во время замера
+_MEMORY_POLL_INTERVAL = 0.2
+
+@dataclass
+class LayoutResult:
+    """
+    Measurements of one layout.
+
+    Attributes:
+        workers: Jobs processed in parallel
+        threads: Encoder threads of every job
+        seconds: Wall time of the workload
+        fps: Aggregate speed in input frames per second over all jobs
+        memory_mb: Peak resident memory of all FFmpeg processes at once
+            (None where it cannot be measured)
+        best: True for the layout written to the host profile
+    """
+    workers: int
+    threads: int
+    seconds: float
+    fps: float
+    memory_mb: Optional[float]
+    best: bool = False
+
+@dataclass
+class HostProfile:
+    """
+    Best layout of a host.
+
+    Attributes:
+        workers: Jobs processed in parallel
+        threads: Encoder threads of every job
+        fps: Aggregate speed measured with this layout
+        memory_mb: Peak memory measured with this layout
+        config: Configuration the layout was tuned with
+        cpu_count: Logical CPUs of the host when tuned
+        tuned_at: Unix time of the measurement
+    """
+    workers: int
+    threads: int
+    fps: float = 0.0
+    memory_mb: Optional[float] = None
+    config: Optional[str] = None
+    cpu_count: Optional[int] = None
+    tuned_at: Optional[float] = None
+
+def profile_path() -> str:
+    """
+    Get the path of the host profile.
+
+    The profile is stored in the cache directory under the host name, so
+    hosts sharing a home directory keep separate profiles. The path can be
+    overridden with VIDEO_PIPELINE_HOST_PROFILE.
+
+    Returns:
+        Path to the JSON profile
+    """
+    path = os.environ.get("VIDEO_PIPELINE_HOST_PROFILE")
+    if path:
+        return path
+    return os.path.join(get_cache_dir("profiles"), f"{socket.gethostname()}.json")
+
+def load_host_profile(config_path: Optional[str] = None, path: Optional[str] = None) -> Optional[HostProfile]:
+    """
+    Load the host profile.
+
+    Args:
+        config_path: Configuration to get the layout for; the layout tuned
+            with it is preferred over the last tuned one
+        path: Path to the profile (default: profile_path())
+
+    Returns:
+        Host profile or None if the host was not tuned
+    """
+    try:
+        data = load_json(path or profile_path())
+    except OSError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    layout = data.get("configs", {}).get(os.path.abspath(config_path)) if config_path else None
+    layout = layout or data.get("default")
+    if not isinstance(layout, dict):
+        return None
+    try:
+        return HostProfile(**layout)
+    except TypeError:
+        logger.warning(f"Ignoring damaged host profile {path or profile_path()}")
+        return None
+
+def save_host_profile(profile: HostProfile, path: Optional[str] = None):
+    """
+    Save a layout as the default of the host and as the layout of its configuration.
+
+    Args:
+        profile: Tuned layout
+        path: Path to the profile (default: profile_path())
+    """
+    path = path or profile_path()
+    data = load_json(path)
+    if not isinstance(data, dict):
+        data = {}
+    data["host"] = socket.gethostname()
+    data["default"] = asdict(profile)
+    if profile.config:
+        data.setdefault("configs", {})[profile.config] = asdict(profile)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    save_json(path, data)
+
+def host_layout(workers: Optional[int], default_workers: int,
+                config_path: Optional[str] = None) -> Tuple[int, Dict[str, str]]:
+    """
+    Choose parallel jobs and encoder options from the host profile.
+
+    Workers given explicitly win; the threads of the profile are then
+    spread over them so the host is loaded the same way.
+
+    Args:
+        workers: Parallel jobs requested on the command line (None - not given)
+        default_workers: Parallel jobs without a host profile
+        config_path: Configuration of the jobs
+
+    Returns:
+        Tuple (parallel jobs, x264 options for the run context)
+    """
+    profile = load_host_profile(config_path)
+    if profile is None:
+        return max(1, workers or default_workers), {}
+
+    if workers is None:
+        logger.info(f"Host profile: {profile.workers} workers x {profile.threads} threads")
+        return max(1, profile.workers), {"threads": str(profile.threads)}
+    threads = max(1, round(profile.workers * profile.threads / max(1, workers)))
+    return max(1, workers), {"threads": str(threads)}
+
+def encoder_context(options: Dict[str, str]):
+    """
+    Run context with the layout options of the host profile.
+
+    The options are stored apart from ``encoder_options``: Pipeline merges
+    them under the options of the run, so options of the deadline planner
+    or of the caller win. Without options the context is left unchanged.
+    """
+    if not options:
+        return nullcontext()
+    return run_context(layout_options={**(current_context().layout_options or {}), **options})
+
+def default_layouts(cpu_count: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Layouts that use all CPUs: 1 × N, 2 × N/2, 4 × N/4, ..., N × 1.
+
+    Args:
+        cpu_count: Logical CPUs (default: os.cpu_count())
+
+    Returns:
+        List of (workers, threads)
+    """
+    cpu_count = max(1, cpu_count or os.cpu_count() or 1)
+    workers = []
+    count = 1
+    while count < cpu_count:
+        workers.append(count)
+        count *= 2
+    workers.append(cpu_count)
+    return [(w, max(1, cpu_count // w)) for w in workers]
+
+def parse_layouts(text: str) -> List[Tuple[int, int]]:
+    """
+    Parse layouts such as ``2x8,8x2``.
+
+    Raises:
+        ValueError: If a layout is not WORKERSxTHREADS with positive numbers
+    """
+    layouts = []
+    for item in text.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        workers, sep, threads = item.partition("x")
+        if not sep or not workers.isdigit() or not threads.isdigit() or not int(workers) or not int(threads):
+            raise ValueError(f"Invalid layout '{item}', expected WORKERSxTHREADS (e.g. 2x8)")
+        layouts.append((int(workers), int(threads)))
+    return layouts
+
+def _descendant_rss() -> Optional[int]:
+    """
+    Resident memory of all child processes of this process in bytes (Linux /proc only).
+    """
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return None
+
+    parents = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                # Имя процесса в скобках может содержать пробелы
+                fields = f.read().rsplit(b")", 1)[1].split()
+            parents[int(pid)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    own = {os.getpid()}
+    changed = True
+    while changed:
+        changed = False
+        for pid, parent in parents.items():
+            if parent in own and pid not in own:
+                own.add(pid)
+                changed = True
+    own.discard(os.getpid())
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in own:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+class _MemoryMonitor:
+    """
+    Background sampler of the peak memory of child processes.
+    """
+
+    def __init__(self):
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, name="memory-monitor", daemon=True)
+
+    def _poll(self):
+        while not self._stop.is_set():
+            rss = _descendant_rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(_MEMORY_POLL_INTERVAL)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def run_tune(config: Dict[str, Any], sample: str, layouts: Sequence[Tuple[int, int]],
+             config_path: Optional[str] = None, rounds: int = 1,
+             max_memory_mb: Optional[float] = None) -> List[LayoutResult]:
+    """
+    Run the configuration on a sample clip with every layout.
+
+    For a layout of W workers × T threads, W × rounds copies of the sample
+    are processed by the compiled configuration, W at a time, with x264
+    limited to T threads. The aggregate speed is the number of input frames
+    of all copies divided by the wall time; memory is the peak resident
+    memory of all FFmpeg processes at once.
+
+    Args:
+        config: Pipeline configuration
+        sample: Path to the sample clip
+        layouts: List of (workers, threads)
+        config_path: Path of the configuration file
+        rounds: Copies of the sample per worker
+        max_memory_mb: Layouts above this peak memory are not chosen
+
+    Returns:
+        Results in the order of layouts; the best one is marked
+
+    Raises:
+        ValueError: If the configuration has errors or several inputs, the sample cannot be
+            read or a job of the workload fails
+    """
+    from video_pipeline.core.pipeline import CompiledPipeline
+    from video_pipeline.core.preflight import input_files
+
+    # Все копии образца пишутся в разные файлы, поэтому нужен один вход и один выход
+    if len(input_files(config)) > 1 or len(config.get("outputs") or {}) > 1:
+        raise ValueError("Tuning needs a configuration with one input and one output")
+
+    info = probe(sample)
+    frames = (media_duration(info) or 0.0) * (frame_rate(video_stream(info) or {}) or 0.0)
+    if frames <= 0:
+        raise ValueError(f"Cannot determine the number of frames of {sample}")
+
+    pipeline = CompiledPipeline(config, config_path=config_path)
+    work_dir = tempfile.mkdtemp(prefix="video_pipeline_tune_")
+    extension = os.path.splitext(sample)[1] or ".mp4"
+    results = []
+    try:
+        for number, (workers, threads) in enumerate(layouts, 1):
+            jobs = [(sample, os.path.join(work_dir, f"{workers}x{threads}_{i}{extension}"))
+                    for i in range(workers * max(1, rounds))]
+            with _MemoryMonitor() as monitor:
+                start_time = time.monotonic()
+                with run_context(encoder_options={"threads": str(threads)}):
+                    outcomes = pipeline.map(jobs, workers=workers)
+                seconds = time.monotonic() - start_time
+
+            errors = [e for _, _, e in outcomes if e is not None]
+            if errors:
+                raise ValueError(f"Workload failed with {workers} workers x {threads} threads: {str(errors[0])}")
+            for _, output_path, _ in outcomes:
+                if os.path.isfile(output_path):
+                    os.remove(output_path)
+
+            result = LayoutResult(
+                workers=workers,
+                threads=threads,
+                seconds=round(seconds, 3),
+                fps=round(frames * len(jobs) / seconds, 2) if seconds > 0 else 0.0,
+                memory_mb=round(monitor.peak / 2 ** 20, 1) if monitor.peak is not None else None,
+            )
+            results.append(result)
+            logger.info(f"[{number}/{len(layouts)}] {workers} workers x {threads} threads: "
+                        f"{result.fps:.1f} fps" + (f", {result.memory_mb:.0f} MB" if result.memory_mb else ""))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    allowed = [r for r in results if max_memory_mb is None or r.memory_mb is None or r.memory_mb <= max_memory_mb]
+    if allowed:
+        # При равной скорости меньше памяти
+        best = max(allowed, key=lambda r: (r.fps, -(r.memory_mb or 0.0)))
+        best.best = True
+    return results
+
+def best_profile(results: List[LayoutResult], config_path: Optional[str] = None) -> Optional[HostProfile]:
+    """
+    Build the host profile from tuning results.
+
+    Returns:
+        Profile of the best layout or None if no layout fits the memory limit
+    """
+    best = next((r for r in results if r.best), None)
+    if best is None:
+        return None
+    return HostProfile(
+        workers=best.workers,
+        threads=best.threads,
+        fps=best.fps,
+        memory_mb=best.memory_mb,
+        config=os.path.abspath(config_path) if config_path else None,
+        cpu_count=os.cpu_count(),
+        tuned_at=time.time(),
+    )
+
+def format_table(results: List[LayoutResult]) -> str:
+    """
+    Format tuning results as a text table; the best layout is marked with ``*``.
+    """
+    header = f"{'':1} {'workers':>7} {'threads':>7} {'seconds':>8} {'fps':>8} {'memory MB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        memory = f"{r.memory_mb:>10.0f}" if r.memory_mb is not None else f"{'-':>10}"
+        lines.append(f"{'*' if r.best else '':1} {r.workers:>7} {r.threads:>7} {r.seconds:>8.2f} {r.fps:>8.1f} {memory}")
+    return "\n".join(lines)
+
+def save_results(results: List[LayoutResult], path: str, sample: str):
+    """
+    Save tuning results as JSON.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"sample": os.path.abspath(sample), "results": [asdict(r) for r in results]}, f, indent=2)
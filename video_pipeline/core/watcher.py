@@ -0,0 +1,228 @@
+"""
+Detection of new input files in a watched directory
+"""
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import select
+import struct
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Флаги inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+class Inotify:
+    """
+    Minimal ctypes wrapper around Linux inotify.
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}
+
+    def add_watch(self, path: str):
+        """
+        Start watching a directory.
+
+        Args:
+            path: Directory path
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self._watches[wd] = path
+
+    def read_events(self, timeout: float) -> List[Tuple[str, int]]:
+        """
+        Wait for events.
+
+        Args:
+            timeout: Maximum waiting time in seconds
+
+        Returns:
+            List of (path, mask) pairs
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._watches.get(wd)
+            if directory is not None and name:
+                events.append((os.path.join(directory, os.fsdecode(name)), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class FolderWatcher:
+    """
+    Watches a directory tree and reports files that finished copying.
+
+    New files are reported by inotify on Linux (with a polling fallback
+    elsewhere). A file is considered complete only when its size and
+    mtime stay unchanged for ``stable_seconds``, so half-copied inputs are
+    never picked up.
+    """
+
+    def __init__(self, watch_dir: str, pattern: str = "*.mp4", stable_seconds: float = 5.0,
+                 poll_interval: float = 2.0, use_inotify: bool = True,
+                 exclude_dirs: Optional[List[str]] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            watch_dir: Directory to watch (recursively)
+            pattern: Glob pattern of input file names
+            stable_seconds: Time during which the file must not change
+            poll_interval: Rescan interval when inotify is not available
+            use_inotify: Use inotify if available
+            exclude_dirs: Directories whose files are ignored (e.g. output directory)
+        """
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.pattern = pattern
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.exclude_dirs = [os.path.abspath(d) for d in (exclude_dirs or [])]
+
+        # path -> (size, mtime, время последнего изменения)
+        self._candidates: Dict[str, Tuple[int, float, float]] = {}
+        # Уже выданные файлы: path -> (size, mtime)
+        self._reported: Dict[str, Tuple[int, float]] = {}
+        self._last_scan = 0.0
+        self._inotify = None
+
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = Inotify()
+                for directory in self._iter_dirs():
+                    self._inotify.add_watch(directory)
+                logger.info(f"Watching {self.watch_dir} with inotify")
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify is not available, falling back to polling: {str(e)}")
+                self._inotify = None
+
+        # Файлы, появившиеся пока демон не работал
+        self._scan()
+
+    def _iter_dirs(self):
+        for root, dirs, _ in os.walk(self.watch_dir):
+            dirs[:] = [d for d in dirs if not self._is_excluded(os.path.join(root, d))]
+            yield root
+
+    def _is_excluded(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        return any(path == d or path.startswith(d + os.sep) for d in self.exclude_dirs)
+
+    def _matches(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return (fnmatch.fnmatch(name, self.pattern)
+                and not name.startswith(".")
+                and not self._is_excluded(path))
+
+    def _scan(self):
+        """
+        Full rescan of the directory tree.
+        """
+        for directory in self._iter_dirs():
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    self._touch(path)
+        self._last_scan = time.monotonic()
+
+    def _touch(self, path: str):
+        """
+        Register a candidate file or update its state.
+        """
+        if not self._matches(path):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._candidates.pop(path, None)
+            return
+
+        if self._reported.get(path) == (stat.st_size, stat.st_mtime):
+            return
+
+        previous = self._candidates.get(path)
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+            self._candidates[path] = (stat.st_size, stat.st_mtime, time.monotonic())
+
+    def poll(self, timeout: float = 1.0) -> List[str]:
+        """
+        Wait for file system changes and return files that became stable.
+
+        Args:
+            timeout: Maximum waiting time in seconds
+
+        Returns:
+            List of paths of complete files
+        """
+        if self._inotify is not None:
+            for path, mask in self._inotify.read_events(timeout):
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not self._is_excluded(path):
+                        self._inotify.add_watch(path)
+                        self._scan()
+                else:
+                    self._touch(path)
+        else:
+            time.sleep(timeout)
+            if time.monotonic() - self._last_scan >= self.poll_interval:
+                self._scan()
+
+        # Повторно проверяем кандидатов: размер и mtime не должны меняться
+        now = time.monotonic()
+        stable = []
+        for path in list(self._candidates):
+            self._touch(path)
+            state = self._candidates.get(path)
+            if state is not None and now - state[2] >= self.stable_seconds:
+                stable.append(path)
+                self._reported[path] = state[:2]
+                del self._candidates[path]
+        return stable
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
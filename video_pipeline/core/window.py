@@ -0,0 +1,200 @@
+"""
+Rendering a time window of the input for previews
+"""
+import os
+import re
+import copy
+import logging
+import subprocess
+from typing import Dict, Any, Optional, Tuple
+
+from video_pipeline.core.pipeline import Pipeline
+from video_pipeline.core.proxy import PROXY_ENCODER_OPTIONS, apply_proxy, parse_proxy, preview_io, run_preview
+from video_pipeline.modules.registry import get_module_class
+from video_pipeline.utils.cache import get_cache_dir
+from video_pipeline.utils.fingerprint import file_fingerprint
+from video_pipeline.utils.packets import packet_index
+from video_pipeline.utils.probe import probe, media_duration
+
+logger = logging.getLogger(__name__)
+
+def parse_time(value: str) -> float:
+    """
+    Parse a position such as ``45``, ``45.5``, ``0:45`` or ``1:02:03``.
+
+    Args:
+        value: Position from the command line
+
+    Returns:
+        Seconds
+
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    text = str(value).strip()
+    if not re.fullmatch(r"\d+(\.\d+)?|(\d+:){1,2}\d+(\.\d+)?", text):
+        raise ValueError(f"Invalid time: {value}")
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def window_config(config: Dict[str, Any], start: float, end: float) -> Dict[str, Any]:
+    """
+    Rewrite a configuration for rendering only the window [start, end] of the input.
+
+    Time parameters of every module are rebased to the start of the window
+    (see BaseModule.window_params), so the window looks exactly like the
+    same seconds of the full render. Modules that cut the video shift the
+    window for the stages after them. In graph configurations the window
+    follows the streams.
+
+    Args:
+        config: Pipeline configuration (linear or graph)
+        start: Start of the window in seconds of the input
+        end: End of the window in seconds of the input
+
+    Returns:
+        New configuration
+
+    Raises:
+        ValueError: If the window does not overlap a fragment cut by the configuration
+    """
+    config = copy.deepcopy(config)
+
+    def rebase(stage, window):
+        try:
+            module_class = get_module_class(stage.get("name", ""))
+        except (ImportError, AttributeError):
+            # Ошибку в имени модуля покажет проверка конфигурации
+            return window
+        stage["params"], *window = module_class.window_params(stage.get("params") or {}, *window)
+        return tuple(window)
+
+    if "stages" not in config:
+        window = (start, end)
+        for stage in config.get("modules") or []:
+            window = rebase(stage, window)
+        return config
+
+    # Окно каждого потока графа: входы начинаются с начала окна
+    inputs = config.get("inputs") or {}
+    windows: Dict[str, Tuple[float, float]] = {name: (start, end) for name in inputs}
+    previous = next(iter(inputs), None) if len(inputs) == 1 else None
+    for index, stage in enumerate(config.get("stages") or []):
+        window = rebase(stage, windows.get(stage.get("input", previous), (start, end)))
+        previous = stage.get("output") or f"{stage.get('name')}_{index}"
+        windows[previous] = window
+    return config
+
+def make_window_input(path: str, start: float, end: float) -> str:
+    """
+    Extract a time window of an input video.
+
+    The input is seeked before decoding (fast) and re-encoded, so the window
+    starts exactly at ``start`` and not at the previous keyframe. When
+    ``start`` is a keyframe (packet index), the video is copied instead.
+    The result is cached by file fingerprint and window.
+
+    Args:
+        path: Path to the input video
+        start: Start of the window in seconds
+        end: End of the window in seconds
+
+    Returns:
+        Path to the extracted window
+
+    Raises:
+        FileNotFoundError: If the input does not exist
+        subprocess.CalledProcessError: If FFmpeg fails
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"Input file not found: {path}")
+
+    window_path = os.path.join(get_cache_dir("window"), f"{fingerprint}_{start:.3f}_{end:.3f}.mp4")
+    if os.path.exists(window_path):
+        logger.info(f"Using cached window of {path}: {window_path}")
+        return window_path
+
+    # Окно, начинающееся с ключевого кадра, копируется без перекодирования
+    video_args = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '16']
+    try:
+        if packet_index(path).is_keyframe(start):
+            video_args = ['-c:v', 'copy']
+    except ValueError as e:
+        logger.debug(f"No packet index of {path}: {str(e)}")
+
+    temp_path = f"{window_path}.{os.getpid()}.tmp.mp4"
+    cmd = [
+        'ffmpeg',
+        '-ss', f"{start:.3f}",
+        '-i', path,
+        '-t', f"{end - start:.3f}",
+        *video_args,
+        '-map', '0:v:0',
+        '-map', '0:a?',
+        '-c:a', 'aac',
+        '-y',
+        temp_path
+    ]
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error extracting window of {path}: {e.stderr.decode()}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, window_path)
+    return window_path
+
+def process_window(config_path: str, start: Optional[str] = None, end: Optional[str] = None,
+                   input_path: Optional[str] = None, output_path: Optional[str] = None,
+                   proxy: Optional[str] = None, variables: Optional[Dict[str, Any]] = None,
+                   **kwargs) -> Dict[str, str]:
+    """
+    Render only a time window of the input through the whole pipeline.
+
+    Args:
+        config_path: Path to the YAML configuration file
+        start: Start of the window, e.g. "40" or "0:40" (default: beginning)
+        end: End of the window (default: end of the input)
+        input_path: Input video (overrides value from configuration)
+        output_path: Output video (default: output of the configuration
+            with a ``.40-50s`` suffix)
+        proxy: Additionally render at proxy resolution, e.g. "360p"
+        variables: Values of ${name} variables in the configuration
+        **kwargs: Additional arguments for Pipeline.process (jobs, work_dir, ...)
+
+    Returns:
+        Mapping of output names to written files
+
+    Raises:
+        ValueError: If the window is empty
+    """
+    config = Pipeline(config_path, variables=variables).config
+    inputs, _ = preview_io(config, input_path, output_path, "")
+
+    start_time = parse_time(start) if start is not None else 0.0
+    if end is not None:
+        end_time = parse_time(end)
+    else:
+        end_time = max(media_duration(probe(path)) or 0.0 for path in inputs.values())
+    if end_time <= start_time:
+        raise ValueError(f"Empty time window: {start_time:g}-{end_time:g}s")
+
+    size = parse_proxy(proxy) if proxy else None
+    suffix = (f".proxy{size}p" if size else "") + f".{start_time:g}-{end_time:g}s"
+    inputs, outputs = preview_io(config, input_path, output_path, suffix)
+    logger.info(f"Rendering window {start_time:g}-{end_time:g}s")
+
+    config = window_config(config, start_time, end_time)
+    inputs = {name: make_window_input(path, start_time, end_time) for name, path in inputs.items()}
+    encoder_options = None
+    if size:
+        config, inputs = apply_proxy(config, inputs, size)
+        encoder_options = dict(PROXY_ENCODER_OPTIONS)
+
+    run_preview(config_path, config, inputs, outputs, encoder_options, **kwargs)
+    return outputs
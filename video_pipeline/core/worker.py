@@ -0,0 +1,182 @@
+"""
+Distributed worker: processes jobs from a shared queue directory
+"""
+import os
+import signal
+import socket
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from video_pipeline.core.context import RunCancelled, run_context
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.core.pipeline import Pipeline
+from video_pipeline.core.shared_queue import SharedQueue, LeaseLost
+from video_pipeline.core.tune import encoder_context, host_layout
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """
+    Process that takes jobs from a SharedQueue until it is stopped.
+
+    Any number of worker processes on one or several hosts can share a
+    queue directory. Every job is run with ``resume=True``: when a job is
+    reclaimed from a crashed worker and its run journal is on the shared
+    filesystem (the default, next to the output), the new worker continues
+    from the last completed stage. A worker that loses the lease of a job
+    (e.g. after a long pause of the host) aborts it: the running FFmpeg
+    command is terminated, so two workers never write the same output and
+    run journal at the same time.
+    """
+
+    def __init__(self, queue_dir: str, config_path: Optional[str] = None, threads: Optional[int] = None,
+                 lease_seconds: float = 60.0, max_attempts: int = 3,
+                 poll_interval: float = 5.0, drain: bool = False):
+        """
+        Initialize the worker.
+
+        Args:
+            queue_dir: Shared queue directory
+            config_path: Configuration for jobs that do not name one
+            threads: Number of jobs processed in parallel by this process
+                (default: host profile, otherwise 1)
+            lease_seconds: Time after the last heartbeat when a job is reclaimed
+            max_attempts: Claims of a job before it is moved to failed/
+            poll_interval: Seconds between queue scans when it is empty
+            drain: Exit when there are no pending and no claimed jobs
+        """
+        self.queue = SharedQueue(queue_dir, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        self.config_path = config_path
+        # Число заданий и потоки энкодера из профиля машины (video-pipeline tune)
+        self.threads, self._layout_options = host_layout(threads, 1, config_path)
+        self.poll_interval = poll_interval
+        self.drain = drain
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._pipelines: Dict[str, Pipeline] = {}
+        self._pipelines_lock = threading.Lock()
+        # Задания этого процесса: идентификатор -> (идентификатор потока-воркера, событие отмены)
+        self._held: Dict[str, Tuple[str, threading.Event]] = {}
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Аренды продлеваются, пока не завершатся все задания, в том числе после stop()
+        self._heartbeat_stop = threading.Event()
+        self._threads = []
+        self.completed = 0
+        self.failed = 0
+
+    def _pipeline(self, config_path: Optional[str]) -> Pipeline:
+        """
+        Get the pipeline of a configuration; configurations are loaded once per process.
+        """
+        config_path = config_path or self.config_path
+        if not config_path:
+            raise ValueError("Job has no configuration and the worker was started without --config")
+        with self._pipelines_lock:
+            pipeline = self._pipelines.get(config_path)
+            if pipeline is None:
+                pipeline = Pipeline(config_path)
+                pipeline.load()
+                self._pipelines[config_path] = pipeline
+            return pipeline
+
+    def _heartbeat(self):
+        """
+        Refresh the leases of all jobs held by this process.
+        """
+        interval = self.queue.lease_seconds / 4
+        while not self._heartbeat_stop.wait(interval):
+            with self._held_lock:
+                held = dict(self._held)
+            for job_id, (worker_id, cancel) in held.items():
+                if cancel.is_set():
+                    continue
+                try:
+                    self.queue.heartbeat(job_id, worker_id)
+                except LeaseLost as e:
+                    # Задание уже выполняет другой воркер: текущий запуск прерывается
+                    logger.warning(f"[{worker_id}] {str(e)}, aborting the job")
+                    cancel.set()
+                except OSError as e:
+                    # Временная недоступность общего каталога не должна останавливать работу
+                    logger.error(f"[{worker_id}] Heartbeat of job {job_id} failed: {str(e)}")
+
+    def _work(self, number: int):
+        """
+        Worker thread: claim and process jobs until stopped.
+        """
+        worker_id = f"{self.worker_id}:{number}"
+        while not self._stop.is_set():
+            self.queue.reclaim_expired()
+            job = self.queue.claim(worker_id)
+            if job is None:
+                counts = self.queue.counts()
+                METRICS.set_queue_depth(counts['pending'])
+                if self.drain and not counts['pending'] and not counts['claimed']:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+
+            cancel = threading.Event()
+            with self._held_lock:
+                self._held[job['id']] = (worker_id, cancel)
+            logger.info(f"[{worker_id}] Job {job['id']} (attempt {job['attempts']}): "
+                        f"{job['input_path']} -> {job['output_path']}")
+            try:
+                try:
+                    with encoder_context(self._layout_options), run_context(cancel=cancel):
+                        self._pipeline(job.get('config_path')).process(job['input_path'], job['output_path'],
+                                                                       resume=True)
+                except RunCancelled:
+                    logger.warning(f"[{worker_id}] Job {job['id']} aborted: lease lost")
+                except Exception as e:
+                    logger.error(f"[{worker_id}] Job {job['id']} failed: {str(e)}", exc_info=True)
+                    self.queue.fail(job['id'], worker_id, str(e))
+                    self.failed += 1
+                else:
+                    self.queue.complete(job['id'], worker_id)
+                    self.completed += 1
+                    logger.info(f"[{worker_id}] Job {job['id']} completed")
+            except LeaseLost as e:
+                # Задание уже отдано другому воркеру; его результат не записываем
+                logger.warning(f"[{worker_id}] {str(e)}")
+            finally:
+                with self._held_lock:
+                    self._held.pop(job['id'], None)
+
+    def stop(self, *args):
+        """
+        Request a graceful shutdown: running jobs are finished first.
+        """
+        logger.warning("Stopping worker, waiting for running jobs...")
+        self._stop.set()
+
+    def run(self):
+        """
+        Run the worker until SIGINT/SIGTERM (or until the queue is drained).
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        counts = self.queue.counts()
+        METRICS.set_queue_depth(counts['pending'])
+        logger.warning(
+            f"Worker {self.worker_id} on {self.queue.root} with {self.threads} threads "
+            f"(pending: {counts['pending']}, claimed: {counts['claimed']}, "
+            f"done: {counts['done']}, failed: {counts['failed']})"
+        )
+
+        heartbeat = threading.Thread(target=self._heartbeat, name="heartbeat", daemon=True)
+        heartbeat.start()
+        for number in range(self.threads):
+            thread = threading.Thread(target=self._work, args=(number + 1,), name=f"worker-{number + 1}")
+            thread.start()
+            self._threads.append(thread)
+
+        for thread in self._threads:
+            thread.join()
+        self._stop.set()
+        self._heartbeat_stop.set()
+        heartbeat.join()
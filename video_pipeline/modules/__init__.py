@@ -1,22 +1,46 @@
 """
 Модули обработки видео для конвейера
+
+Классы модулей импортируются лениво при первом обращении, чтобы запуск CLI
+не загружал все модули сразу.
 """
+from importlib import import_module
 
-# Base
-from video_pipeline.modules.base import BaseModule
+# Имя класса -> путь к модулю
+_MODULES = {
+    # Base
+    'BaseModule': 'video_pipeline.modules.base',
+    
+    # Processing
+    'Crop': 'video_pipeline.modules.crop',
+    'Resize': 'video_pipeline.modules.resize',
+    'Watermark': 'video_pipeline.modules.watermark',
+    'DeleteAudio': 'video_pipeline.modules.delete_audio',
+    'Pad': 'video_pipeline.modules.pad',
+    'AddVideo': 'video_pipeline.modules.add_video',
+    'TextEffects': 'video_pipeline.modules.text_effects',
+    'Chromakey': 'video_pipeline.modules.chromakey',
+    'TrimDeadAir': 'video_pipeline.modules.trim_dead_air',
+    'Concat': 'video_pipeline.modules.concat',
+    'Stack': 'video_pipeline.modules.stack',
+    
+    # Utility
+    'PrepareForYt': 'video_pipeline.modules.utility.prepare_for_yt',
+    'Cut': 'video_pipeline.modules.utility.cut',
+    
+    # Registry
+    'register_module': 'video_pipeline.modules.registry',
+    'get_module_class': 'video_pipeline.modules.registry',
+}
 
-# Processing
-from video_pipeline.modules.crop import Crop
-from video_pipeline.modules.resize import Resize
-from video_pipeline.modules.watermark import Watermark
-from video_pipeline.modules.delete_audio import DeleteAudio
-from video_pipeline.modules.pad import Pad
-from video_pipeline.modules.add_video import AddVideo
-from video_pipeline.modules.text_effects import TextEffects
-from video_pipeline.modules.chromakey import Chromakey
+__all__ = ['BaseModule', 'Crop', 'Resize', 'Watermark', 'DeleteAudio', 'Pad', 'AddVideo', 'TextEffects', 'Chromakey', 'TrimDeadAir', 'Concat', 'Stack', 'PrepareForYt', 'Cut', 'register_module', 'get_module_class']
 
-# Utility
-from video_pipeline.modules.utility.prepare_for_yt import PrepareForYt
-from video_pipeline.modules.utility.cut import Cut
+def __getattr__(name):
+    if name in _MODULES:
+        value = getattr(import_module(_MODULES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ['BaseModule', 'Crop', 'Resize', 'Watermark', 'DeleteAudio', 'Pad', 'AddVideo', 'TextEffects', 'Chromakey', 'PrepareForYt', 'Cut'] 
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + list(_MODULES))
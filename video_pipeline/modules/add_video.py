@@ -4,17 +4,52 @@
 import os
 import subprocess
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.probe import probe, media_duration, has_stream
 
 logger = logging.getLogger(__name__)
 
+@register_module("add_video")
 class AddVideo(BaseModule):
     """
     Модуль для добавления видео поверх основного с помощью FFmpeg.
     """
     
+    required_filters = ('scale', 'format', 'colorchannelmixer', 'overlay', 'null', 'setpts', 'asetpts', 'adelay')
+    required_encoders = ('libx264',)
+    encode_cost = 1.3
+    pixel_params = {'x': None, 'y': None, 'width': None, 'height': None}
+    time_params = ('start_time', 'end_time')
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        scaled = super().proxy_params(params, factor)
+        # Файл video_path имеет полное разрешение: без явного размера
+        # его масштаб уменьшается вместе с видео (поток графа уже уменьшен)
+        if params.get('video_path') and params.get('width') is None and params.get('height') is None:
+            scaled['scale'] = params.get('scale', 1.0) * factor
+        return scaled
+    
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        windowed, start, end = super().window_params(params, start, end)
+        # Видео, скрытое до начала окна, не должно появиться в его первом кадре
+        end_time = params.get('end_time')
+        if end_time is not None and end_time < start:
+            windowed['start_time'] = windowed['end_time'] = end - start
+        elif params.get('video_path'):
+            # Видео, начавшееся до окна, показывается в окне с того же кадра, что и
+            # в полном рендере. Потоки графа (параметр из streams) уже обрезаны по окну
+            begin = float(params.get('start_time') or 0.0)
+            if begin < start:
+                windowed['video_offset'] = float(params.get('video_offset') or 0.0) + start - begin
+        return windowed, start, end
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля добавления видео.
@@ -30,10 +65,14 @@ class AddVideo(BaseModule):
                 - height: Высота видео в пикселях (имеет приоритет над scale)
                 - scale: Масштаб видео (1.0 = оригинальный размер)
                 - alpha: Прозрачность видео (0.0-1.0)
-                - start_time: Время начала вставки в секундах
+                - start_time: Время начала вставки в секундах (видео воспроизводится
+                              с начала в этот момент)
                 - end_time: Время окончания вставки в секундах
                 - loop: Зацикливать видео до конца основного (по умолчанию False)
                 - mute: Удалить звук из добавляемого видео (по умолчанию False)
+                - video_offset: Момент добавляемого видео в секундах, с которого
+                                оно воспроизводится (по умолчанию 0; задается
+                                рендером окна)
         """
         super().__init__(params)
         
@@ -51,6 +90,7 @@ class AddVideo(BaseModule):
         self.end_time = params.get('end_time', None)
         self.loop = params.get('loop', False)
         self.mute = params.get('mute', False)
+        self.video_offset = float(params.get('video_offset') or 0.0)
         
     def process(self, input_path: str, output_path: str):
         """
@@ -66,7 +106,10 @@ class AddVideo(BaseModule):
             raise FileNotFoundError(f"Входной файл не найден: {input_path}")
             
         # Подготовка параметров FFmpeg
-        filter_complex = self._get_filter_complex()
+        window = self._get_overlay_window(input_path)
+        # Звук вставки при ограниченном интервале сдвигается фильтром и кодируется заново
+        shift_audio = window is not None and not self.mute and has_stream(probe(self.video_path), 'audio')
+        filter_complex = self._get_filter_complex(window, shift_audio)
         
         # Формирование базовой команды FFmpeg
         cmd = []
@@ -79,7 +122,8 @@ class AddVideo(BaseModule):
             # Используем -stream_loop для зацикливания
             # Получим количество повторений, если возможно
             overlay_duration = self._get_video_duration(self.video_path)
-            main_duration = self._get_video_duration(input_path)
+            # При ограниченном интервале видео повторяется только внутри него
+            main_duration = window[1] if window else self._get_video_duration(input_path)
             
             if overlay_duration > 0 and main_duration > 0:
                 # Вычисляем количество повторений плюс запас
@@ -94,6 +138,17 @@ class AddVideo(BaseModule):
                 logger.warning("Не удалось точно рассчитать количество повторений, используем бесконечное зацикливание")
                 cmd.extend(['-stream_loop', '-1'])
         
+        # Накладываемое видео читается только на длительность интервала вставки
+        # (сдвиг к началу интервала выполняет фильтр): декодирование и
+        # масштабирование вне интервала не выполняются
+        if window:
+            cmd.extend(['-t', f"{window[1]:.3f}"])
+        
+        # Накладываемое видео начинается с заданного момента (поиск до декодирования)
+        offset = self._get_video_offset()
+        if offset > 0:
+            cmd.extend(['-ss', f"{offset:.3f}"])
+        
         # Добавляем накладываемое видео
         cmd.extend(['-i', self.video_path])
         
@@ -111,17 +166,24 @@ class AddVideo(BaseModule):
             cmd.extend(['-map', '0:a?'])
         else:
             # Иначе берем аудио из обоих видео
-            cmd.extend(['-map', '0:a?', '-map', '1:a?'])
+            cmd.extend(['-map', '0:a?', '-map', '[outa]' if shift_audio else '1:a?'])
             
         # Добавляем видеопоток с наложением и исключаем потоки данных
         cmd.extend(['-map', '[outv]'])
         
         # Добавляем параметр -shortest для ограничения длительности выходного видео
-        # до длительности самого короткого входного потока (в нашем случае - основного видео)
-        cmd.extend(['-shortest'])
+        # до длительности самого короткого входного потока (в нашем случае - основного видео).
+        # Обрезанное по интервалу видео заканчивается раньше основного и не ограничивает его
+        if not window:
+            cmd.extend(['-shortest'])
         
         # Обработка аудио - всегда копируем, без перекодирования
         cmd.extend(['-c:a', 'copy'])
+        if shift_audio:
+            # Кроме сдвинутого звука вставки: он идет после всех звуковых дорожек
+            # основного видео (-map 0:a? берет каждую из них)
+            audio_index = sum(1 for s in probe(input_path).get('streams', []) if s.get('codec_type') == 'audio')
+            cmd.extend([f'-c:a:{audio_index}', 'aac'])
         
         cmd.extend([
             output_path,
@@ -131,12 +193,52 @@ class AddVideo(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Видео успешно добавлено: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при добавлении видео: {e.stderr.decode()}")
             raise
     
+    def _get_overlay_window(self, input_path: str) -> Optional[Tuple[float, float]]:
+        """
+        Интервал, на котором накладываемое видео видно.
+        
+        Args:
+            input_path: Путь к основному видео
+            
+        Returns:
+            Начало и длительность интервала в секундах или None, если видео
+            накладывается на все основное видео
+        """
+        if self.start_time is None and self.end_time is None:
+            return None
+        
+        start = max(float(self.start_time or 0.0), 0.0)
+        end = media_duration(probe(input_path))
+        if self.end_time is not None:
+            end = min(float(self.end_time), end) if end else float(self.end_time)
+        if end is None:
+            return None
+        # Пустой интервал: читается один кадр, который скрывается выражением enable
+        return start, max(end - start, 0.001)
+    
+    def _get_video_offset(self) -> float:
+        """
+        Момент накладываемого видео, с которого начинается воспроизведение.
+        
+        Returns:
+            Смещение в секундах: при зацикливании - внутри одного повтора,
+            без него - не дальше последнего кадра (видео остается на нем)
+        """
+        if self.video_offset <= 0:
+            return 0.0
+        duration = self._get_video_duration(self.video_path)
+        if duration <= 0:
+            return self.video_offset
+        if self.loop:
+            return self.video_offset % duration
+        return min(self.video_offset, max(duration - 0.1, 0.0))
+    
     def _get_video_duration(self, video_path: str) -> float:
         """
         Получение длительности видео в секундах.
@@ -163,10 +265,15 @@ class AddVideo(BaseModule):
             logger.warning(f"Не удалось получить длительность видео: {str(e)}")
             return 0.0  # Возвращаем 0, если не удалось получить длительность
             
-    def _get_filter_complex(self) -> str:
+    def _get_filter_complex(self, window: Optional[Tuple[float, float]] = None,
+                            shift_audio: bool = False) -> str:
         """
         Формирование строки фильтра для FFmpeg.
         
+        Args:
+            window: Начало и длительность интервала вставки (см. _get_overlay_window)
+            shift_audio: Сдвинуть звук вставки к началу интервала ([outa])
+        
         Returns:
             Строка фильтра для FFmpeg
         """
@@ -175,23 +282,32 @@ class AddVideo(BaseModule):
         
         # Формирование фильтра
         filter_parts = []
+        source = "[1:v]"
+        
+        # Вставка начинается с первого кадра в момент start_time
+        if window:
+            filter_parts.append("[1:v]setpts=PTS-STARTPTS+{0:.3f}/TB[shifted]".format(window[0]))
+            source = "[shifted]"
+            if shift_audio:
+                filter_parts.append("[1:a]asetpts=PTS-STARTPTS,adelay=delays={0}:all=1[outa]".format(
+                    int(round(window[0] * 1000))))
             
         # Масштабирование видео
         if self.width is not None and self.height is not None:
             # Если указаны конкретные размеры, используем их
-            filter_parts.append("[1:v]scale={0}:{1}[scaled]".format(self.width, self.height))
+            filter_parts.append("{0}scale={1}:{2}[scaled]".format(source, self.width, self.height))
         elif self.width is not None:
             # Если указана только ширина, сохраняем пропорции
-            filter_parts.append("[1:v]scale={0}:-1[scaled]".format(self.width))
+            filter_parts.append("{0}scale={1}:-1[scaled]".format(source, self.width))
         elif self.height is not None:
             # Если указана только высота, сохраняем пропорции
-            filter_parts.append("[1:v]scale=-1:{0}[scaled]".format(self.height))
+            filter_parts.append("{0}scale=-1:{1}[scaled]".format(source, self.height))
         elif self.scale != 1.0:
             # Если указан масштаб, используем его
-            filter_parts.append("[1:v]scale=iw*{0}:ih*{0}[scaled]".format(self.scale))
+            filter_parts.append("{0}scale=iw*{1}:ih*{1}[scaled]".format(source, self.scale))
         else:
             # Если ничего не указано, оставляем как есть
-            filter_parts.append("[1:v]null[scaled]")
+            filter_parts.append("{0}null[scaled]".format(source))
         
         # Установка прозрачности
         if self.alpha < 1.0:
@@ -206,8 +322,9 @@ class AddVideo(BaseModule):
             end_expr = "lte(t,{0})".format(self.end_time) if self.end_time is not None else "1"
             enable_expr = ":enable='{0}*{1}'".format(start_expr, end_expr)
         
-        # Итоговое наложение
-        filter_parts.append("[0:v][overlay]overlay={0}{1}[outv]".format(position_str, enable_expr))
+        # Итоговое наложение; после окончания обрезанного видео основное проходит без изменений
+        eof_expr = ":eof_action=pass" if enable_expr else ""
+        filter_parts.append("[0:v][overlay]overlay={0}{1}{2}[outv]".format(position_str, eof_expr, enable_expr))
         
         return ";".join(filter_parts)
     
@@ -2,7 +2,7 @@
 Базовый класс модуля обработки видео
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 class BaseModule(ABC):
     """
@@ -10,6 +10,23 @@ class BaseModule(ABC):
     Все модули должны наследоваться от этого класса и реализовать метод process.
     """
     
+    # Фильтры и энкодеры FFmpeg, без которых модуль не может работать;
+    # проверяются перед запуском конвейера
+    required_filters: Tuple[str, ...] = ()
+    required_encoders: Tuple[str, ...] = ()
+    
+    # Относительная стоимость кодирования (1.0 - простое перекодирование);
+    # используется для оценки времени при выборе пресета под дедлайн
+    encode_cost: float = 1.0
+    
+    # Параметры в пикселях и их значения по умолчанию; в режиме прокси
+    # (уменьшенное превью) они масштабируются вместе с видео
+    pixel_params: Dict[str, Optional[int]] = {}
+    
+    # Параметры-моменты времени в секундах от начала входного видео; при
+    # рендере окна (--from/--to) они отсчитываются от начала окна
+    time_params: Tuple[str, ...] = ()
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация базового модуля.
@@ -32,4 +49,105 @@ class BaseModule(ABC):
             input_path: Путь к входному видео
             output_path: Путь к выходному видео
         """
-        pass 
\ No newline at end of file
+        pass
+    
+    def video_filter(self) -> Optional[str]:
+        """
+        Фильтр видео для слияния с соседними модулями.
+        
+        Модули, вся работа которых сводится к одному фильтру -vf без
+        дополнительных входов, возвращают строку фильтра. Тогда планировщик
+        графа может объединить цепочку таких модулей в один вызов FFmpeg.
+        
+        Returns:
+            Строка фильтра для FFmpeg или None, если модуль нельзя объединять
+        """
+        return None
+    
+    def expected_output_duration(self, input_duration: float) -> Optional[float]:
+        """
+        Ожидаемая длительность результата модуля.
+        
+        Используется для оценки числа кадров этапа в прогрессе конвейера.
+        По умолчанию длительность не меняется; модули, которые обрезают
+        или склеивают видео, переопределяют метод.
+        
+        Args:
+            input_duration: Длительность входного видео в секундах
+            
+        Returns:
+            Длительность в секундах или None, если ее нельзя оценить
+        """
+        return input_duration
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        """
+        Параметры модуля для прокси-рендера, уменьшенного в factor раз.
+        
+        По умолчанию масштабирует параметры из pixel_params (включая
+        незаданные, у которых есть значение по умолчанию), чтобы раскладка
+        кадра в превью совпадала с полным рендером. Ширина и высота
+        округляются до четных значений.
+        
+        Args:
+            params: Параметры модуля из конфигурации
+            factor: Коэффициент масштабирования (меньше 1)
+            
+        Returns:
+            Новый словарь параметров
+        """
+        params = dict(params)
+        for name, default in cls.pixel_params.items():
+            value = params.get(name, default)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if name in ('width', 'height'):
+                params[name] = max(2, int(round(value * factor / 2)) * 2)
+            elif value > 0:
+                params[name] = max(1, int(round(value * factor)))
+            else:
+                params[name] = int(round(value * factor))
+        return params
+    
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        """
+        Параметры модуля для рендера только окна [start, end] входного видео.
+        
+        Вход этапа начинается с момента start, поэтому параметры из
+        time_params сдвигаются на start (и не становятся отрицательными).
+        Модули, которые меняют шкалу времени (обрезка), также возвращают
+        окно в шкале своего результата для следующих этапов.
+        
+        Args:
+            params: Параметры модуля из конфигурации
+            start: Начало окна в секундах (в шкале входа этапа при полном рендере)
+            end: Конец окна в секундах
+            
+        Returns:
+            Кортеж (новые параметры, начало окна, конец окна) для следующего этапа
+        """
+        params = dict(params)
+        for name in cls.time_params:
+            value = params.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                params[name] = max(0.0, value - start)
+        return params, start, end
+    
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """
+        Фильтры и энкодеры FFmpeg, необходимые модулю с заданными параметрами.
+        
+        Вызывается до создания модуля, поэтому не должен обращаться к файлам.
+        По умолчанию возвращает атрибуты класса required_filters и required_encoders.
+        
+        Args:
+            params: Параметры модуля из конфигурации
+            
+        Returns:
+            Кортеж (фильтры, энкодеры)
+        """
+        return list(cls.required_filters), list(cls.required_encoders)
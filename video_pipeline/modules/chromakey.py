@@ -7,14 +7,31 @@ import logging
 from typing import Dict, Any
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("chromakey")
 class Chromakey(BaseModule):
     """
     Модуль для удаления зеленого экрана и наложения на фоновое видео с помощью FFmpeg.
     """
     
+    required_filters = ('colorkey', 'scale', 'overlay')
+    required_encoders = ('libx264',)
+    encode_cost = 1.4
+    pixel_params = {'x': None, 'y': None, 'width': None, 'height': None}
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        scaled = super().proxy_params(params, factor)
+        # Файл overlay имеет полное разрешение: без явного размера
+        # его масштаб уменьшается вместе с видео (поток графа уже уменьшен)
+        if params.get('overlay') and params.get('width') is None and params.get('height') is None:
+            scaled['scale'] = params.get('scale', 1.0) * factor
+        return scaled
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля удаления зеленого экрана.
@@ -104,7 +121,7 @@ class Chromakey(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Видео успешно обработано: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при обработке видео: {e.stderr.decode()}")
@@ -0,0 +1,313 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.cache import get_cache_dir
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.fingerprint import file_fingerprint
+from video_pipeline.utils.probe import probe, media_duration, video_stream, frame_rate
+
+logger = logging.getLogger(__name__)
+
+# Энкодеры для кодеков, в которые можно привести несовпадающий клип
+_VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+_AUDIO_ENCODERS = {'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus'}
+
+# Профили ffprobe -> значения -profile:v энкодера
+_VIDEO_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+    'High 10': 'high10',
+    'High 4:2:2': 'high422',
+    'High 4:4:4 Predictive': 'high444',
+    'Main 10': 'main10',
+}
+
+# Цель по умолчанию, если кодек основного видео нечем закодировать
+_DEFAULT_VIDEO = {'codec': 'h264', 'profile': 'High', 'pix_fmt': 'yuv420p'}
+_DEFAULT_AUDIO = {'codec': 'aac', 'profile': 'LC'}
+
+def _audio_stream(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            return stream
+    return None
+
+def _signature(info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Параметры потоков, которые должны совпадать у всех частей склейки без перекодирования.
+    """
+    video = video_stream(info)
+    audio = _audio_stream(info)
+    rate = frame_rate(video or {})
+    return {
+        # Порядок потоков: демультиплексор concat сопоставляет их по номеру
+        'layout': [s.get('codec_type') for s in info.get('streams', [])
+                   if s.get('codec_type') in ('video', 'audio')],
+        'video': {
+            'codec': video.get('codec_name'),
+            'profile': video.get('profile'),
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'pix_fmt': video.get('pix_fmt'),
+            'sar': video.get('sample_aspect_ratio') or '1:1',
+            'fps': round(rate, 3) if rate else None,
+        } if video else None,
+        'audio': {
+            'codec': audio.get('codec_name'),
+            'profile': audio.get('profile'),
+            'sample_rate': str(audio.get('sample_rate')),
+            'channels': audio.get('channels'),
+        } if audio else None,
+    }
+
+@register_module("concat")
+class Concat(BaseModule):
+    """
+    Модуль для склейки видео с заставками (интро и аутро).
+
+    Параметры кодеков всех клипов сравниваются с входным видео по кешу
+    ffprobe. Если они совпадают, клипы склеиваются демультиплексором concat
+    без перекодирования. Иначе приводятся к параметрам входа только
+    несовпадающие клипы (и только несовпадающие потоки: видео копируется,
+    если отличается лишь звук), после чего склейка также выполняется без
+    перекодирования. Приведенные клипы кешируются: одна и та же заставка
+    для разных видео кодируется один раз.
+
+    Параметры:
+        before (str | list): Клипы перед видео
+        after (str | list): Клипы после видео
+        crf (int): Качество приведенных клипов (по умолчанию 18)
+        preset (str): Пресет энкодера для приведенных клипов (по умолчанию 'fast')
+    """
+
+    required_filters = ('scale', 'pad', 'setsar', 'fps', 'format')
+
+    # Склейка копирует потоки; кодируются только несовпадающие заставки
+    encode_cost = 0.2
+
+    def __init__(self, params: Dict[str, Any]):
+        super().__init__(params)
+        self.before = self._clip_list(params.get('before'))
+        self.after = self._clip_list(params.get('after'))
+        self.crf = int(params.get('crf', 18))
+        self.preset = params.get('preset', 'fast')
+
+    @staticmethod
+    def _clip_list(value: Any) -> List[str]:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return [str(clip) for clip in value]
+
+    @staticmethod
+    def _clips_duration(clips: List[str]) -> Optional[float]:
+        total = 0.0
+        for clip in clips:
+            try:
+                duration = media_duration(probe(clip))
+            except (FileNotFoundError, ValueError):
+                return None
+            if duration is None:
+                return None
+            total += duration
+        return total
+
+    def expected_output_duration(self, input_duration: float) -> Optional[float]:
+        clips = self._clips_duration(self.before + self.after)
+        return input_duration + clips if clips is not None else None
+
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        # В превью окна заставки не добавляются; следующие этапы отсчитывают
+        # время от начала склейки, поэтому окно сдвигается на длительность интро
+        shift = cls._clips_duration(cls._clip_list(params.get('before'))) or 0.0
+        params = dict(params)
+        params['before'] = []
+        params['after'] = []
+        return params, start + shift, end + shift
+
+    def process(self, input_path: str, output_path: str):
+        """
+        Склеить заставки с видео.
+
+        Args:
+            input_path: Путь к входному видео
+            output_path: Путь к выходному видео
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Входной файл не найден: {input_path}")
+        for clip in self.before + self.after:
+            if not os.path.exists(clip):
+                raise FileNotFoundError(f"Клип не найден: {clip}")
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        if not self.before and not self.after:
+            logger.info("Клипы для склейки не заданы, видео копируется")
+            shutil.copyfile(input_path, output_path)
+            return
+
+        info = probe(input_path)
+        target = self._target(info)
+        # Шкала времени дорожки видео входа (например, 1/12800 -> 12800)
+        time_base = str((video_stream(info) or {}).get('time_base') or '')
+        timescale = int(time_base[2:]) if time_base.startswith('1/') and time_base[2:].isdigit() else None
+
+        parts = []
+        for clip in self.before + [input_path] + self.after:
+            signature = _signature(probe(clip))
+            if signature == target:
+                parts.append(clip)
+            else:
+                parts.append(self._normalize(clip, signature, target, timescale))
+
+        list_fd, list_path = tempfile.mkstemp(prefix="concat_", suffix=".txt", dir=output_dir or None)
+        try:
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    # Одинарная кавычка в пути экранируется для формата списка concat
+                    escaped = os.path.abspath(part).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            cmd = [
+                'ffmpeg',
+                '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', list_path,
+                '-map', '0',
+                '-c', 'copy',
+                output_path
+            ]
+            logger.debug(f"Выполнение команды: {' '.join(cmd)}")
+
+            try:
+                run_ffmpeg(cmd)
+                logger.info(f"Склеено {len(parts)} клипов без перекодирования: {output_path}")
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Ошибка при склейке видео: {e.stderr.decode()}")
+                raise
+        finally:
+            os.remove(list_path)
+
+    @staticmethod
+    def _target(info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Параметры, к которым приводятся клипы: параметры входного видео.
+
+        Если кодек входа нечем закодировать, цель - H.264/AAC с теми же
+        размерами и частотой кадров (тогда приводится и само видео).
+        """
+        target = _signature(info)
+        if target['video'] is None:
+            raise ValueError("Входной файл не содержит видеопотока")
+        if target['video']['codec'] not in _VIDEO_ENCODERS:
+            target['video'].update(_DEFAULT_VIDEO)
+        if target['audio'] is not None and target['audio']['codec'] not in _AUDIO_ENCODERS:
+            target['audio'].update(_DEFAULT_AUDIO)
+        return target
+
+    def _normalize(self, clip: str, signature: Dict[str, Any], target: Dict[str, Any],
+                   timescale: Optional[int] = None) -> str:
+        """
+        Привести клип к параметрам склейки.
+
+        Перекодируются только несовпадающие потоки. Результат кешируется по
+        отпечатку клипа и целевым параметрам.
+
+        Args:
+            clip: Путь к клипу
+            signature: Параметры клипа
+            target: Целевые параметры
+            timescale: Шкала времени дорожки видео входа
+
+        Returns:
+            Путь к приведенному клипу
+        """
+        key = hashlib.sha1(json.dumps([file_fingerprint(clip), target, timescale, self.crf, self.preset],
+                                      sort_keys=True).encode()).hexdigest()[:16]
+        cache_path = os.path.join(get_cache_dir("concat"), f"{key}.mp4")
+        if os.path.exists(cache_path):
+            logger.info(f"Используется приведенный клип из кеша: {clip}")
+            return cache_path
+
+        video, audio = target['video'], target['audio']
+        copy_video = signature['video'] == video
+        cmd = ['ffmpeg', '-y', '-i', clip]
+
+        # Клип без звука получает тишину с параметрами звука входа
+        add_silence = audio is not None and signature['audio'] is None
+        if add_silence:
+            layout = 'mono' if audio['channels'] == 1 else 'stereo'
+            cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+
+        cmd += ['-map', '0:v:0']
+        if audio is not None:
+            cmd += ['-map', '1:a:0' if add_silence else '0:a:0']
+
+        if copy_video:
+            cmd += ['-c:v', 'copy']
+        else:
+            width, height = video['width'], video['height']
+            filters = [
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+                f"setsar={video['sar'].replace(':', '/')}",
+            ]
+            if video['fps']:
+                filters.append(f"fps={video['fps']}")
+            if video['pix_fmt']:
+                filters.append(f"format={video['pix_fmt']}")
+            cmd += [
+                '-vf', ",".join(filters),
+                '-c:v', _VIDEO_ENCODERS[video['codec']],
+                '-preset', self.preset,
+                '-crf', str(self.crf),
+            ]
+            if video['profile'] in _VIDEO_PROFILES:
+                cmd += ['-profile:v', _VIDEO_PROFILES[video['profile']]]
+            if timescale:
+                cmd += ['-video_track_timescale', str(timescale)]
+
+        if audio is None:
+            cmd += ['-an']
+        elif signature['audio'] == audio:
+            cmd += ['-c:a', 'copy']
+        else:
+            cmd += [
+                '-c:a', _AUDIO_ENCODERS[audio['codec']],
+                '-ar', audio['sample_rate'],
+                '-ac', str(audio['channels'] or 2),
+            ]
+        if add_silence:
+            cmd += ['-shortest']
+
+        temp_path = f"{cache_path}.{os.getpid()}.tmp.mp4"
+        cmd.append(temp_path)
+        logger.info(f"Приведение клипа к параметрам видео: {clip} "
+                    f"({'видео копируется' if copy_video else 'видео перекодируется'})")
+        logger.debug(f"Выполнение команды: {' '.join(cmd)}")
+
+        try:
+            run_ffmpeg(cmd)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ошибка при приведении клипа {clip}: {e.stderr.decode()}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, cache_path)
+        return cache_path
@@ -4,10 +4,16 @@ import logging
 from typing import Dict, Any
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("crop")
 class Crop(BaseModule):
+    required_filters = ('crop',)
+    required_encoders = ('libx264',)
+    pixel_params = {'width': 1280, 'height': 720, 'x': 0, 'y': 0}
 
     
     def __init__(self, params: Dict[str, Any]):
@@ -43,12 +49,15 @@ class Crop(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Видео обрезанно: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при обрезке видео: {e.stderr.decode()}")
             raise
 
+    def video_filter(self) -> str:
+        return self._get_filter_complex()
+        
     def _get_filter_complex(self) -> str:
         if self.position == 'none':
             return f"crop={self.width}:{self.height}:{self.x}:{self.y}"
@@ -1,12 +1,15 @@
 import os
 import subprocess
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("cut_video")
 class CutVideo(BaseModule):
     """
     Модуль для обрезки видео по времени (извлечения определенного фрагмента).
@@ -14,13 +17,43 @@ class CutVideo(BaseModule):
     Параметры:
         start (float): Время начала фрагмента в секундах (по умолчанию 0)
         duration (float): Длительность фрагмента в секундах (по умолчанию 10)
+        accurate (bool): Точная обрезка с перекодированием (по умолчанию False).
+            Без перекодирования фрагмент хранит пакеты от ключевого кадра перед
+            start, а список правок (edit list) контейнера скрывает их, так что
+            шкала времени фрагмента начинается ровно со start.
     """
     
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        # Без перекодирования модулю не нужны энкодеры
+        if params.get('accurate', False):
+            return [], ['libx264', 'aac']
+        return [], []
+    
     def __init__(self, params: Dict[str, Any]):
         super().__init__(params)
         self.start = params.get('start', 0)
         self.duration = params.get('duration', 10)
     
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        # Фрагмент [cut_start, cut_end] пересекается с окном; дальше шкала
+        # времени отсчитывается от начала фрагмента
+        cut_start = float(params.get('start', 0))
+        cut_end = cut_start + float(params.get('duration', 10))
+        window_start, window_end = max(start, cut_start), min(end, cut_end)
+        if window_end <= window_start:
+            raise ValueError(f"Window {start:g}-{end:g}s is outside of the fragment {cut_start:g}-{cut_end:g}s")
+        
+        params = dict(params)
+        params['start'] = window_start - start
+        params['duration'] = window_end - window_start
+        return params, window_start - cut_start, window_end - cut_start
+    
+    def expected_output_duration(self, input_duration: float) -> float:
+        return max(0.0, min(float(self.duration), input_duration - float(self.start)))
+    
     def process(self, input_path: str, output_path: str):
         """
         Обрезать видео по заданному времени.
@@ -41,8 +74,9 @@ class CutVideo(BaseModule):
         cmd = [
             'ffmpeg',
             '-y',                         # Перезаписывать выходной файл
+            '-ss', str(self.start),       # Время начала (пакеты от ключевого кадра до него
+                                          # получают отрицательные метки и не показываются)
             '-i', input_path,             # Входной файл
-            '-ss', str(self.start),       # Время начала
             '-t', str(self.duration),     # Длительность
             '-c', 'copy',                 # Копировать кодеки (быстрее, чем перекодирование)
             output_path                   # Выходной файл
@@ -66,9 +100,8 @@ class CutVideo(BaseModule):
         
         # Выполняем команду
         try:
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            run_ffmpeg(cmd)
             logger.info(f"Видео успешно обрезано и сохранено в {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при обрезке видео: {e.stderr.decode()}")
             raise
-            
\ No newline at end of file
@@ -4,10 +4,14 @@ import logging
 from typing import Dict, Any
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("delete_audio")
 class DeleteAudio(BaseModule):
+    required_encoders = ('libx264',)
 
     
     def __init__(self, params: Dict[str, Any]):
@@ -33,7 +37,7 @@ class DeleteAudio(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Аудио удалено: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при удалении аудио: {e.stderr.decode()}")
@@ -7,14 +7,21 @@ import logging
 from typing import Dict, Any, Optional
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("pad")
 class Pad(BaseModule):
     """
     Модуль для расширения видео пустыми областями с помощью FFmpeg.
     """
     
+    required_filters = ('pad', 'scale', 'setsar', 'overlay')
+    required_encoders = ('libx264',)
+    pixel_params = {'width': 1920, 'height': 1080}
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля расширения.
@@ -87,7 +94,7 @@ class Pad(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Видео успешно расширено пустыми областями: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при расширении видео: {e.stderr.decode()}")
@@ -131,12 +138,23 @@ class Pad(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Видео успешно расширено с изображением фона: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при расширении видео с изображением: {e.stderr.decode()}")
             raise
             
+    def video_filter(self) -> Optional[str]:
+        """
+        Фильтр для слияния с соседними модулями.
+        
+        Returns:
+            Строка фильтра pad или None, если фон заполняется изображением
+        """
+        if self.image_path:
+            return None
+        return self._get_filter_complex()
+        
     def _get_filter_complex(self) -> str:
         """
         Формирование фильтра для расширения пустыми областями.
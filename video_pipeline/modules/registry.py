@@ -0,0 +1,228 @@
+"""
+Реестр модулей обработки видео
+
+Встроенные модули регистрируются декоратором ``register_module``, внешние
+пакеты - через entry points группы ``video_pipeline.modules``:
+
+    entry_points={
+        "video_pipeline.modules": ["blur = my_package.blur:Blur"],
+    }
+
+Индекс "имя -> класс" строится без импорта модулей (декораторы находятся
+разбором исходного кода, entry points читаются из метаданных пакетов) и
+кешируется на диске, поэтому поиск модуля по имени - O(1), а импортируется
+только действительно используемый модуль.
+"""
+import os
+import ast
+import sys
+import logging
+import threading
+from importlib import import_module
+from typing import Dict, List, Optional
+
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "video_pipeline.modules"
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PACKAGE = "video_pipeline.modules"
+_INDEX_VERSION = 1
+
+# Модули, зарегистрированные декоратором во время выполнения: имя -> "модуль:Класс"
+_registered: Dict[str, Dict[str, str]] = {}
+_index: Optional[Dict[str, Dict[str, str]]] = None
+_lock = threading.RLock()
+
+def normalize_name(name: str) -> str:
+    """
+    Привести имя модуля к ключу индекса.
+
+    Регистр, подчеркивания и дефисы не учитываются, поэтому
+    ``utility.prepare_for_yt``, ``utility.prepareforyt`` и
+    ``utility.PrepareForYt`` - одно и то же имя.
+
+    Args:
+        name: Имя модуля из конфигурации
+
+    Returns:
+        Ключ индекса
+    """
+    return name.strip().lower().replace('_', '').replace('-', '')
+
+def register_module(name: str, *aliases: str):
+    """
+    Декоратор регистрации класса модуля.
+
+    Args:
+        name: Основное имя модуля в конфигурации
+        *aliases: Дополнительные имена
+
+    Returns:
+        Декоратор класса
+    """
+    def decorator(cls):
+        cls.module_name = name
+        target = f"{cls.__module__}:{cls.__qualname__}"
+        with _lock:
+            for alias in (name,) + aliases:
+                _registered[normalize_name(alias)] = {"name": name, "target": target, "source": "decorator"}
+        return cls
+    return decorator
+
+def _builtin_files() -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(_PACKAGE_DIR):
+        dirs[:] = [d for d in dirs if not d.startswith(('.', '__'))]
+        files.extend(os.path.join(root, n) for n in names if n.endswith('.py') and not n.startswith('__'))
+    return sorted(files)
+
+def _signature() -> List:
+    """
+    Сигнатура состояния, от которого зависит индекс.
+
+    Включает mtime файлов встроенных модулей и каталогов sys.path: установка
+    или удаление пакета с плагином меняет mtime каталога site-packages.
+    """
+    parts = [_INDEX_VERSION, list(sys.version_info[:2])]
+    for path in _builtin_files() + [p for p in sys.path if p]:
+        try:
+            stat = os.stat(path)
+            parts.append([path, stat.st_mtime_ns])
+        except OSError:
+            continue
+    return parts
+
+def _scan_builtin() -> Dict[str, Dict[str, str]]:
+    """
+    Найти классы с декоратором register_module без импорта модулей.
+    """
+    entries = {}
+    for path in _builtin_files():
+        relative = os.path.relpath(path, _PACKAGE_DIR)[:-3].replace(os.sep, '.')
+        module_path = f"{_PACKAGE}.{relative}"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            logger.warning(f"Failed to scan module file {path}: {str(e)}")
+            continue
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            for decorator in node.decorator_list:
+                if (isinstance(decorator, ast.Call)
+                        and getattr(decorator.func, 'id', None) == 'register_module'):
+                    names = [a.value for a in decorator.args if isinstance(a, ast.Constant)]
+                    for alias in names:
+                        entries[normalize_name(alias)] = {
+                            "name": names[0],
+                            "target": f"{module_path}:{node.name}",
+                            "source": "builtin",
+                        }
+    return entries
+
+def _scan_entry_points(entries: Dict[str, Dict[str, str]]):
+    """
+    Добавить в индекс модули внешних пакетов (без их импорта).
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python < 3.10
+        found = entry_points().get(ENTRY_POINT_GROUP, [])
+
+    for ep in found:
+        key = normalize_name(ep.name)
+        if key in entries:
+            logger.warning(f"Plugin module '{ep.name}' ({ep.value}) conflicts with an existing module and is ignored")
+            continue
+        entries[key] = {"name": ep.name, "target": ep.value, "source": "entry_point"}
+
+def _build_index() -> Dict[str, Dict[str, str]]:
+    entries = _scan_builtin()
+    _scan_entry_points(entries)
+    return entries
+
+def get_index(refresh: bool = False) -> Dict[str, Dict[str, str]]:
+    """
+    Получить индекс модулей (из памяти, с диска или построить заново).
+
+    Args:
+        refresh: Перестроить индекс, игнорируя кеш
+
+    Returns:
+        Словарь ключ имени -> {"name", "target", "source"}
+    """
+    global _index
+    with _lock:
+        if _index is not None and not refresh:
+            return _index
+
+        signature = _signature()
+        try:
+            cache_path = os.path.join(get_cache_dir(), "module_index.json")
+        except OSError:
+            cache_path = None
+
+        cached = load_json(cache_path) if cache_path and not refresh else None
+        if cached and cached.get("signature") == signature:
+            _index = cached["modules"]
+        else:
+            _index = _build_index()
+            if cache_path:
+                save_json(cache_path, {"signature": signature, "modules": _index})
+        return _index
+
+def _lookup(key: str) -> Optional[Dict[str, str]]:
+    with _lock:
+        return _registered.get(key) or get_index().get(key)
+
+def get_module_class(module_name: str):
+    """
+    Получить класс модуля по имени из конфигурации.
+
+    Args:
+        module_name: Имя модуля (например, resize, utility.prepare_for_yt или имя плагина)
+
+    Returns:
+        Класс модуля
+
+    Raises:
+        ImportError: Если модуль с таким именем не зарегистрирован
+    """
+    key = normalize_name(module_name)
+    entry = _lookup(key) or _lookup(f"utility.{key}")
+    if entry is None:
+        # Индекс мог устареть (например, пакет установлен в другой каталог)
+        get_index(refresh=True)
+        entry = _lookup(key) or _lookup(f"utility.{key}")
+    if entry is None:
+        raise ImportError(f"Unknown module: {module_name}. Available modules: {', '.join(available_modules())}")
+
+    module_path, _, class_name = entry["target"].partition(':')
+    module = import_module(module_path)
+    module_class = module
+    for part in class_name.split('.'):
+        module_class = getattr(module_class, part)
+    return module_class
+
+def available_modules() -> List[str]:
+    """
+    Получить список имен всех доступных модулей.
+
+    Returns:
+        Отсортированный список основных имен модулей
+    """
+    with _lock:
+        names = {entry["name"] for entry in get_index().values()}
+        names.update(entry["name"] for entry in _registered.values())
+    return sorted(names)
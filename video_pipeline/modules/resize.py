@@ -7,14 +7,21 @@ import logging
 from typing import Dict, Any
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("resize")
 class Resize(BaseModule):
     """
     Модуль для изменения размера видео с помощью FFmpeg.
     """
     
+    required_filters = ('scale',)
+    required_encoders = ('libx264',)
+    pixel_params = {'width': 1280, 'height': 720}
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля изменения размера.
@@ -62,12 +69,18 @@ class Resize(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Размер видео успешно изменен: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при изменении размера видео: {e.stderr.decode()}")
             raise
             
+    def video_filter(self) -> str:
+        """
+        Фильтр для слияния с соседними модулями.
+        """
+        return self._get_filter_complex()
+        
     def _get_filter_complex(self) -> str:
         """
         Формирование фильтра для изменения размера.
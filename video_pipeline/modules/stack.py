@@ -0,0 +1,308 @@
+"""
+Модуль для раскладки нескольких видео на одном кадре (split-screen)
+"""
+import os
+import math
+import subprocess
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.probe import probe, media_duration, has_stream, video_stream
+
+logger = logging.getLogger(__name__)
+
+# Прямоугольник ячейки: x, y, ширина, высота
+Cell = Tuple[int, int, int, int]
+
+def _even(value: float) -> int:
+    # Размеры кадра для libx264 должны быть четными
+    return max(2, int(round(value / 2)) * 2)
+
+@register_module("stack")
+class Stack(BaseModule):
+    """
+    Модуль для раскладки нескольких видео на одном кадре.
+
+    Все входы декодируются один раз, вписываются в свои ячейки и собираются
+    одним графом фильтров (vstack, hstack или xstack) с одним кодированием
+    результата - без промежуточных файлов pad и add_video.
+    """
+
+    required_filters = ('scale', 'crop', 'pad', 'setsar', 'format', 'vstack', 'hstack', 'xstack', 'amix')
+    required_encoders = ('libx264', 'aac')
+    encode_cost = 1.3
+    pixel_params = {'width': None, 'height': None}
+
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        scaled = super().proxy_params(params, factor)
+        # Ячейки произвольной раскладки задаются в пикселях итогового кадра
+        if params.get('cells'):
+            scaled['cells'] = [
+                {key: int(round(cell.get(key, 0) * factor)) for key in ('x', 'y', 'width', 'height')}
+                for cell in params['cells']
+            ]
+        return scaled
+
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        windowed, start, end = super().window_params(params, start, end)
+        # Видео из videos показываются в окне с того же момента, что и вход этапа.
+        # Потоки графа (параметр из streams) уже обрезаны по окну
+        if params.get('videos'):
+            windowed['video_offset'] = float(params.get('video_offset') or 0.0) + start
+        return windowed, start, end
+
+    def __init__(self, params: Dict[str, Any]):
+        """
+        Инициализация модуля раскладки.
+
+        Args:
+            params: Параметры модуля:
+                - videos: Видео (путь или список путей), которые раскладываются
+                          после входного видео этапа
+                - layout: Раскладка: vertical, horizontal, grid или custom
+                          (по умолчанию vertical; custom, если заданы cells)
+                - cells: Ячейки произвольной раскладки - список {x, y, width, height}
+                         в порядке входов (входное видео этапа - первое)
+                - columns: Число столбцов сетки (по умолчанию - округленный вверх
+                           квадратный корень из числа входов)
+                - width: Ширина итогового кадра (по умолчанию - по первому входу)
+                - height: Высота итогового кадра (по умолчанию - по первому входу)
+                - fit: Вписывание видео в ячейку: cover (заполнить с обрезкой),
+                       contain (целиком с полями) или stretch (по умолчанию cover)
+                - color: Цвет полей и незанятых областей (по умолчанию black)
+                - audio: Звук: first (входное видео этапа), номер входа, mix (смешать
+                         все) или none (по умолчанию first)
+                - duration: Длительность: shortest (самый короткий вход), longest
+                            (самый длинный) или first (входное видео этапа)
+                            (по умолчанию shortest)
+                - video_offset: Момент видео из videos в секундах, с которого они
+                                раскладываются (по умолчанию 0; задается рендером окна)
+        """
+        super().__init__(params)
+        videos = params.get('videos') or []
+        self.videos = [videos] if isinstance(videos, str) else [str(v) for v in videos]
+        self.cells = params.get('cells') or None
+        self.layout = params.get('layout', 'custom' if self.cells else 'vertical')
+        self.columns = params.get('columns')
+        self.width = params.get('width')
+        self.height = params.get('height')
+        self.fit = params.get('fit', 'cover')
+        self.color = params.get('color', 'black')
+        self.audio = params.get('audio', 'first')
+        self.duration = params.get('duration', 'shortest')
+        self.video_offset = float(params.get('video_offset') or 0.0)
+
+        if self.layout not in ('vertical', 'horizontal', 'grid', 'custom'):
+            raise ValueError(f"Неизвестная раскладка: {self.layout}")
+        if self.layout == 'custom' and not self.cells:
+            raise ValueError("Для раскладки custom нужен параметр cells")
+        if self.layout == 'custom' and len(self.cells) != len(self.videos) + 1:
+            raise ValueError(f"Число ячеек ({len(self.cells)}) не равно числу входов ({len(self.videos) + 1})")
+        if self.fit not in ('cover', 'contain', 'stretch'):
+            raise ValueError(f"Неизвестный способ вписывания: {self.fit}")
+        if self.duration not in ('shortest', 'longest', 'first'):
+            raise ValueError(f"Неизвестный режим длительности: {self.duration}")
+        if self.audio not in ('first', 'mix', 'none') and not str(self.audio).isdigit():
+            raise ValueError(f"Неизвестный источник звука: {self.audio}")
+
+    def expected_output_duration(self, input_duration: float) -> Optional[float]:
+        durations = [input_duration]
+        for path in self.videos:
+            try:
+                duration = media_duration(probe(path))
+            except (FileNotFoundError, ValueError):
+                return None
+            if duration is None:
+                return None
+            durations.append(max(0.0, duration - self.video_offset))
+        return self._output_duration(durations)
+
+    def _output_duration(self, durations: List[float]) -> float:
+        if self.duration == 'first':
+            return durations[0]
+        return min(durations) if self.duration == 'shortest' else max(durations)
+
+    def _canvas(self, inputs: List[str]) -> Tuple[int, int]:
+        """
+        Размер итогового кадра: заданный или рассчитанный так, чтобы ячейка
+        имела размер первого входа.
+        """
+        if self.width and self.height:
+            return _even(self.width), _even(self.height)
+
+        if self.layout == 'custom':
+            width = max(cell['x'] + cell['width'] for cell in self.cells)
+            height = max(cell['y'] + cell['height'] for cell in self.cells)
+        else:
+            stream = video_stream(probe(inputs[0])) or {}
+            cell_width, cell_height = stream.get('width') or 1280, stream.get('height') or 720
+            columns, rows = self._grid(len(inputs))
+            width, height = cell_width * columns, cell_height * rows
+            # Задана только одна сторона: вторая по пропорциям
+            if self.width:
+                width, height = self.width, height * self.width / width
+            elif self.height:
+                width, height = width * self.height / height, self.height
+        return _even(width), _even(height)
+
+    def _grid(self, count: int) -> Tuple[int, int]:
+        """
+        Число столбцов и строк раскладки.
+        """
+        if self.layout == 'vertical':
+            return 1, count
+        if self.layout == 'horizontal':
+            return count, 1
+        columns = int(self.columns or math.ceil(math.sqrt(count)))
+        return columns, math.ceil(count / columns)
+
+    def _cells(self, count: int, width: int, height: int) -> List[Cell]:
+        """
+        Прямоугольники ячеек в порядке входов.
+        """
+        if self.layout == 'custom':
+            return [(int(c['x']), int(c['y']), _even(c['width']), _even(c['height'])) for c in self.cells]
+        columns, rows = self._grid(count)
+        cell_width, cell_height = _even(width / columns), _even(height / rows)
+        return [((i % columns) * cell_width, (i // columns) * cell_height, cell_width, cell_height)
+                for i in range(count)]
+
+    def _fit_filter(self, width: int, height: int) -> str:
+        if self.fit == 'cover':
+            fit = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+        elif self.fit == 'contain':
+            fit = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                   f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color={self.color}")
+        else:
+            fit = f"scale={width}:{height}"
+        # Все входы стека должны иметь одинаковый формат пикселей
+        return f"{fit},setsar=1,format=yuv420p"
+
+    def _get_filter_complex(self, inputs: List[str], width: int, height: int) -> str:
+        """
+        Граф фильтров раскладки.
+
+        Args:
+            inputs: Пути ко всем входам
+            width: Ширина итогового кадра
+            height: Высота итогового кадра
+
+        Returns:
+            Строка filter_complex с выходом [outv]
+        """
+        cells = self._cells(len(inputs), width, height)
+        parts = [f"[{i}:v]{self._fit_filter(w, h)}[v{i}]" for i, (_, _, w, h) in enumerate(cells)]
+        labels = "".join(f"[v{i}]" for i in range(len(inputs)))
+        shortest = 1 if self.duration == 'shortest' else 0
+
+        # Ячейки одной строки или столбца, заполняющие кадр, собираются
+        # более простыми vstack/hstack
+        covered = sum(w * h for _, _, w, h in cells) == width * height
+        if self.layout == 'vertical' and covered:
+            parts.append(f"{labels}vstack=inputs={len(inputs)}:shortest={shortest}[outv]")
+        elif self.layout == 'horizontal' and covered:
+            parts.append(f"{labels}hstack=inputs={len(inputs)}:shortest={shortest}[outv]")
+        else:
+            positions = "|".join(f"{x}_{y}" for x, y, _, _ in cells)
+            # Незанятые области (неполная сетка, произвольные ячейки) заливаются цветом;
+            # кадр xstack охватывает все ячейки, поэтому он приводится к заданному размеру
+            parts.append(f"{labels}xstack=inputs={len(inputs)}:layout={positions}:"
+                         f"shortest={shortest}:fill={self.color}[stacked]")
+            parts.append(f"[stacked]crop=min(iw\\,{width}):min(ih\\,{height}):0:0,"
+                         f"pad={width}:{height}:0:0:color={self.color}[outv]")
+        return ";".join(parts)
+
+    def _get_audio(self, inputs: List[str]) -> Tuple[List[str], Optional[str]]:
+        """
+        Аргументы звука и фильтр смешивания.
+
+        Returns:
+            Кортеж (аргументы -map для звука, часть filter_complex или None)
+        """
+        if self.audio == 'none':
+            return ['-an'], None
+
+        with_audio = [i for i, path in enumerate(inputs) if has_stream(probe(path), 'audio')]
+        if self.audio == 'mix':
+            if len(with_audio) > 1:
+                mode = {'shortest': 'shortest', 'longest': 'longest', 'first': 'first'}[self.duration]
+                labels = "".join(f"[{i}:a]" for i in with_audio)
+                return (['-map', '[outa]'],
+                        f"{labels}amix=inputs={len(with_audio)}:duration={mode}:normalize=0[outa]")
+            return (['-map', f"{with_audio[0]}:a:0"] if with_audio else ['-an']), None
+
+        index = 0 if self.audio == 'first' else int(self.audio)
+        if index < 0 or index >= len(inputs):
+            raise ValueError(f"Нет входа с номером {index} для звука (входов: {len(inputs)})")
+        if index not in with_audio:
+            logger.warning(f"У входа {index} нет звука, результат будет без звука")
+            return ['-an'], None
+        return ['-map', f"{index}:a:0"], None
+
+    def process(self, input_path: str, output_path: str):
+        """
+        Разложить видео на одном кадре.
+
+        Args:
+            input_path: Путь к входному видео (первая ячейка)
+            output_path: Путь к выходному видео
+        """
+        inputs = [input_path] + self.videos
+        for path in inputs:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Входной файл не найден: {path}")
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        width, height = self._canvas(inputs)
+        filter_complex = self._get_filter_complex(inputs, width, height)
+        audio_args, audio_filter = self._get_audio(inputs)
+        if audio_filter:
+            filter_complex = f"{filter_complex};{audio_filter}"
+
+        cmd = ['ffmpeg', '-i', input_path]
+        for path in self.videos:
+            # Поиск до декодирования: видео начинаются с заданного момента
+            if self.video_offset > 0:
+                cmd.extend(['-ss', f"{self.video_offset:.3f}"])
+            cmd.extend(['-i', path])
+        cmd.extend([
+            '-filter_complex', filter_complex,
+            '-map', '[outv]',
+            *audio_args,
+            '-c:v', 'libx264',
+            '-preset', 'fast',
+            '-threads', '8',
+        ])
+        if audio_args[0] != '-an':
+            cmd.extend(['-c:a', 'aac'])
+
+        # Длительность результата ограничивается явно: звук одного входа
+        # не должен продлевать или обрывать раскладку
+        durations = [media_duration(probe(path)) for path in inputs]
+        durations[1:] = [None if d is None else max(0.0, d - self.video_offset) for d in durations[1:]]
+        if all(d is not None for d in durations):
+            cmd.extend(['-t', f"{self._output_duration(durations):.3f}"])
+
+        cmd.extend([
+            output_path,
+            '-y'  # Перезаписать выходной файл, если существует
+        ])
+
+        logger.info(f"Раскладка {len(inputs)} видео ({self.layout}) в кадр {width}x{height}")
+        logger.debug(f"Выполнение команды: {' '.join(cmd)}")
+
+        try:
+            run_ffmpeg(cmd)
+            logger.info(f"Раскладка видео сохранена: {output_path}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ошибка при раскладке видео: {e.stderr.decode()}")
+            raise
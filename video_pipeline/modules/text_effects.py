@@ -4,16 +4,71 @@
 import os
 import subprocess
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("text_effects")
 class TextEffects(BaseModule):
     """
     Модуль для добавления текста с эффектами на видео.
     """
     
+    required_filters = ('drawtext',)
+    required_encoders = ('libx264',)
+    encode_cost = 1.2
+    pixel_params = {'font_size': 72, 'x': None, 'y': None, 'outline_width': 2}
+    time_params = ('start_time',)
+    
+    # Амплитуда эффектов в пикселях при интенсивности 10
+    effect_amplitudes = {'shake': 5, 'wave': 20}
+    
+    # Дополнительные фильтры каждого эффекта
+    effect_filters = {
+        'shake': ('split', 'format', 'geq', 'overlay'),
+        'wave': ('wave',),
+        'rotate': ('rotate',),
+        'fade': ('fade',),
+        'glow': ('gblur', 'colorbalance'),
+    }
+    
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        filters, encoders = super().ffmpeg_requirements(params)
+        filters.extend(cls.effect_filters.get(params.get('effect', 'shake'), ('null',)))
+        return filters, encoders
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        scaled = super().proxy_params(params, factor)
+        # Амплитуда тряски и волны задана в пикселях и уменьшается вместе с кадром
+        effect = params.get('effect', 'shake')
+        if effect in cls.effect_amplitudes:
+            amplitude = params.get('amplitude')
+            if amplitude is None:
+                amplitude = cls.effect_amplitudes[effect] * params.get('effect_intensity', 5) / 10.0
+            scaled['amplitude'] = amplitude * factor
+        return scaled
+    
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        windowed, start, end = super().window_params(params, start, end)
+        # Текст, появившийся до окна, показывается в окне только оставшееся время
+        start_time = float(params.get('start_time', 0) or 0)
+        if params.get('duration') is not None:
+            text_end = start_time + float(params['duration'])
+            if text_end < start:
+                # Текст, скрытый до начала окна, не должен появиться в его первом кадре
+                windowed['start_time'] = end - start
+                windowed['duration'] = 0.0
+            else:
+                windowed['duration'] = text_end - max(start_time, start)
+        return windowed, start, end
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля.
@@ -29,6 +84,8 @@ class TextEffects(BaseModule):
                 - y: Смещение по Y (если нужно точное позиционирование)
                 - effect: Тип эффекта (shake, wave, rotate, fade, glow)
                 - effect_intensity: Интенсивность эффекта (1-10)
+                - amplitude: Амплитуда тряски или волны в пикселях (по умолчанию
+                             по интенсивности)
                 - start_time: Время появления текста (в секундах)
                 - duration: Длительность показа текста (в секундах)
                 - outline_color: Цвет обводки (по умолчанию black)
@@ -45,6 +102,7 @@ class TextEffects(BaseModule):
         self.y = params.get('y', None)
         self.effect = params.get('effect', 'shake')
         self.effect_intensity = params.get('effect_intensity', 5)
+        self.amplitude = params.get('amplitude', None)
         self.start_time = params.get('start_time', 0)
         self.duration = params.get('duration', None)
         self.outline_color = params.get('outline_color', 'black')
@@ -58,12 +116,11 @@ class TextEffects(BaseModule):
         
         if self.effect == 'shake':
             # Используем фильтры crop и pad с динамическими значениями для создания эффекта тряски
-            amplitude = int(5 * intensity)  # Амплитуда тряски в пикселях
-            freq = 10 * intensity           # Частота тряски
+            amplitude, freq = self._get_shake_params()
             return f"crop=iw-{amplitude}*2:ih-{amplitude}*2:{amplitude}+{amplitude}*sin(t*{freq}):{amplitude}+{amplitude}*cos(t*{freq})"
         
         elif self.effect == 'wave':
-            amplitude = 20 * intensity
+            amplitude = self._get_amplitude()
             freq = 2 * intensity
             return f"wave=a={amplitude}:f={freq}"
         
@@ -73,7 +130,7 @@ class TextEffects(BaseModule):
             
         elif self.effect == 'fade':
             freq = 2 * intensity
-            return f"fade=t=in:st={self.start_time}:d=1,fade=t=out:st={self.start_time + self.duration - 1}:d=1"
+            return f"fade=t=in:st={self.start_time}:d=1,fade=t=out:st={max(0, self.start_time + self.duration - 1)}:d=1"
             
         elif self.effect == 'glow':
             glow_intensity = 2 * self.effect_intensity
@@ -81,6 +138,14 @@ class TextEffects(BaseModule):
             
         return "null"
 
+    def _get_amplitude(self) -> float:
+        """
+        Амплитуда тряски или волны в пикселях.
+        """
+        if self.amplitude is not None:
+            return self.amplitude
+        return self.effect_amplitudes.get(self.effect, 0) * self.effect_intensity / 10.0
+    
     def _get_shake_params(self) -> tuple:
         """
         Получение параметров для эффекта тряски.
@@ -89,8 +154,10 @@ class TextEffects(BaseModule):
             tuple: (amplitude, freq) - амплитуда и частота тряски
         """
         intensity = self.effect_intensity / 10.0  # Нормализация интенсивности
-        amplitude = int(5 * intensity)  # Амплитуда тряски в пикселях
-        freq = 10 * intensity           # Частота тряски
+        # Амплитуда тряски в пикселях; уменьшенная в прокси тряска не должна пропадать
+        amplitude = self._get_amplitude()
+        amplitude = max(1, int(round(amplitude))) if amplitude > 0 else 0
+        freq = 10 * intensity                   # Частота тряски
         return amplitude, freq
 
     def _get_position_string(self) -> str:
@@ -182,7 +249,7 @@ class TextEffects(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Текст с эффектами добавлен: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при добавлении текста: {e.stderr.decode()}")
@@ -0,0 +1,219 @@
+import os
+import shutil
+import subprocess
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.analysis import analyze, MediaAnalysis
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.packets import packet_index
+
+logger = logging.getLogger(__name__)
+
+# Участок считается примыкающим к началу или концу файла с таким допуском
+# (длительность файла включает последний кадр, а детекторы его не учитывают)
+_EDGE_TOLERANCE = 0.25
+
+def _merge(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1e-3:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _intersect(a: List[Tuple[float, float]], b: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    result = []
+    for a_start, a_end in a:
+        for b_start, b_end in b:
+            start, end = max(a_start, b_start), min(a_end, b_end)
+            if end > start:
+                result.append((start, end))
+    return _merge(result)
+
+@register_module("trim_dead_air")
+class TrimDeadAir(BaseModule):
+    """
+    Модуль для удаления черных и тихих участков в начале и в конце видео.
+
+    Участки находятся общим проходом анализа (utils.analysis), результат
+    которого кешируется, поэтому модуль стоит ставить перед дорогими этапами:
+    они обработают только полезную часть видео.
+
+    Параметры:
+        mode (str): Что считать пустым участком: 'any' - черное изображение или
+            тишина, 'all' - черное изображение и тишина одновременно, 'black' -
+            только черное изображение, 'silence' - только тишина, 'none' - ничего
+            не удалять (по умолчанию 'any')
+        min_duration (float): Минимальная длительность удаляемого участка в
+            секундах (по умолчанию 0.5)
+        padding (float): Сколько секунд пустого участка оставить рядом с
+            содержимым (по умолчанию 0)
+        black_threshold (float): Порог яркости черного пикселя от 0 до 1 (по умолчанию 0.1)
+        silence_noise (float): Уровень тишины в дБ (по умолчанию -50)
+        accurate (bool): Точная обрезка с перекодированием (по умолчанию False).
+            Без перекодирования начало сдвигается к ключевому кадру не позже
+            конца пустого участка.
+    """
+
+    required_filters = ('blackdetect', 'silencedetect', 'scdet', 'signalstats')
+
+    # Анализ декодирует вход один раз в уменьшенном размере, а обрезка
+    # обычно копирует потоки
+    encode_cost = 0.3
+
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        if params.get('accurate', False):
+            return list(cls.required_filters), ['libx264', 'aac']
+        return list(cls.required_filters), []
+
+    def __init__(self, params: Dict[str, Any]):
+        super().__init__(params)
+        self.mode = params.get('mode', 'any')
+        self.min_duration = float(params.get('min_duration', 0.5))
+        self.padding = float(params.get('padding', 0))
+        self.black_threshold = float(params.get('black_threshold', 0.1))
+        self.silence_noise = float(params.get('silence_noise', -50))
+        self.accurate = params.get('accurate', False)
+
+        if self.mode not in ('any', 'all', 'black', 'silence', 'none'):
+            raise ValueError(f"Неизвестный режим: {self.mode}")
+
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        # Пустые участки окна не совпадают с пустыми участками всего видео,
+        # поэтому в превью окна вход передается без обрезки
+        params = dict(params)
+        params['mode'] = 'none'
+        return params, start, end
+
+    def expected_output_duration(self, input_duration: float) -> Optional[float]:
+        if self.mode == 'none':
+            return input_duration
+        # Длительность известна только после анализа
+        return None
+
+    def _dead_intervals(self, analysis: MediaAnalysis) -> List[Tuple[float, float]]:
+        """
+        Пустые участки видео в выбранном режиме.
+
+        Отсутствующий поток (например, видео без звука) не учитывается:
+        режим сводится к оставшемуся виду участков.
+        """
+        kinds = []
+        if self.mode in ('any', 'all', 'black') and analysis.has_video:
+            kinds.append(_merge(analysis.black))
+        if self.mode in ('any', 'all', 'silence') and analysis.has_audio:
+            kinds.append(_merge(analysis.silence))
+        if not kinds:
+            return []
+        if self.mode == 'all' and len(kinds) == 2:
+            return _intersect(kinds[0], kinds[1])
+        return _merge([interval for intervals in kinds for interval in intervals])
+
+    def content_range(self, analysis: MediaAnalysis) -> Tuple[float, float]:
+        """
+        Границы полезной части видео.
+
+        Args:
+            analysis: Результат анализа входного видео
+
+        Returns:
+            Кортеж (начало, конец) в секундах
+        """
+        duration = analysis.duration
+        start, end = 0.0, duration
+        intervals = self._dead_intervals(analysis)
+
+        if intervals and intervals[0][0] <= _EDGE_TOLERANCE:
+            lead = intervals[0][1]
+            if lead - self.min_duration >= -1e-6:
+                start = max(0.0, lead - self.padding)
+        if intervals and intervals[-1][1] >= duration - _EDGE_TOLERANCE:
+            tail = intervals[-1][0]
+            if duration - tail - self.min_duration >= -1e-6:
+                end = min(duration, tail + self.padding)
+
+        if end <= start:
+            # Видео целиком пустое: обрезать нечего
+            logger.warning("Видео не содержит участков с изображением и звуком, обрезка пропущена")
+            return 0.0, duration
+        return start, end
+
+    def process(self, input_path: str, output_path: str):
+        """
+        Удалить пустые участки в начале и в конце видео.
+
+        Args:
+            input_path: Путь к входному видео
+            output_path: Путь к выходному видео
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Входной файл не найден: {input_path}")
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        if self.mode == 'none':
+            shutil.copyfile(input_path, output_path)
+            return
+
+        try:
+            analysis = analyze(input_path, black_threshold=self.black_threshold,
+                               silence_noise=self.silence_noise)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ошибка при анализе видео: {e.stderr.decode()}")
+            raise
+
+        start, end = self.content_range(analysis)
+        if start <= 0 and end >= analysis.duration:
+            logger.info(f"Пустых участков в начале и в конце нет: {input_path}")
+            shutil.copyfile(input_path, output_path)
+            return
+
+        if self.accurate:
+            cmd = [
+                'ffmpeg',
+                '-y',
+                '-ss', f"{start:.3f}",
+                '-i', input_path,
+                '-t', f"{end - start:.3f}",
+                '-c:v', 'libx264',
+                '-c:a', 'aac',
+                '-preset', 'fast',
+                output_path
+            ]
+        else:
+            # Без перекодирования начало возможно только на ключевом кадре;
+            # если до конца пустого участка его нет, участок остается
+            if start > 0 and analysis.has_video:
+                try:
+                    start = min(packet_index(input_path).keyframe_before(start), start)
+                except ValueError as e:
+                    logger.warning(f"Не удалось построить индекс ключевых кадров: {str(e)}")
+            cmd = [
+                'ffmpeg',
+                '-y',
+                '-ss', f"{start:.3f}",
+                '-i', input_path,
+                '-t', f"{end - start:.3f}",
+                '-c', 'copy',
+                '-avoid_negative_ts', 'make_zero',
+                output_path
+            ]
+
+        logger.info(f"Удаление пустых участков: оставлен фрагмент {start:.3f}-{end:.3f} сек "
+                    f"из {analysis.duration:.3f} сек")
+
+        try:
+            run_ffmpeg(cmd)
+            logger.info(f"Пустые участки удалены: {input_path} -> {output_path}")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ошибка при удалении пустых участков: {e.stderr.decode()}")
+            raise
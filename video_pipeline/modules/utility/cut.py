@@ -2,19 +2,38 @@
 Модуль для нарезки видео на равные части
 """
 import os
+import json
 import subprocess
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
+from video_pipeline.core.context import current_context
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.packets import packet_index
+from video_pipeline.utils.probe import probe, media_duration
+from video_pipeline.utils.scenes import keyframe_scene_scores
 
 logger = logging.getLogger(__name__)
 
+@register_module("utility.cut")
 class Cut(BaseModule):
     """
     Модуль для нарезки видео на равные части с помощью FFmpeg.
+    
+    В режиме split_on: scene части режутся по сменам сцен и ключевым кадрам
+    рядом с заданной длительностью и копируются без перекодирования.
     """
     
+    required_encoders = ('libx264',)
+    
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        if params.get('split_on', 'duration') == 'scene':
+            return ['scale', 'select', 'metadata'], []
+        return super().ffmpeg_requirements(params)
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля нарезки.
@@ -25,6 +44,17 @@ class Cut(BaseModule):
                 - output_dir: Директория для сохранения частей
                 - prefix: Префикс для имен файлов частей
                 - use_input_name: Использовать имя входного файла как префикс
+                - split_on: duration (равные части, по умолчанию) или scene
+                  (разрез по сменам сцен и ключевым кадрам, без перекодирования)
+                - scene_threshold: Минимальная оценка смены сцены от 0 до 1 (по умолчанию 0.3)
+                - scene_tolerance: Допустимое отклонение точки разреза от заданной
+                  длительности в секундах (по умолчанию четверть duration)
+                - min_duration: Части короче этой длительности не создаются
+                - merge_short_tail: Присоединять короткую последнюю часть к предыдущей
+                  (короткая - меньше min_duration или половины duration)
+                - overlap: Перекрытие соседних частей в секундах
+                - manifest: Путь к JSON-манифесту частей; true - <output_dir>/<prefix>manifest.json
+                  (по умолчанию), false - не создавать
         """
         super().__init__(params)
         self.duration = params.get('duration')
@@ -35,6 +65,17 @@ class Cut(BaseModule):
         self.prefix = params.get('prefix', 'part_')
         self.use_input_name = params.get('use_input_name', False)
         
+        self.split_on = params.get('split_on', 'duration')
+        if self.split_on not in ('duration', 'scene'):
+            raise ValueError(f"Unknown split mode: {self.split_on}")
+        self.scene_threshold = params.get('scene_threshold', 0.3)
+        self.scene_tolerance = params.get('scene_tolerance', self.duration / 4)
+        
+        self.min_duration = params.get('min_duration', 0)
+        self.merge_short_tail = params.get('merge_short_tail', False)
+        self.overlap = params.get('overlap', 0)
+        self.manifest = params.get('manifest', True)
+        
     def process(self, input_path: str, output_path: str):
         """
         Нарезка видео на равные части.
@@ -49,14 +90,99 @@ class Cut(BaseModule):
         # Создаем директорию для частей, если её нет
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Получаем длительность видео
+        # План всех частей строится заранее: части, которые были бы удалены
+        # как слишком короткие, не кодируются
+        parts = self.plan_parts(input_path)
+        num_parts = len(parts)
+            
+        # Контрольная точка этапа: части, созданные прерванным запуском, не перекодируются
+        checkpoint = current_context().checkpoint
+            
+        # Нарезаем видео на части
+        for i, part in enumerate(parts):
+            start_time = part["start"]
+            part_duration = part["duration"]
+            output_file = part["path"]
+            
+            if self.split_on == 'scene':
+                chunk_key = f"{i}:{start_time:.3f}:{part_duration:.3f}:copy"
+                # Начало части - ключевой кадр, поэтому поток копируется без перекодирования
+                cmd = [
+                    'ffmpeg',
+                    '-ss', f"{start_time:.3f}",
+                    '-i', input_path,
+                    '-t', f"{part_duration:.3f}",
+                    '-c', 'copy',
+                    '-avoid_negative_ts', 'make_zero',
+                    output_file,
+                    '-y'
+                ]
+            else:
+                chunk_key = f"{i}:{start_time:.3f}:{part_duration:.3f}"
+                cmd = [
+                    'ffmpeg',
+                    '-i', input_path,
+                    '-ss', f"{start_time:.3f}",
+                    '-t', f"{part_duration:.3f}",
+                    '-c:v', 'libx264',
+                    '-preset', 'fast',
+                    '-c:a', 'copy',  # Копируем аудио без перекодирования
+                    '-threads', '8',
+                    output_file,
+                    '-y'  # Перезаписать выходной файл, если существует
+                ]
+            
+            if checkpoint is not None and checkpoint.chunk_done(chunk_key, output_file):
+                logger.info(f"Part {i+1}/{num_parts} already created, skipping: {output_file}")
+                continue
+            
+            logger.debug(f"Executing command: {' '.join(cmd)}")
+            
+            try:
+                run_ffmpeg(cmd)
+                logger.info(f"Part {i+1}/{num_parts} created: {output_file}")
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Error creating part {i+1}: {e.stderr.decode()}")
+                raise
+                
+            if checkpoint is not None:
+                checkpoint.record_chunk(chunk_key, output_file)
+                
+        self._write_manifest(input_path, parts)
+                
+    def plan_parts(self, input_path: str) -> List[Dict[str, Any]]:
+        """
+        План нарезки: границы всех частей без кодирования.
+        
+        Длительность берется из кешированного ffprobe. К границам применяются
+        overlap, merge_short_tail и min_duration.
+        
+        Args:
+            input_path: Путь к входному видео
+            
+        Returns:
+            Список частей: index, start, duration, path
+        """
         duration = self._get_video_duration(input_path)
         if duration == 0:
             raise ValueError("Could not determine video duration")
             
-        # Рассчитываем количество частей
-        num_parts = int(duration / self.duration) + (1 if duration % self.duration > 0 else 0)
-        
+        # Границы частей: равные отрезки или смены сцен рядом с ними
+        keyframes = None
+        if self.split_on == 'scene':
+            scores = keyframe_scene_scores(input_path)
+            keyframes = packet_index(input_path)
+            boundaries = self._scene_boundaries(scores, duration)
+        else:
+            num_parts = int(duration / self.duration) + (1 if duration % self.duration > 0 else 0)
+            boundaries = [i * self.duration for i in range(num_parts)] + [duration]
+            
+        # Короткий хвост присоединяется к предыдущей части
+        tail_limit = self.min_duration if self.min_duration else self.duration / 2
+        if self.merge_short_tail and len(boundaries) > 2 and boundaries[-1] - boundaries[-2] < tail_limit:
+            logger.info(f"Merging short tail of {boundaries[-1] - boundaries[-2]:.1f}s into the previous part")
+            del boundaries[-2]
+            
         # Формируем префикс для имен файлов
         if self.use_input_name:
             input_name = os.path.splitext(os.path.basename(input_path))[0]
@@ -64,32 +190,100 @@ class Cut(BaseModule):
         else:
             file_prefix = self.prefix
             
-        # Нарезаем видео на части
-        for i in range(num_parts):
-            start_time = i * self.duration
-            output_file = os.path.join(self.output_dir, f"{file_prefix}{i+1:03d}.mp4")
-            
-            cmd = [
-                'ffmpeg',
-                '-i', input_path,
-                '-ss', str(start_time),
-                '-t', str(self.duration),
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-c:a', 'copy',  # Копируем аудио без перекодирования
-                '-threads', '8',
-                output_file,
-                '-y'  # Перезаписать выходной файл, если существует
-            ]
+        parts = []
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            if self.overlap and start > 0:
+                start = max(0.0, start - self.overlap)
+                if keyframes is not None:
+                    # Без перекодирования часть может начинаться только с ключевого кадра
+                    start = keyframes.keyframe_before(start)
+            if self.min_duration and end - start < self.min_duration:
+                logger.info(f"Skipping part {start:.1f}-{end:.1f}s: shorter than {self.min_duration}s")
+                continue
+            parts.append({
+                "index": len(parts) + 1,
+                "start": round(float(start), 3),
+                "duration": round(float(end - start), 3),
+                "path": os.path.join(self.output_dir, f"{file_prefix}{len(parts) + 1:03d}.mp4"),
+            })
+        return parts
+        
+    def _write_manifest(self, input_path: str, parts: List[Dict[str, Any]]):
+        """
+        Запись JSON-манифеста частей для следующих этапов.
+        
+        Args:
+            input_path: Путь к входному видео
+            parts: План частей
+        """
+        if not self.manifest:
+            return
             
-            logger.debug(f"Executing command: {' '.join(cmd)}")
+        if self.manifest is True:
+            if self.use_input_name:
+                name = f"{os.path.splitext(os.path.basename(input_path))[0]}_manifest.json"
+            else:
+                name = f"{self.prefix}manifest.json"
+            manifest_path = os.path.join(self.output_dir, name)
+        else:
+            manifest_path = self.manifest
             
-            try:
-                subprocess.run(cmd, check=True, capture_output=True)
-                logger.info(f"Part {i+1}/{num_parts} created: {output_file}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Error creating part {i+1}: {e.stderr.decode()}")
-                raise
+        manifest = {
+            "input": os.path.abspath(input_path),
+            "duration": self._get_video_duration(input_path),
+            "parts": [dict(part, path=os.path.abspath(part["path"]), size=os.path.getsize(part["path"]))
+                      for part in parts],
+        }
+        
+        manifest_dir = os.path.dirname(manifest_path)
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        logger.info(f"Manifest of {len(parts)} parts saved to {manifest_path}")
+                
+    def _scene_boundaries(self, keyframes: List[Tuple[float, float]], duration: float) -> List[float]:
+        """
+        Выбор границ частей по сменам сцен.
+        
+        Для каждой части ищется ключевой кадр в пределах scene_tolerance от
+        заданной длительности: сначала самая сильная смена сцены, затем
+        ближайший к цели ключевой кадр.
+        
+        Args:
+            keyframes: Ключевые кадры с оценками смены сцены
+            duration: Длительность видео в секундах
+            
+        Returns:
+            Список границ частей от 0 до duration
+        """
+        logger.info(f"Scene analysis: {len(keyframes)} keyframes, "
+                    f"{sum(1 for _, score in keyframes if score >= self.scene_threshold)} scene changes")
+        
+        boundaries = [0.0]
+        while duration - boundaries[-1] > self.duration + self.scene_tolerance:
+            last = boundaries[-1]
+            target = last + self.duration
+            later = [(t, score) for t, score in keyframes if t > last]
+            if not later:
+                break
+                
+            window = [(t, score) for t, score in later if abs(t - target) <= self.scene_tolerance]
+            scenes = [(t, score) for t, score in window if score >= self.scene_threshold]
+            if scenes:
+                cut = max(scenes, key=lambda k: k[1])[0]
+            else:
+                cut = min(window or later, key=lambda k: abs(k[0] - target))[0]
+                if not window:
+                    logger.warning(f"No keyframe within {self.scene_tolerance}s of {target:.1f}s, cutting at {cut:.1f}s")
+            if cut >= duration:
+                break
+            boundaries.append(cut)
+            
+        boundaries.append(duration)
+        return boundaries
                 
     def _get_video_duration(self, video_path: str) -> float:
         """
@@ -101,18 +295,8 @@ class Cut(BaseModule):
         Returns:
             Длительность видео в секундах
         """
-        cmd = [
-            'ffprobe', 
-            '-v', 'error', 
-            '-show_entries', 'format=duration', 
-            '-of', 'default=noprint_wrappers=1:nokey=1', 
-            video_path
-        ]
-        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            duration = float(result.stdout.strip())
-            return duration
-        except (subprocess.SubprocessError, ValueError) as e:
+            return media_duration(probe(video_path)) or 0.0
+        except (OSError, ValueError) as e:
             logger.warning(f"Could not get video duration: {str(e)}")
             return 0.0
@@ -3,19 +3,45 @@
 """
 import os
 import logging
-import importlib
 import shutil
-from typing import Dict, Any, Type, Optional
+from typing import Dict, Any, List, Type, Optional, Tuple
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module, get_module_class
 
 logger = logging.getLogger(__name__)
 
+@register_module("utility.module_wrapper")
 class ModuleWrapper(BaseModule):
     """
     Модуль-обертка для вызова других модулей напрямую.
     """
     
+    @classmethod
+    def ffmpeg_requirements(cls, params: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        module_name = params.get('module_name')
+        if not module_name:
+            return [], []
+        return get_module_class(module_name).ffmpeg_requirements(params.get('module_params', {}))
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        params = dict(params)
+        if params.get('module_name'):
+            module_class = get_module_class(params['module_name'])
+            params['module_params'] = module_class.proxy_params(params.get('module_params') or {}, factor)
+        return params
+    
+    @classmethod
+    def window_params(cls, params: Dict[str, Any], start: float,
+                      end: float) -> Tuple[Dict[str, Any], float, float]:
+        params = dict(params)
+        if params.get('module_name'):
+            module_class = get_module_class(params['module_name'])
+            params['module_params'], _, _ = module_class.window_params(params.get('module_params') or {}, start, end)
+        # Вход этапа передается дальше без изменений, поэтому окно следующих этапов прежнее
+        return params, start, end
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля-обертки.
@@ -54,41 +80,10 @@ class ModuleWrapper(BaseModule):
             Экземпляр импортированного модуля
         """
         try:
-            # Разбиваем путь к модулю
-            module_path_parts = module_name.split('.')
-            
-            # Пробуем несколько возможных путей импорта
-            possible_paths = [
-                f"video_pipeline.modules.{module_name}",  # Стандартный путь
-                f"video_pipeline.modules.utility.{module_name}"  # Путь в utility
-            ]
-            
-            # Если в имени модуля уже есть точки, значит путь уже указан полностью
-            if len(module_path_parts) > 1:
-                possible_paths = [f"video_pipeline.modules.{module_name}"] + possible_paths
-            
-            # Пробуем импортировать по каждому из путей
-            for path in possible_paths:
-                try:
-                    module = importlib.import_module(path)
-                    
-                    # Получаем все классы из модуля
-                    module_classes = [cls for name, cls in module.__dict__.items() 
-                                    if isinstance(cls, type) and issubclass(cls, BaseModule) and cls != BaseModule]
-                    
-                    if module_classes:
-                        # Берем первый найденный класс модуля
-                        module_class = module_classes[0]
-                        
-                        # Создаем экземпляр модуля
-                        logger.info(f"Successfully imported module from path: {path}")
-                        return module_class(module_params)
-                except ImportError:
-                    continue
-            
-            # Если ни один импорт не сработал
-            raise ImportError(f"Could not import module {module_name} from any possible paths")
-            
+            # Модуль ищется в реестре по имени (с запасным вариантом utility.<имя>)
+            module_class = get_module_class(module_name)
+            logger.info(f"Successfully resolved module {module_name}: {module_class.__name__}")
+            return module_class(module_params)
         except (ImportError, AttributeError) as e:
             logger.error(f"Error importing module {module_name}: {str(e)}")
             raise ValueError(f"Failed to import module {module_name}: {str(e)}")
@@ -5,15 +5,33 @@ import json
 from typing import Dict, Any, List
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+# Режимы записи результата:
+# faststart - обычный MP4, индекс переносится в начало файла после кодирования;
+# fragmented - фрагментированный MP4, читается по мере записи;
+# hls - сегменты fMP4 и плейлист HLS, который обновляется после каждого сегмента
+OUTPUT_MODES = ('faststart', 'fragmented', 'hls')
+
+@register_module("utility.prepare_for_yt")
 class PrepareForYt(BaseModule):
+    required_filters = ('overlay',)
+    required_encoders = ('libx264', 'aac')
 
     
     def __init__(self, params: Dict[str, Any]):
 
         super().__init__(params)
+        self.output_mode = params.get('output_mode', 'faststart')
+        self.segment_duration = params.get('segment_duration', 4)
+        
+        if self.output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Неизвестный режим записи: {self.output_mode}. Допустимые: {', '.join(OUTPUT_MODES)}")
+        if self.segment_duration <= 0:
+            raise ValueError("Длительность сегмента должна быть больше нуля")
         
     def process(self, input_path: str, output_path: str):
         if not os.path.exists(input_path):
@@ -39,9 +57,9 @@ class PrepareForYt(BaseModule):
                 '-pix_fmt', 'yuv420p',
                 '-crf', '18', 
                 '-preset', 'fast',
-                '-movflags', '+faststart',
                 '-c:a', 'aac',
                 '-b:a', '128k',
+                *self._container_args(output_path),
                 '-y',
                 output_path
             ]
@@ -86,9 +104,9 @@ class PrepareForYt(BaseModule):
                 '-pix_fmt', 'yuv420p',
                 '-crf', '18',
                 '-preset', 'fast',
-                '-movflags', '+faststart',
                 '-c:a', 'aac',
                 '-b:a', '128k',
+                *self._container_args(output_path),
                 '-y',
                 output_path
             ]
@@ -96,7 +114,7 @@ class PrepareForYt(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            result = run_ffmpeg(cmd, text=True)
             logger.info(f"Видео обработано: {input_path} -> {output_path}")
             if result.stderr:
                 logger.debug(f"Вывод FFmpeg: {result.stderr}")
@@ -104,6 +122,45 @@ class PrepareForYt(BaseModule):
             logger.error(f"Ошибка при обработке видео: {e.stderr}")
             raise
     
+    def _container_args(self, output_path: str) -> List[str]:
+        """
+        Параметры контейнера для выбранного режима записи.
+        
+        В режимах fragmented и hls ключевые кадры ставятся каждые
+        segment_duration секунд: по ним режутся фрагменты и сегменты, и
+        результат можно читать, пока идет кодирование. Перезапись файла
+        для faststart после кодирования в этих режимах не нужна.
+        
+        Args:
+            output_path: Путь к результату (для hls - путь к плейлисту)
+            
+        Returns:
+            Список аргументов FFmpeg
+        """
+        if self.output_mode == 'faststart':
+            return ['-movflags', '+faststart']
+        
+        keyframes = ['-force_key_frames', f"expr:gte(t,n_forced*{self.segment_duration})"]
+        if self.output_mode == 'fragmented':
+            return keyframes + ['-movflags', '+frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4']
+        
+        if not output_path.lower().endswith('.m3u8'):
+            logger.warning(f"Для режима hls ожидается плейлист .m3u8: {output_path}")
+        # Сегменты лежат рядом с плейлистом: out.m3u8 -> out_00000.m4s, out_init.mp4
+        root = os.path.splitext(output_path)[0]
+        name = os.path.basename(root)
+        return keyframes + [
+            '-f', 'hls',
+            '-hls_time', str(self.segment_duration),
+            '-hls_list_size', '0',
+            '-hls_playlist_type', 'event',
+            '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', f"{name}_init.mp4",
+            '-hls_segment_filename', f"{root}_%05d.m4s",
+            # Сегмент появляется под своим именем только после записи целиком
+            '-hls_flags', 'independent_segments+temp_file',
+        ]
+    
     def _get_streams_info(self, input_path: str) -> Dict:
         """Получает полную информацию о потоках в файле"""
         cmd = [
@@ -7,14 +7,28 @@ import logging
 from typing import Dict, Any
 
 from video_pipeline.modules.base import BaseModule
+from video_pipeline.modules.registry import register_module
+from video_pipeline.utils.ffmpeg import run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+@register_module("watermark")
 class Watermark(BaseModule):
     """
     Модуль для добавления водяного знака (изображения) на видео.
     """
     
+    required_filters = ('scale', 'format', 'colorchannelmixer', 'overlay')
+    required_encoders = ('libx264',)
+    
+    @classmethod
+    def proxy_params(cls, params: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        # Масштаб задается относительно размера изображения, поэтому в прокси
+        # изображение уменьшается вместе с видео
+        scaled = dict(params)
+        scaled['scale'] = params.get('scale', 0.2) * factor
+        return scaled
+    
     def __init__(self, params: Dict[str, Any]):
         """
         Инициализация модуля добавления водяного знака.
@@ -79,7 +93,7 @@ class Watermark(BaseModule):
         logger.debug(f"Выполнение команды: {' '.join(cmd)}")
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            run_ffmpeg(cmd)
             logger.info(f"Водяной знак успешно добавлен: {input_path} -> {output_path}")
         except subprocess.CalledProcessError as e:
             logger.error(f"Ошибка при добавлении водяного знака: {e.stderr.decode()}")
@@ -0,0 +1,214 @@
+"""
+Single-pass media analysis: black frames, silence, scene cuts and colour statistics
+"""
+import os
+import re
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional, Tuple
+
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+from video_pipeline.utils.ffmpeg import run_ffmpeg
+from video_pipeline.utils.fingerprint import file_fingerprint
+from video_pipeline.utils.probe import probe, media_duration, has_stream
+
+logger = logging.getLogger(__name__)
+
+# Версия формата результата; при изменении анализа старый кеш не используется
+ANALYSIS_VERSION = 1
+
+# Ширина кадра для анализа: черные кадры, сцены и средний цвет различимы
+# и на маленьком изображении
+ANALYSIS_WIDTH = 160
+
+# Частота кадров для статистики цвета (signalstats): средние значения
+# почти не меняются между соседними кадрами
+STATS_FPS = 2
+
+# Минимальная длительность черного участка и тишины, которые попадают в результат
+MIN_INTERVAL = 0.1
+
+# Порог scdet (0-100); смены сцен со слабой оценкой не сохраняются
+SCENE_THRESHOLD = 10.0
+
+_BLACK_RE = re.compile(r"black_start:\s*([0-9.eE+-]+)\s+black_end:\s*([0-9.eE+-]+)")
+_SILENCE_START_RE = re.compile(r"silence_start:\s*([0-9.eE+-]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*([0-9.eE+-]+)")
+_SCENE_RE = re.compile(r"lavfi\.scd\.score:\s*([0-9.eE+-]+),\s*lavfi\.scd\.time:\s*([0-9.eE+-]+)")
+_STATS_RE = re.compile(r"lavfi\.signalstats\.(YAVG|UAVG|VAVG)=([0-9.eE+-]+)")
+
+Interval = Tuple[float, float]
+
+@dataclass
+class MediaAnalysis:
+    """
+    Result of the analysis pass.
+
+    Attributes:
+        duration: Duration of the file in seconds
+        has_video: The file has a video stream
+        has_audio: The file has an audio stream
+        black: Black intervals (start, end) in seconds
+        silence: Silent intervals (start, end) in seconds
+        scenes: Scene cuts (time in seconds, score from 0 to 1)
+        yuv: Average Y, U and V of the sampled frames (0-255), None without video
+    """
+    duration: float
+    has_video: bool
+    has_audio: bool
+    black: List[Interval] = field(default_factory=list)
+    silence: List[Interval] = field(default_factory=list)
+    scenes: List[Tuple[float, float]] = field(default_factory=list)
+    yuv: Optional[Tuple[float, float, float]] = None
+
+    @property
+    def average_color(self) -> Optional[str]:
+        """
+        Average colour of the video as ``0xRRGGBB`` (BT.601), None without video.
+        """
+        if self.yuv is None:
+            return None
+        y, u, v = self.yuv[0], self.yuv[1] - 128, self.yuv[2] - 128
+        rgb = (y + 1.402 * v, y - 0.344136 * u - 0.714136 * v, y + 1.772 * u)
+        return "0x" + "".join(f"{min(255, max(0, int(round(c)))):02X}" for c in rgb)
+
+def _analysis_command(path: str, has_video: bool, has_audio: bool,
+                      black_threshold: float, silence_noise: float) -> List[str]:
+    """
+    Build the FFmpeg command that runs all detectors on one decode of the file.
+    """
+    graph = []
+    outputs = []
+    if has_video:
+        graph.append(
+            f"[0:v:0]scale={ANALYSIS_WIDTH}:-2,"
+            f"blackdetect=d={MIN_INTERVAL}:pix_th={black_threshold:g},"
+            f"scdet=threshold={SCENE_THRESHOLD:g},split[vout][vstats]"
+        )
+        graph.append(f"[vstats]fps={STATS_FPS},signalstats,metadata=mode=print:file=-,nullsink")
+        outputs += ['-map', '[vout]']
+    if has_audio:
+        graph.append(f"[0:a:0]silencedetect=n={silence_noise:g}dB:d={MIN_INTERVAL}[aout]")
+        outputs += ['-map', '[aout]']
+
+    return [
+        'ffmpeg',
+        '-hide_banner',
+        '-nostats',
+        '-i', path,
+        '-filter_complex', ";".join(graph),
+        *outputs,
+        '-f', 'null',
+        '-'
+    ]
+
+def _parse_analysis(stdout: str, stderr: str, duration: float,
+                    has_video: bool, has_audio: bool) -> MediaAnalysis:
+    """
+    Parse detector logs (stderr) and frame statistics (stdout).
+    """
+    result = MediaAnalysis(duration=duration, has_video=has_video, has_audio=has_audio)
+
+    silence_start = None
+    for line in stderr.splitlines():
+        match = _BLACK_RE.search(line)
+        if match:
+            result.black.append((float(match.group(1)), float(match.group(2))))
+            continue
+        match = _SILENCE_START_RE.search(line)
+        if match:
+            silence_start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END_RE.search(line)
+        if match and silence_start is not None:
+            result.silence.append((silence_start, float(match.group(1))))
+            silence_start = None
+            continue
+        match = _SCENE_RE.search(line)
+        if match:
+            result.scenes.append((float(match.group(2)), float(match.group(1)) / 100.0))
+    # Тишина до конца файла может остаться без silence_end
+    if silence_start is not None and duration > silence_start:
+        result.silence.append((silence_start, duration))
+
+    sums = {"YAVG": 0.0, "UAVG": 0.0, "VAVG": 0.0}
+    counts = {"YAVG": 0, "UAVG": 0, "VAVG": 0}
+    for match in _STATS_RE.finditer(stdout):
+        sums[match.group(1)] += float(match.group(2))
+        counts[match.group(1)] += 1
+    if counts["YAVG"]:
+        result.yuv = tuple(sums[key] / max(counts[key], 1) for key in ("YAVG", "UAVG", "VAVG"))
+
+    result.scenes.sort()
+    return result
+
+def analyze(path: str, black_threshold: float = 0.1, silence_noise: float = -50.0) -> MediaAnalysis:
+    """
+    Analyze a media file in a single decoding pass.
+
+    The file is decoded once; the video is downscaled to ANALYSIS_WIDTH and
+    fed to ``blackdetect`` and ``scdet``, a sample of STATS_FPS frames per
+    second goes to ``signalstats``, and the audio to ``silencedetect``, all
+    in one filter graph. Results are cached by file fingerprint and
+    detector thresholds, so every module and run that needs any of them
+    shares the same pass.
+
+    Args:
+        path: Path to the media file
+        black_threshold: Luminance below which a pixel is black (0-1, pix_th of blackdetect)
+        silence_noise: Level in dB below which audio is silent (n of silencedetect)
+
+    Returns:
+        Analysis result
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file has neither video nor audio
+        subprocess.CalledProcessError: If FFmpeg fails
+        RunCancelled: If the run is cancelled during the pass
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"File not found: {path}")
+
+    key = f"{fingerprint}-v{ANALYSIS_VERSION}-{black_threshold:g}-{silence_noise:g}"
+    try:
+        cache_path = os.path.join(get_cache_dir("analysis"), f"{key}.json")
+    except OSError:
+        cache_path = None
+
+    cached = load_json(cache_path) if cache_path else None
+    if cached is not None:
+        try:
+            return MediaAnalysis(
+                duration=float(cached["duration"]),
+                has_video=bool(cached["has_video"]),
+                has_audio=bool(cached["has_audio"]),
+                black=[(float(s), float(e)) for s, e in cached["black"]],
+                silence=[(float(s), float(e)) for s, e in cached["silence"]],
+                scenes=[(float(t), float(s)) for t, s in cached["scenes"]],
+                yuv=tuple(cached["yuv"]) if cached.get("yuv") else None,
+            )
+        except (KeyError, TypeError, ValueError):
+            # Поврежденный кеш анализируется заново
+            pass
+
+    info = probe(path)
+    has_video = has_stream(info, "video")
+    has_audio = has_stream(info, "audio")
+    if not has_video and not has_audio:
+        raise ValueError(f"No video or audio stream in {path}")
+    duration = media_duration(info) or 0.0
+
+    cmd = _analysis_command(path, has_video, has_audio, black_threshold, silence_noise)
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    result = run_ffmpeg(cmd)
+
+    analysis = _parse_analysis(result.stdout.decode('utf-8', errors='ignore'),
+                               result.stderr.decode('utf-8', errors='ignore'),
+                               duration, has_video, has_audio)
+    logger.info(f"Analysis of {path}: {len(analysis.black)} black, {len(analysis.silence)} silent "
+                f"intervals, {len(analysis.scenes)} scene cuts")
+    if cache_path:
+        save_json(cache_path, asdict(analysis))
+    return analysis
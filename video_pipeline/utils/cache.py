@@ -0,0 +1,68 @@
+"""
+On-disk cache location and helpers
+"""
+import os
+import json
+import logging
+import tempfile
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def get_cache_dir(*parts: str) -> str:
+    """
+    Get (and create) a cache directory.
+
+    The base directory is taken from VIDEO_PIPELINE_CACHE_DIR, then from
+    XDG_CACHE_HOME, and defaults to ~/.cache/video_pipeline.
+
+    Args:
+        *parts: Subdirectories inside the cache directory
+
+    Returns:
+        Path to the directory
+    """
+    base = os.environ.get("VIDEO_PIPELINE_CACHE_DIR")
+    if not base:
+        xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(xdg, "video_pipeline")
+
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_json(path: str) -> Optional[Any]:
+    """
+    Read a JSON cache file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Parsed data or None if the file is missing or damaged
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_json(path: str, data: Any):
+    """
+    Atomically write a JSON cache file.
+
+    Cache write errors are logged and ignored: a cache must never break processing.
+
+    Args:
+        path: Path to the file
+        data: Data to save
+    """
+    try:
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Failed to write cache file {path}: {str(e)}")
@@ -1,13 +1,277 @@
 """
 Utilities for working with FFmpeg
 """
+import os
+import shutil
 import subprocess
 import logging
 import sys
 import platform
+import threading
+from typing import Dict, Any, List, Optional
+
+from video_pipeline.core.context import RunCancelled, current_context, raise_if_cancelled
+from video_pipeline.core.metrics import METRICS
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
 
 logger = logging.getLogger(__name__)
 
+# Возможности FFmpeg, уже определенные в этом процессе (ключ - путь и mtime бинарника)
+_capabilities = {}
+_capabilities_lock = threading.Lock()
+
+def _binary_key(path: str) -> str:
+    stat = os.stat(path)
+    return f"{os.path.realpath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+def _list_names(ffmpeg_path: str, option: str) -> List[str]:
+    """
+    Parse names from ``ffmpeg -encoders`` / ``ffmpeg -filters`` output.
+    """
+    result = subprocess.run(
+        [ffmpeg_path, "-hide_banner", option],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True
+    )
+    names = []
+    for line in result.stdout.decode('utf-8', errors='ignore').splitlines():
+        # Строки списка: " V....D libx264  описание", строки легенды содержат "="
+        parts = line.split()
+        if (line.startswith(" ") and len(parts) >= 3 and "=" not in parts[:3]
+                and set(parts[0]) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZ.|")):
+            names.append(parts[1])
+    return names
+
+def get_ffmpeg_capabilities(ffmpeg: str = "ffmpeg") -> Optional[Dict[str, Any]]:
+    """
+    Get version, encoders and filters of the FFmpeg binary.
+
+    Results are cached in memory and on disk, keyed by the binary's path,
+    mtime and size, so FFmpeg is only queried again after it is replaced.
+
+    Args:
+        ffmpeg: FFmpeg executable name or path
+
+    Returns:
+        Dictionary with keys path, version, encoders, filters or None if FFmpeg is not found
+    """
+    path = shutil.which(ffmpeg)
+    if path is None:
+        return None
+
+    try:
+        key = _binary_key(path)
+    except OSError:
+        return None
+
+    with _capabilities_lock:
+        if key in _capabilities:
+            return _capabilities[key]
+
+        try:
+            cache_path = os.path.join(get_cache_dir(), "ffmpeg_capabilities.json")
+        except OSError:
+            cache_path = None
+        cached = (load_json(cache_path) or {}) if cache_path else {}
+
+        capabilities = cached.get(key)
+        if capabilities is None:
+            try:
+                result = subprocess.run(
+                    [path, "-version"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    check=True
+                )
+                capabilities = {
+                    "path": path,
+                    "version": result.stdout.decode('utf-8', errors='ignore').split('\n')[0],
+                    "encoders": _list_names(path, "-encoders"),
+                    "filters": _list_names(path, "-filters"),
+                }
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.error(f"Error querying FFmpeg capabilities: {str(e)}")
+                return None
+
+            if cache_path:
+                # Оставляем только актуальную запись для этого бинарника
+                cached = {k: v for k, v in cached.items() if v.get("path") != path}
+                cached[key] = capabilities
+                save_json(cache_path, cached)
+
+        _capabilities[key] = capabilities
+        return capabilities
+
+def has_encoder(name: str) -> bool:
+    """
+    Check whether FFmpeg provides an encoder (e.g. libx264).
+    """
+    capabilities = get_ffmpeg_capabilities()
+    return capabilities is not None and name in capabilities["encoders"]
+
+def has_filter(name: str) -> bool:
+    """
+    Check whether FFmpeg provides a filter (e.g. colorkey, drawtext).
+    """
+    capabilities = get_ffmpeg_capabilities()
+    return capabilities is not None and name in capabilities["filters"]
+
+def apply_encoder_options(cmd: List[str], options: Dict[str, str]) -> List[str]:
+    """
+    Override x264 options of an FFmpeg command.
+
+    Options that are already present (e.g. ``-preset fast``) get the new
+    value, missing ones are inserted right after ``-c:v libx264``. Commands
+    that do not encode with libx264 (stream copy, other encoders) are
+    returned unchanged.
+
+    Args:
+        cmd: FFmpeg command
+        options: Option name (without "-") -> value
+
+    Returns:
+        New command
+    """
+    cmd = list(cmd)
+    codec_positions = [i for i in range(len(cmd) - 1)
+                       if cmd[i] in ("-c:v", "-vcodec", "-codec:v") and cmd[i + 1] == "libx264"]
+    if not codec_positions or not options:
+        return cmd
+
+    missing = []
+    for name, value in options.items():
+        flag = f"-{name}"
+        if flag in cmd[:-1]:
+            cmd[cmd.index(flag) + 1] = str(value)
+        else:
+            missing.extend([flag, str(value)])
+
+    insert_at = codec_positions[-1] + 2
+    return cmd[:insert_at] + missing + cmd[insert_at:]
+
+def _terminate_on_cancel(process: subprocess.Popen, cancel: Optional[threading.Event]):
+    """
+    Terminate a process once the cancel event of the run is set.
+    """
+    if cancel is None:
+        return
+
+    def watch():
+        while process.poll() is None:
+            if cancel.wait(0.5):
+                # По SIGTERM FFmpeg дописывает выход; результат отмененного запуска
+                # не нужен, поэтому процесс, не завершившийся сразу, убивается
+                process.terminate()
+                try:
+                    process.wait(timeout=2.0)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+
+def _run_cancellable(cmd: List[str], cancel: threading.Event, check: bool = False,
+                     capture_output: bool = False, input=None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Equivalent of subprocess.run that terminates the process when ``cancel`` is set.
+    """
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    with subprocess.Popen(cmd, **kwargs) as process:
+        _terminate_on_cancel(process, cancel)
+        stdout, stderr = process.communicate(input)
+    if cancel.is_set():
+        raise RunCancelled(f"Run cancelled, FFmpeg terminated: {' '.join(cmd)}")
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+def _run_with_progress(cmd: List[str], report, check: bool = True, text: bool = False,
+                       cancel: Optional[threading.Event] = None) -> subprocess.CompletedProcess:
+    """
+    Run an FFmpeg command and pass its ``-progress`` reports to a reporter.
+
+    Progress is read from stdout while stderr is collected in a separate
+    thread, so neither pipe can fill up and block FFmpeg.
+    """
+    from video_pipeline.core.progress import parse_progress
+
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _terminate_on_cancel(process, cancel)
+
+    stderr_chunks = []
+    reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    reader.start()
+
+    lines = (line.decode('utf-8', errors='ignore') for line in process.stdout)
+    try:
+        for info in parse_progress(lines):
+            report(info)
+    finally:
+        # Остаток вывода читается, даже если обработчик прогресса упал
+        process.stdout.read()
+        returncode = process.wait()
+        reader.join()
+
+    if cancel is not None and cancel.is_set():
+        raise RunCancelled(f"Run cancelled, FFmpeg terminated: {' '.join(cmd)}")
+
+    stderr = b"".join(stderr_chunks)
+    stdout = b""
+    if text:
+        stdout, stderr = "", stderr.decode('utf-8', errors='ignore')
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+def run_ffmpeg(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """
+    Run an FFmpeg command within the current pipeline run.
+
+    Encoder options of the run context (chosen e.g. by the deadline planner)
+    are applied to the command. When the context has a progress reporter,
+    the command runs with ``-progress pipe:1`` and every report (frames,
+    out_time, fps, speed) is passed to it. By default output is captured
+    and a non-zero exit status raises CalledProcessError, like the modules
+    did with subprocess.run. When the context has a cancel event, the
+    command is terminated as soon as it is set and RunCancelled is raised.
+
+    Args:
+        cmd: FFmpeg command
+        **kwargs: Additional arguments for subprocess.run
+
+    Returns:
+        Completed process
+    """
+    raise_if_cancelled()
+    context = current_context()
+    options = context.encoder_options
+    if options:
+        cmd = apply_encoder_options(cmd, options)
+        logger.debug(f"Encoder options applied: {options}")
+
+    kwargs.setdefault("check", True)
+
+    # Прогресс читается из stdout, поэтому только для команд, которые
+    # не пишут в stdout сами и не перенаправляют вывод
+    if (context.progress is not None and '-progress' not in cmd
+            and not any(arg in ('-', 'pipe:', 'pipe:1') for arg in cmd)
+            and set(kwargs) <= {"check", "text", "capture_output"}):
+        with METRICS.ffmpeg_process():
+            return _run_with_progress(cmd, context.progress, check=kwargs["check"], text=kwargs.get("text", False),
+                                      cancel=context.cancel)
+
+    if "stdout" not in kwargs and "stderr" not in kwargs:
+        kwargs.setdefault("capture_output", True)
+    with METRICS.ffmpeg_process():
+        if context.cancel is not None:
+            return _run_cancellable(cmd, context.cancel, **kwargs)
+        return subprocess.run(cmd, **kwargs)
+
 def check_ffmpeg_installed():
     """
     Checks if FFmpeg is available in the system.
@@ -15,25 +279,14 @@ def check_ffmpeg_installed():
     Returns:
         bool: True if FFmpeg is available, False otherwise
     """
-    try:
-        result = subprocess.run(
-            ["ffmpeg", "-version"], 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            check=False
-        )
-        
-        if result.returncode == 0:
-            version_info = result.stdout.decode('utf-8', errors='ignore').split('\n')[0]
-            logger.info(f"FFmpeg found: {version_info}")
-            return True
-        else:
-            logger.error("FFmpeg not found or error checking version.")
-            return False
-    except (subprocess.SubprocessError, FileNotFoundError):
+    capabilities = get_ffmpeg_capabilities()
+    if capabilities is None:
         logger.error("FFmpeg is not installed or not available in PATH.")
         _show_installation_guide()
         return False
+        
+    logger.info(f"FFmpeg found: {capabilities['version']}")
+    return True
 
 def _show_installation_guide():
     """
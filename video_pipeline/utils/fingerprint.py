@@ -0,0 +1,37 @@
+"""
+Fast fingerprints of media files
+"""
+import os
+import hashlib
+from typing import Optional
+
+# Размер блока, хешируемого в начале и в конце файла
+_SAMPLE_SIZE = 1024 * 1024
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """
+    Compute a fast fingerprint of a file.
+
+    The fingerprint combines size and mtime with a hash of the first and
+    last megabyte, so it changes whenever the file is rewritten, without
+    reading multi-gigabyte videos completely.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex string or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    digest = hashlib.sha1()
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(_SAMPLE_SIZE))
+        if stat.st_size > 2 * _SAMPLE_SIZE:
+            f.seek(-_SAMPLE_SIZE, os.SEEK_END)
+            digest.update(f.read(_SAMPLE_SIZE))
+    return digest.hexdigest()
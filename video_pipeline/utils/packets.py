@@ -0,0 +1,244 @@
+"""
+Cached keyframe and packet index of the video stream
+"""
+import os
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from video_pipeline.utils.cache import get_cache_dir
+from video_pipeline.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Пакет видеопотока: время показа, смещение в файле, размер, ключевой кадр
+PACKET_DTYPE = np.dtype([("pts", "<f8"), ("pos", "<i8"), ("size", "<i4"), ("key", "?")])
+
+# Допуск при сравнении времени с меткой пакета (меньше длительности кадра)
+_EPSILON = 1e-3
+
+class PacketIndex:
+    """
+    Packets of the first video stream sorted by presentation time.
+
+    The packets are a structured NumPy array (``PACKET_DTYPE``), usually
+    memory-mapped from the cache, so opening the index of a long video
+    reads only the pages that queries touch. Keyframe and time lookups
+    are binary searches.
+    """
+
+    def __init__(self, packets: np.ndarray):
+        """
+        Initialize the index.
+
+        Args:
+            packets: Packets with PACKET_DTYPE sorted by pts
+        """
+        self.packets = packets
+        self.pts = packets["pts"]
+        # Номера пакетов ключевых кадров и их время (отдельный небольшой массив)
+        self._key_index = np.flatnonzero(packets["key"])
+        self.keyframes = np.asarray(self.pts[self._key_index], dtype=np.float64)
+        self._byte_end = None
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def keyframe_before(self, time: float) -> float:
+        """
+        Last keyframe at or before a time.
+
+        Args:
+            time: Time in seconds
+
+        Returns:
+            Keyframe time (the first keyframe, or 0.0 without keyframes, if
+            there is no keyframe before the time)
+        """
+        i = int(np.searchsorted(self.keyframes, time + _EPSILON, side="right")) - 1
+        if i < 0:
+            return float(self.keyframes[0]) if len(self.keyframes) else 0.0
+        return float(self.keyframes[i])
+
+    def keyframe_after(self, time: float) -> Optional[float]:
+        """
+        First keyframe at or after a time.
+
+        Args:
+            time: Time in seconds
+
+        Returns:
+            Keyframe time or None if there is no keyframe after the time
+        """
+        i = int(np.searchsorted(self.keyframes, time - _EPSILON, side="left"))
+        return float(self.keyframes[i]) if i < len(self.keyframes) else None
+
+    def nearest_keyframe(self, time: float) -> float:
+        """
+        Keyframe closest to a time.
+
+        Args:
+            time: Time in seconds
+
+        Returns:
+            Keyframe time
+        """
+        before = self.keyframe_before(time)
+        after = self.keyframe_after(time)
+        if after is None or abs(time - before) <= abs(after - time):
+            return before
+        return after
+
+    def is_keyframe(self, time: float) -> bool:
+        """
+        Check whether a keyframe is shown at a time.
+        """
+        return len(self.keyframes) > 0 and abs(self.keyframe_before(time) - time) <= _EPSILON
+
+    def byte_range(self, start: float, end: float) -> Tuple[int, int]:
+        """
+        Byte range of the video packets needed to decode a time interval.
+
+        The range starts at the keyframe before ``start`` and ends after the
+        last packet shown before ``end``. Packets are stored in decode order,
+        so the end is taken from a running maximum of packet ends.
+
+        Args:
+            start: Start of the interval in seconds
+            end: End of the interval in seconds
+
+        Returns:
+            Tuple (first byte, byte after the last one); (0, 0) for an empty index
+        """
+        if not len(self.packets):
+            return 0, 0
+        if self._byte_end is None:
+            self._byte_end = np.maximum.accumulate(self.packets["pos"] + self.packets["size"])
+
+        key = int(np.searchsorted(self.keyframes, start + _EPSILON, side="right")) - 1
+        first = int(self._key_index[key]) if key >= 0 else 0
+        last = max(int(np.searchsorted(self.pts, end - _EPSILON, side="right")) - 1, first)
+        return int(self.packets["pos"][first]), int(self._byte_end[last])
+
+def _parse_packets(output: str) -> np.ndarray:
+    """
+    Parse ``ffprobe -show_entries packet=pts_time,size,pos,flags -of compact=p=0`` output.
+    """
+    rows = []
+    for line in output.splitlines():
+        fields = dict(item.partition("=")[::2] for item in line.strip().split("|"))
+        try:
+            pts = float(fields["pts_time"])
+        except (KeyError, ValueError):
+            # Пакеты без метки времени не помогают при поиске
+            continue
+        pos = fields.get("pos", "")
+        rows.append((pts, int(pos) if pos.isdigit() else -1, int(fields.get("size") or 0),
+                     fields.get("flags", "").startswith("K")))
+
+    packets = np.array(rows, dtype=PACKET_DTYPE)
+    # Пакеты идут в порядке декодирования; запросы выполняются по времени показа
+    return packets[np.argsort(packets["pts"], kind="stable")]
+
+def build_packet_index(path: str) -> np.ndarray:
+    """
+    Read the packets of the first video stream with ffprobe.
+
+    Only the container is read (no decoding).
+
+    Args:
+        path: Path to the video
+
+    Returns:
+        Packets with PACKET_DTYPE sorted by pts
+
+    Raises:
+        ValueError: If ffprobe cannot read the file
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,size,pos,flags',
+        '-of', 'compact=p=0',
+        path
+    ]
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"ffprobe failed for {path}: {e.stderr.decode(errors='ignore').strip()}")
+    except OSError as e:
+        raise ValueError(f"ffprobe failed for {path}: {str(e)}")
+    return _parse_packets(result.stdout.decode('utf-8', errors='ignore'))
+
+def _save_packets(path: str, packets: np.ndarray):
+    """
+    Atomically write packets as .npy; errors are logged and ignored.
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_", suffix=".npy")
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, packets)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Failed to write cache file {path}: {str(e)}")
+
+# Открытые индексы этого процесса (ключ - отпечаток файла)
+_indexes: Dict[str, PacketIndex] = {}
+_indexes_lock = threading.Lock()
+
+def packet_index(path: str) -> PacketIndex:
+    """
+    Get the packet index of a video.
+
+    The index is built once per file version: it is stored as ``.npy``
+    next to the probe cache (keyed by the file fingerprint) and opened
+    memory-mapped afterwards.
+
+    Args:
+        path: Path to the video
+
+    Returns:
+        Packet index
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If ffprobe cannot read the file
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"File not found: {path}")
+
+    with _indexes_lock:
+        if fingerprint in _indexes:
+            return _indexes[fingerprint]
+
+    try:
+        cache_path = os.path.join(get_cache_dir("packets"), f"{fingerprint}.npy")
+    except OSError:
+        cache_path = None
+
+    packets = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            packets = np.load(cache_path, mmap_mode="r")
+            if packets.dtype != PACKET_DTYPE:
+                packets = None
+        except (OSError, ValueError):
+            packets = None
+
+    if packets is None:
+        packets = build_packet_index(path)
+        logger.info(f"Packet index of {path}: {len(packets)} packets, {int(packets['key'].sum())} keyframes")
+        if cache_path:
+            _save_packets(cache_path, packets)
+
+    index = PacketIndex(packets)
+    with _indexes_lock:
+        _indexes[fingerprint] = index
+    return index
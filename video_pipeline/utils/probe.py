@@ -0,0 +1,165 @@
+"""
+Cached ffprobe queries
+"""
+import os
+import json
+import logging
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+from video_pipeline.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Результаты ffprobe в этом процессе (ключ - отпечаток файла)
+_probes: Dict[str, Dict[str, Any]] = {}
+_probes_lock = threading.Lock()
+
+def probe(path: str) -> Dict[str, Any]:
+    """
+    Get format and stream information of a media file.
+
+    Results are cached in memory and on disk, keyed by the file fingerprint,
+    so a file is only probed again after it changes.
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        Parsed ``ffprobe -show_format -show_streams`` output
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If ffprobe cannot read the file
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"File not found: {path}")
+
+    with _probes_lock:
+        if fingerprint in _probes:
+            return _probes[fingerprint]
+
+    try:
+        cache_path = os.path.join(get_cache_dir("probe"), f"{fingerprint}.json")
+    except OSError:
+        cache_path = None
+
+    info = load_json(cache_path) if cache_path else None
+    if info is None:
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-print_format', 'json',
+            '-show_format',
+            '-show_streams',
+            path
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=True)
+            info = json.loads(result.stdout.decode('utf-8', errors='ignore'))
+        except subprocess.CalledProcessError as e:
+            raise ValueError(f"ffprobe failed for {path}: {e.stderr.decode(errors='ignore').strip()}")
+        except (OSError, ValueError) as e:
+            raise ValueError(f"ffprobe failed for {path}: {str(e)}")
+
+        if cache_path:
+            save_json(cache_path, info)
+
+    with _probes_lock:
+        _probes[fingerprint] = info
+    return info
+
+def probe_many(paths: Iterable[str], max_workers: int = 8) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Probe several files concurrently.
+
+    Args:
+        paths: Paths to media files
+        max_workers: Maximum number of concurrent ffprobe processes
+
+    Returns:
+        Tuple (results, errors): path -> probe result and path -> error message
+    """
+    paths = list(dict.fromkeys(paths))
+    results, errors = {}, {}
+    if not paths:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        futures = {path: executor.submit(probe, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except (OSError, ValueError) as e:
+                errors[path] = str(e)
+    return results, errors
+
+def media_duration(info: Dict[str, Any]) -> Optional[float]:
+    """
+    Duration of a probed file in seconds.
+
+    Args:
+        info: Probe result
+
+    Returns:
+        Duration or None if it is unknown
+    """
+    try:
+        return float(info["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def has_stream(info: Dict[str, Any], codec_type: str) -> bool:
+    """
+    Check whether a probed file has a stream of the given type.
+
+    Args:
+        info: Probe result
+        codec_type: Stream type (video, audio, subtitle)
+
+    Returns:
+        True if such a stream exists
+    """
+    return any(s.get("codec_type") == codec_type for s in info.get("streams", []))
+
+def video_stream(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    First video stream of a probed file.
+
+    Args:
+        info: Probe result
+
+    Returns:
+        Stream description or None if there is no video stream
+    """
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "video":
+            return stream
+    return None
+
+def frame_rate(stream: Dict[str, Any]) -> Optional[float]:
+    """
+    Frame rate of a video stream.
+
+    Args:
+        stream: Stream description from the probe result
+
+    Returns:
+        Frames per second or None if it is unknown
+    """
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        value = stream.get(key)
+        if not value:
+            continue
+        try:
+            numerator, _, denominator = str(value).partition("/")
+            rate = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            continue
+        if rate > 0:
+            return rate
+    return None
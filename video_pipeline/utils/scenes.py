@@ -0,0 +1,82 @@
+"""
+Scene-change analysis on keyframes
+"""
+import os
+import re
+import logging
+import subprocess
+from typing import List, Tuple
+
+from video_pipeline.utils.cache import get_cache_dir, load_json, save_json
+from video_pipeline.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Ширина кадра для анализа: сцены различимы и на маленьком изображении
+ANALYSIS_WIDTH = 160
+
+_PTS_RE = re.compile(r"pts_time:\s*([0-9.eE+-]+)")
+_SCORE_RE = re.compile(r"lavfi\.scene_score=([0-9.eE+-]+)")
+
+def keyframe_scene_scores(path: str) -> List[Tuple[float, float]]:
+    """
+    Get keyframe timestamps with their scene-change scores.
+
+    Only keyframes are decoded (``-skip_frame nokey``) and they are downscaled
+    before scoring, so the pass is much faster than decoding every frame.
+    The score of a keyframe compares it to the previous keyframe. Every
+    returned time is a keyframe, so a stream copy cut there is clean.
+    Results are cached by file fingerprint.
+
+    Args:
+        path: Path to the video
+
+    Returns:
+        List of (time in seconds, score from 0 to 1) sorted by time
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        subprocess.CalledProcessError: If FFmpeg fails
+    """
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"File not found: {path}")
+
+    try:
+        cache_path = os.path.join(get_cache_dir("scenes"), f"{fingerprint}.json")
+    except OSError:
+        cache_path = None
+
+    cached = load_json(cache_path) if cache_path else None
+    if cached is not None:
+        return [(float(t), float(s)) for t, s in cached]
+
+    cmd = [
+        'ffmpeg',
+        '-hide_banner',
+        '-skip_frame', 'nokey',
+        '-i', path,
+        '-an', '-sn', '-dn',
+        '-vf', f"scale={ANALYSIS_WIDTH}:-2,select='gte(scene\\,0)',metadata=mode=print:file=-",
+        '-f', 'null',
+        '-'
+    ]
+    logger.debug(f"Executing command: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, check=True)
+
+    keyframes = []
+    time = None
+    for line in result.stdout.decode('utf-8', errors='ignore').splitlines():
+        match = _PTS_RE.search(line)
+        if match:
+            time = float(match.group(1))
+            continue
+        match = _SCORE_RE.search(line)
+        if match and time is not None:
+            keyframes.append((time, float(match.group(1))))
+            time = None
+
+    keyframes.sort()
+    if cache_path:
+        save_json(cache_path, keyframes)
+    return keyframes